@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tempo de carga e memória residente do catálogo de vinhos: leitura direta do CSV
+(`pd.read_csv`) contra o snapshot binário (`src/catalog_snapshot.py`).
+
+Cada medição roda em um subprocesso novo; a memória é o aumento do RSS do
+processo com o catálogo carregado.
+
+Uso:
+    python benchmarks/bench_catalog_load.py [--wines 100000,1000000]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+sys.path.insert(0, str(Path(__file__).parent))
+
+MODES = ('csv', 'snapshot')
+
+
+def rss_mb() -> float:
+    """RSS atual do processo (Linux: /proc/self/statm; fora dele, o pico do ru_maxrss)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(csv_path: str, mode: str, snapshot_dir: str) -> dict:
+    import pandas as pd  # importado antes da medição nos dois modos
+    from src.catalog_snapshot import open_snapshot
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    if mode == 'csv':
+        df = pd.read_csv(csv_path, encoding='utf-8')
+    else:
+        df = open_snapshot(csv_path, snapshot_dir).to_dataframe()
+    elapsed = time.perf_counter() - start
+
+    return {'rows': len(df), 'seconds': elapsed, 'rss_delta_mb': rss_mb() - rss_before}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wines', default='100000,1000000')
+    parser.add_argument('--worker', nargs=3, metavar=('CSV', 'MODO', 'SNAPSHOT_DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    if args.worker:
+        print(json.dumps(run_worker(*args.worker)))
+        return
+
+    from generators import generate_wines_csv
+    from src.catalog_snapshot import build_snapshot
+
+    print(f"{'vinhos':>10} {'modo':<10} {'carga (s)':>10} {'RSS (MB)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(v) for v in args.wines.split(',') if v]:
+            csv_path = generate_wines_csv(Path(tmp) / f"vinhos_{n}.csv", n)
+            build_snapshot(csv_path, tmp)
+            for mode in MODES:
+                out = subprocess.run([sys.executable, __file__, '--worker', str(csv_path), mode, tmp],
+                                     capture_output=True, text=True, check=True).stdout
+                result = json.loads(out.strip().splitlines()[-1])
+                print(f"{n:>10} {mode:<10} {result['seconds']:>10.3f} {result['rss_delta_mb']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark de precisão x velocidade do Fuzzy Engine para diferentes resoluções do universo.
+
+A referência é o scikit-fuzzy com universo de alta resolução (1001 pontos).
+Para cada resolução mede-se o tempo por chamada do avaliador compilado e do
+simulador do scikit-fuzzy, e o erro do avaliador compilado contra a referência.
+
+Uso:
+    python benchmarks/bench_fuzzy_resolution.py [--samples 500] [--resolutions 11,21,51,101,201,501,1001]
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.fuzzy_engine import FuzzyEngine
+
+REFERENCE_RESOLUTION = 1001
+
+
+def categorize(valor):
+    if valor is None:
+        return None
+    if valor < 4:
+        return 'leve'
+    if valor < 7:
+        return 'medio'
+    return 'encorpado'
+
+
+def skfuzzy_compute(engine, params):
+    sim = engine.simulator
+    for name, value in params.items():
+        sim.input[name] = value
+    sim.compute()
+    valor = sim.output.get('perfil_vinho')
+    return None if valor is None else float(valor)
+
+
+def time_per_call(fn, samples):
+    start = time.perf_counter()
+    for params in samples:
+        fn(params)
+    return (time.perf_counter() - start) / len(samples) * 1e6
+
+
+def run(resolutions, n_samples, seed=42):
+    reference = FuzzyEngine(resolution=REFERENCE_RESOLUTION)
+    input_names = reference.evaluator.input_names
+
+    rng = np.random.default_rng(seed)
+    samples = [
+        {name: float(v) for name, v in zip(input_names, row)}
+        for row in rng.uniform(0, 10, size=(n_samples, len(input_names)))
+    ]
+    expected = [skfuzzy_compute(reference, params) for params in samples]
+
+    results = []
+    for resolution in resolutions:
+        engine = FuzzyEngine(resolution=resolution)
+        compiled = [engine.evaluator.compute(params) for params in samples]
+
+        errors = [abs(a - b) for a, b in zip(compiled, expected) if a is not None and b is not None]
+        same_category = sum(categorize(a) == categorize(b) for a, b in zip(compiled, expected))
+
+        results.append({
+            'resolution': resolution,
+            'compiled_us_per_call': time_per_call(engine.evaluator.compute, samples),
+            'skfuzzy_us_per_call': time_per_call(lambda p: skfuzzy_compute(engine, p), samples),
+            'mean_abs_error': float(np.mean(errors)) if errors else 0.0,
+            'max_abs_error': float(np.max(errors)) if errors else 0.0,
+            'category_agreement': same_category / len(samples),
+        })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=500)
+    parser.add_argument('--resolutions', default='11,21,51,101,201,501,1001')
+    parser.add_argument('--output', help='Arquivo JSON para salvar os resultados')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    resolutions = [int(r) for r in args.resolutions.split(',')]
+    results = run(resolutions, args.samples)
+
+    print(f"{'resolução':>10} {'compilado (µs)':>15} {'skfuzzy (µs)':>13} {'erro médio':>11} {'erro máx':>9} {'categoria':>10}")
+    for r in results:
+        print(f"{r['resolution']:>10} {r['compiled_us_per_call']:>15.1f} {r['skfuzzy_us_per_call']:>13.1f} "
+              f"{r['mean_abs_error']:>11.4f} {r['max_abs_error']:>9.4f} {r['category_agreement']:>10.1%}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Atualização incremental das regras aprendidas (`FuzzyEngine.add_dishes`) contra
+o retreino completo de um FuzzyEngine com a base inteira.
+
+A base sintética tem a harmonização correlacionada com intensidade e gordura
+(com ruído), para que a árvore tenha estrutura. Mede-se o tempo de cada
+atualização e, no fim, a concordância do perfil calculado pelos dois motores.
+
+Uso:
+    python benchmarks/bench_incremental_rules.py [--dishes 500] [--batches 10,50,100]
+"""
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def labeled_dishes(path: Path, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Pratos sintéticos com harmonização derivada de intensidade + gordura"""
+    from generators import generate_dishes_csv
+
+    df = pd.read_csv(generate_dishes_csv(path, n_rows, seed))
+    rng = np.random.default_rng(seed)
+    score = df['intensidade_sabor'] + df['gordura'] + rng.normal(0, 2, len(df))
+    df['harmonizacao_sugerida'] = np.where(score < 8, 'Vinho branco leve',
+                                           np.where(score < 13, 'Tinto médio', 'Tinto encorpado'))
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dishes', type=int, default=500, help='pratos usados no treino inicial')
+    parser.add_argument('--batches', default='10,50,100', help='tamanhos dos lotes adicionados')
+    parser.add_argument('--samples', type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from src.fuzzy_engine import FuzzyEngine, INPUT_MEMBERSHIP_FUNCTIONS
+
+    batches = [int(v) for v in args.batches.split(',') if v]
+    with tempfile.TemporaryDirectory() as tmp:
+        df = labeled_dishes(Path(tmp) / "pratos.csv", args.dishes + sum(batches))
+        initial_csv = Path(tmp) / "pratos_iniciais.csv"
+        df.iloc[:args.dishes].to_csv(initial_csv, index=False)
+        engine = FuzzyEngine(str(initial_csv))
+
+        print(f"{'lote':>6} {'tempo (s)':>10} {'folhas':>7} {'redivididas':>12} {'regras +/-':>11}")
+        start = args.dishes
+        for size in batches:
+            t0 = time.perf_counter()
+            report = engine.add_dishes(df.iloc[start:start + size])
+            elapsed = time.perf_counter() - t0
+            start += size
+            changes = f"+{report['regras_adicionadas']}/-{report['regras_removidas']}"
+            print(f"{size:>6} {elapsed:>10.3f} {report['folhas_afetadas']:>7} "
+                  f"{report['folhas_redivididas']:>12} {changes:>11}")
+
+        full_csv = Path(tmp) / "pratos_completos.csv"
+        df.to_csv(full_csv, index=False)
+        t0 = time.perf_counter()
+        full = FuzzyEngine(str(full_csv))
+        print(f"\nretreino completo ({len(df)} pratos): {time.perf_counter() - t0:.3f}s")
+
+    names = list(INPUT_MEMBERSHIP_FUNCTIONS)
+    points = np.random.default_rng(1).uniform(0, 10, size=(args.samples, len(names)))
+    same = sum(engine.compute_wine_profile(dict(zip(names, p)))['categoria']
+               == full.compute_wine_profile(dict(zip(names, p)))['categoria'] for p in points)
+    print(f"regras: incremental={len(engine.rule_specs)} completo={len(full.rule_specs)}")
+    print(f"mesma categoria em {same / len(points):.1%} de {len(points)} pontos aleatórios")
+
+
+if __name__ == '__main__':
+    main()
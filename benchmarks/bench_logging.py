@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Vazão do caminho quente (análise com cache, perfil fuzzy e recomendação sem LLM)
+com o logging ativo, em cada perfil de log.
+
+Cada perfil roda em um subprocesso com a saída padrão redirecionada para um
+arquivo temporário, para que o custo de I/O dos logs seja real e não dependa
+do terminal.
+
+Uso:
+    python benchmarks/bench_logging.py [--requests 3000] [--profiles development,production]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def run_worker(n_requests: int) -> dict:
+    """Executa as requisições no processo atual e devolve as medidas"""
+    from fake_llm import FakeGenerativeModel
+    from src.config import REQUIRED_DISH_PARAMS
+    from src.fuzzy_engine import FuzzyEngine
+    from src.llm_processor import LLMProcessor
+    from src.recommender import WineRecommender
+
+    workdir = Path(tempfile.mkdtemp())
+    processor = LLMProcessor(model=FakeGenerativeModel(), cache_file=str(workdir / "cache.json"))
+    engine = FuzzyEngine(use_learned_rules=False)
+    recommender = WineRecommender(str(root_dir / "data" / "vinhos.csv"))
+    recommender.use_llm_justification = False
+
+    dishes = [f"Prato de teste {i}" for i in range(50)]
+    for dish in dishes:
+        processor.analyze_dish(dish)
+
+    rng = np.random.default_rng(0)
+    samples = [
+        {name: float(v) for name, v in zip(REQUIRED_DISH_PARAMS, row)}
+        for row in rng.uniform(0, 10, size=(len(dishes), len(REQUIRED_DISH_PARAMS)))
+    ]
+
+    start = time.perf_counter()
+    for i in range(n_requests):
+        processor.analyze_dish(dishes[i % len(dishes)])
+        params = samples[i % len(samples)]
+        recommender.recommend(params, engine.compute_wine_profile(params))
+    elapsed = time.perf_counter() - start
+
+    return {'requests': n_requests, 'seconds': elapsed, 'req_per_s': n_requests / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--profiles', default='development,production')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.requests)), file=sys.stderr)
+        return
+
+    print(f"{'perfil':<14} {'req/s':>10} {'linhas de log':>14}")
+    for profile in args.profiles.split(','):
+        with tempfile.NamedTemporaryFile('w+', suffix='.log') as out:
+            proc = subprocess.run(
+                [sys.executable, __file__, '--worker', '--requests', str(args.requests)],
+                env={**os.environ, 'LOG_PROFILE': profile},
+                stdout=out, stderr=subprocess.PIPE, text=True, check=True
+            )
+            out.seek(0)
+            lines = sum(1 for _ in out)
+        result = json.loads(proc.stderr.strip().splitlines()[-1])
+        print(f"{profile:<14} {result['req_per_s']:>10.0f} {lines:>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Memória por worker com o catálogo de vinhos em DataFrame (cópia privada por
+processo) ou mapeado em memória a partir do snapshot (páginas compartilhadas).
+
+Para cada modo e número de workers, sobe N processos que carregam um
+WineRecommender, fazem algumas recomendações e, todos vivos ao mesmo tempo,
+leem /proc/self/smaps_rollup:
+- USS: memória privada do processo (o que de fato cresce por worker)
+- PSS: memória proporcional (páginas compartilhadas divididas entre os processos)
+
+Linux apenas. Uso:
+    python benchmarks/bench_shared_catalog.py [--wines 1000000] [--workers 1,2,4]
+"""
+import argparse
+import logging
+import multiprocessing as mp
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+sys.path.insert(0, str(Path(__file__).parent))
+
+MODES = ('dataframe', 'mmap')
+
+
+def memory_mb() -> dict:
+    """USS e PSS do processo atual em MB"""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+        'pss': fields.get('Pss', 0),
+    }
+
+
+def worker(csv_path, snapshot_dir, mode, barrier, results):
+    logging.disable(logging.WARNING)
+    import pandas  # noqa: F401  (fora da medição nos dois modos)
+    from src import catalog_snapshot
+    from src.config import REQUIRED_DISH_PARAMS
+    from src.recommender import WineRecommender
+
+    catalog_snapshot.DEFAULT_SNAPSHOT_DIR = Path(snapshot_dir)
+    baseline = memory_mb()
+
+    recommender = WineRecommender(csv_path, storage=mode)
+    recommender.use_llm_justification = False
+    rng = np.random.default_rng(0)
+    for row in rng.uniform(0, 10, size=(20, len(REQUIRED_DISH_PARAMS))):
+        params = dict(zip(REQUIRED_DISH_PARAMS, row))
+        recommender.recommend(params, {'categoria': 'medio', 'valor': 5.0})
+
+    barrier.wait()
+    after = memory_mb()
+    results.put({key: after[key] - baseline[key] for key in after})
+    barrier.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wines', type=int, default=1_000_000)
+    parser.add_argument('--workers', default='1,2,4')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from generators import generate_wines_csv
+    from src.catalog_snapshot import build_snapshot
+
+    ctx = mp.get_context('spawn')
+    print(f"{'modo':<10} {'workers':>8} {'USS/worker (MB)':>16} {'PSS total (MB)':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = str(generate_wines_csv(Path(tmp) / "vinhos.csv", args.wines))
+        build_snapshot(csv_path, tmp)
+
+        for mode in MODES:
+            for n in [int(v) for v in args.workers.split(',') if v]:
+                barrier = ctx.Barrier(n)
+                results = ctx.Queue()
+                procs = [ctx.Process(target=worker, args=(csv_path, tmp, mode, barrier, results)) for _ in range(n)]
+                for proc in procs:
+                    proc.start()
+                measures = [results.get() for _ in procs]
+                for proc in procs:
+                    proc.join()
+
+                uss = sum(m['uss'] for m in measures) / n
+                pss = sum(m['pss'] for m in measures)
+                print(f"{mode:<10} {n:>8} {uss:>16.1f} {pss:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
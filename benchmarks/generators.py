@@ -0,0 +1,85 @@
+"""
+Geradores de dados sintéticos para benchmarks: catálogos de vinhos e bases de
+pratos com o mesmo esquema de data/vinhos.csv e data/pratos.csv
+"""
+import csv
+import sys
+from pathlib import Path
+
+import numpy as np
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.config import REQUIRED_CSV_COLUMNS, REQUIRED_DISH_PARAMS
+
+GRAPES = ['Cabernet Sauvignon', 'Merlot', 'Pinot Noir', 'Syrah', 'Malbec', 'Tempranillo', 'Nebbiolo',
+          'Sangiovese', 'Chardonnay', 'Sauvignon Blanc', 'Riesling', 'Albariño', 'Touriga Nacional',
+          'Alvarinho', 'Carménère', 'Grenache', 'Moscato', 'Tannat']
+TYPES = ['tinto', 'branco', 'rosé', 'espumante', 'fortificado', 'sobremesa']
+COUNTRIES = {
+    'França': ['Bordeaux', 'Borgonha', 'Champagne', 'Rhône', 'Loire'],
+    'Itália': ['Piemonte', 'Toscana', 'Vêneto', 'Sicília'],
+    'Espanha': ['Rioja', 'Ribera del Duero', 'Rías Baixas'],
+    'Portugal': ['Douro', 'Alentejo', 'Vinho Verde', 'Dão'],
+    'Argentina': ['Mendoza', 'Salta'],
+    'Chile': ['Maipo', 'Colchagua', 'Casablanca'],
+    'Estados Unidos': ['Napa Valley', 'Sonoma', 'Oregon'],
+    'Brasil': ['Serra Gaúcha', 'Vale do São Francisco'],
+}
+PAIRINGS = ['carne vermelha', 'cordeiro', 'queijos duros', 'peixe grelhado', 'frutos do mar', 'massas',
+            'risoto', 'aves', 'sobremesas', 'chocolate', 'comida asiática', 'saladas', 'embutidos',
+            'carne de caça', 'trufas', 'bacalhau', 'pizza', 'churrasco']
+DISH_CATEGORIES = ['Carne Vermelha', 'Aves', 'Peixe', 'Frutos do Mar', 'Massas', 'Vegetariano', 'Sobremesas']
+HARMONIZATIONS = ['vinho branco leve', 'espumante', 'tinto médio', 'branco encorpado', 'tinto encorpado',
+                  'vinho doce', 'rosé', 'vinho verde', 'tinto robusto']
+
+
+def generate_wines_csv(path, n_rows: int, seed: int = 0) -> Path:
+    """Gera um catálogo de vinhos com `n_rows` linhas"""
+    rng = np.random.default_rng(seed)
+    countries = list(COUNTRIES)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(REQUIRED_CSV_COLUMNS)
+        scores = rng.integers(0, 11, size=(n_rows, 4))
+        for i in range(n_rows):
+            country = countries[rng.integers(len(countries))]
+            regions = COUNTRIES[country]
+            tags = rng.choice(PAIRINGS, size=3, replace=False)
+            writer.writerow([
+                f"Vinho Sintético {i}",
+                GRAPES[rng.integers(len(GRAPES))],
+                TYPES[rng.integers(len(TYPES))],
+                country,
+                regions[rng.integers(len(regions))],
+                round(float(rng.uniform(10.5, 20.0)), 1),
+                *scores[i],
+                ';'.join(tags),
+            ])
+    return path
+
+
+def generate_dishes_csv(path, n_rows: int, seed: int = 0) -> Path:
+    """Gera uma base de pratos com os 10 parâmetros e harmonização sugerida"""
+    rng = np.random.default_rng(seed)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['nome', 'categoria', 'ingredientes_principais', *REQUIRED_DISH_PARAMS, 'harmonizacao_sugerida'])
+        params = rng.integers(0, 11, size=(n_rows, len(REQUIRED_DISH_PARAMS)))
+        for i in range(n_rows):
+            ingredients = rng.choice(PAIRINGS, size=2, replace=False)
+            writer.writerow([
+                f"Prato Sintético {i}",
+                DISH_CATEGORIES[rng.integers(len(DISH_CATEGORIES))],
+                ', '.join(ingredients),
+                *params[i],
+                HARMONIZATIONS[rng.integers(len(HARMONIZATIONS))],
+            ])
+    return path
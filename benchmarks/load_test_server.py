@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do servidor HTTP (`src/server.py`) sem rede, com o backend LLM local.
+
+Sobe o servidor em um subprocesso (catálogo sintético, LocalBackend com latência
+e taxa de falhas configuráveis, cache LLM temporário) e dispara POST /recommend
+com N clientes simultâneos, cada um com conexão persistente. Cada requisição usa
+um prato diferente, então toda análise passa pelo backend.
+
+Para cada nível de concorrência mostra vazão, latência (p50/p95/p99) das
+respostas 200 e quantas foram recusadas com 503 (fila cheia ou circuito aberto).
+
+Com `--breaker`, o backend local fica atrás do circuit breaker com tempo máximo
+`--llm-timeout` por chamada; combinado com `--llm-latency` alto ou
+`--llm-error-rate` alto, simula um incidente no provedor.
+
+Uso:
+    python benchmarks/load_test_server.py [--concurrency 1,8,32,128] [--requests 400]
+                                          [--llm-latency 0.05] [--llm-error-rate 0.0]
+                                          [--queue-size 64] [--workers 8]
+                                          [--breaker] [--llm-timeout 0.5]
+"""
+import argparse
+import http.client
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def run_server(wines_csv: str, dishes_csv: str, cache_file: str, llm_latency: float,
+               llm_error_rate: float, queue_size: int, workers: int, breaker: bool, llm_timeout: float) -> None:
+    """Modo subprocesso: sobe o servidor em uma porta livre e informa a porta no stdout"""
+    import asyncio
+    import logging
+    logging.disable(logging.WARNING)
+
+    from src.circuit_breaker import CircuitBreaker, CircuitBreakerBackend
+    from src.dish_database import DishDatabase
+    from src.llm_backends import LocalBackend
+    from src.pairing_service import PairingService
+    from src.server import PairingServer
+
+    backend = LocalBackend(DishDatabase(dishes_csv), latency=llm_latency, error_rate=llm_error_rate)
+    if breaker:
+        backend = CircuitBreakerBackend(backend, CircuitBreaker(slow_call=llm_timeout, open_seconds=2.0),
+                                        timeout=llm_timeout, max_concurrency=workers * 2)
+    service = PairingService(wines_csv, dishes_csv, backend=backend, llm_cache_file=cache_file)
+
+    async def serve():
+        server = PairingServer(service, host='127.0.0.1', port=0, queue_size=queue_size, workers=workers)
+        await server.start()
+        print(f"PORT {server.port}", flush=True)
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def run_clients(port: int, concurrency: int, n_requests: int, offset: int) -> dict:
+    """Dispara `n_requests` requisições com `concurrency` clientes; retorna as medições"""
+    counter = iter(range(offset, offset + n_requests))
+    lock = threading.Lock()
+    latencies, statuses = [], {}
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            body = json.dumps({'prato': f"Prato de teste {i} com molho da casa"})
+            start = time.perf_counter()
+            conn.request('POST', '/recommend', body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+                if response.status == 200:
+                    latencies.append(elapsed)
+        conn.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000 if latencies else (0.0, 0.0, 0.0)
+    return {
+        'ok_per_s': statuses.get(200, 0) / elapsed,
+        'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+        'rejected': statuses.get(503, 0),
+        'errors': sum(n for status, n in statuses.items() if status not in (200, 503)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', default='1,8,32,128')
+    parser.add_argument('--requests', type=int, default=400, help='requisições por nível de concorrência')
+    parser.add_argument('--llm-latency', type=float, default=0.05, help='latência (s) de cada chamada ao LLM')
+    parser.add_argument('--llm-error-rate', type=float, default=0.0, help='fração de chamadas ao LLM que falham')
+    parser.add_argument('--queue-size', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--wines', type=int, default=10_000)
+    parser.add_argument('--breaker', action='store_true', help='circuit breaker na frente do backend local')
+    parser.add_argument('--llm-timeout', type=float, default=0.5, help='tempo máximo (s) por chamada com --breaker')
+    parser.add_argument('--serve', nargs=3, metavar=('VINHOS', 'PRATOS', 'CACHE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        run_server(*args.serve, args.llm_latency, args.llm_error_rate, args.queue_size, args.workers,
+                   args.breaker, args.llm_timeout)
+        return
+
+    from generators import generate_dishes_csv, generate_wines_csv
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wines_csv = generate_wines_csv(Path(tmp) / "vinhos.csv", args.wines)
+        dishes_csv = generate_dishes_csv(Path(tmp) / "pratos.csv", 100)
+        cmd = [sys.executable, __file__, '--serve', str(wines_csv), str(dishes_csv), str(Path(tmp) / "cache.json"),
+               '--llm-latency', str(args.llm_latency), '--llm-error-rate', str(args.llm_error_rate),
+               '--queue-size', str(args.queue_size),
+               '--workers', str(args.workers), '--llm-timeout', str(args.llm_timeout)]
+        if args.breaker:
+            cmd.append('--breaker')
+        server = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+        try:
+            line = server.stdout.readline()
+            if not line.startswith('PORT '):
+                raise RuntimeError("Servidor não iniciou")
+            port = int(line.split()[1])
+
+            print(f"LLM local: {args.llm_latency * 1000:.0f} ms/chamada, {args.llm_error_rate:.0%} de falhas, "
+                  f"fila={args.queue_size}, workers={args.workers}"
+                  + (f", breaker (timeout {args.llm_timeout * 1000:.0f} ms)" if args.breaker else ""))
+            print(f"{'clientes':>8} {'ok/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'503':>6} {'erros':>6}")
+            offset = 0
+            for concurrency in [int(v) for v in args.concurrency.split(',') if v]:
+                r = run_clients(port, concurrency, args.requests, offset)
+                offset += args.requests
+                print(f"{concurrency:>8} {r['ok_per_s']:>8.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                      f"{r['p99_ms']:>9.1f} {r['rejected']:>6} {r['errors']:>6}")
+
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            conn.request('GET', '/stats')
+            stats = json.loads(conn.getresponse().read())
+            print(f"\nservidor: {stats['servidor']}")
+            print(f"proteção LLM: {stats['protecao_llm']}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmarks ponta a ponta do pipeline de harmonização.
+
+Gera catálogos sintéticos de vinhos e pratos nos tamanhos pedidos e mede:
+- FuzzyTreeBuilder.train
+- construção do FuzzyEngine e compute_wine_profile
+- carga do WineRecommender e recommend (sem LLM e com LLM falso)
+- DishDatabase.search_dish
+- LLMCache get/set e LLMProcessor.analyze_dish (miss e hit) com LLM falso local
+  e com o backend local (`src/llm_backends.py`)
+
+Os resultados são gravados em JSON para comparação entre commits:
+
+    python benchmarks/run_benchmarks.py --output bench_main.json
+    python benchmarks/run_benchmarks.py --output bench_branch.json --compare bench_main.json
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from generators import generate_dishes_csv, generate_wines_csv
+from fake_llm import FakeGenerativeModel
+from src.cache import LLMCache
+from src.config import REQUIRED_DISH_PARAMS
+from src.dish_database import DishDatabase
+from src.fuzzy_engine import FuzzyEngine
+from src.fuzzy_tree_builder import FuzzyTreeBuilder
+from src.llm_backends import LocalBackend
+from src.llm_processor import LLMProcessor
+from src.recommender import WineRecommender
+
+REGRESSION_THRESHOLD = 1.10
+
+
+def measure(fn, repeat: int = 5, number: int = 1, setup=None) -> dict:
+    """Executa `fn` `number` vezes por rodada, em `repeat` rodadas; tempos em ms por chamada"""
+    timings = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(arg) if setup else fn()
+        timings.append((time.perf_counter() - start) / number * 1000)
+
+    return {
+        'mean_ms': statistics.mean(timings),
+        'median_ms': statistics.median(timings),
+        'min_ms': min(timings),
+        'max_ms': max(timings),
+        'repeat': repeat,
+        'number': number,
+    }
+
+
+def random_params(n: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    return [
+        {name: float(v) for name, v in zip(REQUIRED_DISH_PARAMS, row)}
+        for row in rng.uniform(0, 10, size=(n, len(REQUIRED_DISH_PARAMS)))
+    ]
+
+
+def bench_fuzzy(results, workdir, dish_sizes, repeat):
+    samples = random_params(200)
+    for n in dish_sizes:
+        csv_path = str(generate_dishes_csv(workdir / f"pratos_{n}.csv", n))
+
+        results[f"tree_builder.train[dishes={n}]"] = measure(
+            lambda builder: builder.train(max_depth=4),
+            repeat=max(1, repeat // 2), setup=lambda: FuzzyTreeBuilder(csv_path)
+        )
+        results[f"fuzzy_engine.init[dishes={n}]"] = measure(
+            lambda: FuzzyEngine(csv_path, use_learned_rules=True), repeat=max(1, repeat // 2)
+        )
+
+        engine = FuzzyEngine(csv_path, use_learned_rules=True)
+        it = iter(samples * (repeat + 1))
+        results[f"fuzzy_engine.compute_wine_profile[dishes={n}]"] = measure(
+            lambda: engine.compute_wine_profile(next(it)), repeat=repeat, number=len(samples) // repeat or 1
+        )
+
+    engine = FuzzyEngine(use_learned_rules=False)
+    it = iter(samples * (repeat + 1))
+    results["fuzzy_engine.compute_wine_profile[default_rules]"] = measure(
+        lambda: engine.compute_wine_profile(next(it)), repeat=repeat, number=len(samples) // repeat or 1
+    )
+
+
+def bench_recommender(results, workdir, wine_sizes, repeat, llm_latency):
+    params = random_params(50, seed=2)
+    engine = FuzzyEngine(use_learned_rules=False)
+    profiles = [(p, engine.compute_wine_profile(p)) for p in params]
+
+    for n in wine_sizes:
+        csv_path = str(generate_wines_csv(workdir / f"vinhos_{n}.csv", n))
+
+        results[f"wine_recommender.load[wines={n}]"] = measure(lambda: WineRecommender(csv_path), repeat=repeat)
+
+        recommender = WineRecommender(csv_path)
+        recommender.use_llm_justification = False
+        it = iter(profiles * (repeat + 1))
+        results[f"wine_recommender.recommend[wines={n}]"] = measure(
+            lambda: recommender.recommend(*next(it)), repeat=repeat, number=10
+        )
+
+        with_llm = WineRecommender(csv_path, model=FakeGenerativeModel(latency=llm_latency))
+        it = iter(profiles * (repeat + 1))
+        results[f"wine_recommender.recommend_llm[wines={n},latency={llm_latency}]"] = measure(
+            lambda: with_llm.recommend(*next(it)), repeat=repeat, number=3
+        )
+
+
+def bench_dish_database(results, workdir, dish_sizes, repeat):
+    for n in dish_sizes:
+        db = DishDatabase(str(generate_dishes_csv(workdir / f"pratos_busca_{n}.csv", n, seed=3)))
+        queries = iter(['cordeiro', 'risoto', 'Prato Sintético 1', 'inexistente'] * 1000)
+        results[f"dish_database.search_dish[dishes={n}]"] = measure(
+            lambda: db.search_dish(next(queries)), repeat=repeat, number=20
+        )
+
+
+def bench_llm_cache(results, workdir, repeat, llm_latency):
+    cache = LLMCache(str(workdir / "cache_bench.json"))
+    keys = [f"prato {i}" for i in range(200)]
+    value = {name: 5.0 for name in REQUIRED_DISH_PARAMS}
+    for key in keys:
+        cache.set(key, value)
+
+    it = iter(keys * (repeat + 1))
+    results["llm_cache.get[entries=200]"] = measure(lambda: cache.get(next(it)), repeat=repeat, number=200)
+    counter = iter(range(10 ** 9))
+    results["llm_cache.set[entries=200+,persist]"] = measure(
+        lambda: cache.set(f"novo {next(counter)}", value), repeat=repeat, number=20
+    )
+    # Gravação em segundo plano (fora da requisição): custo de um flush com o arquivo inteiro
+    results["llm_cache.flush[entries=200+]"] = measure(
+        lambda: (cache.set(f"novo {next(counter)}", value), cache.flush()), repeat=repeat, number=5
+    )
+
+    processor = LLMProcessor(model=FakeGenerativeModel(latency=llm_latency),
+                             cache_file=str(workdir / "cache_processor.json"))
+    misses = iter(f"Prato inédito número {i}" for i in range(10 ** 9))
+    results[f"llm_processor.analyze_dish[miss,latency={llm_latency}]"] = measure(
+        lambda: processor.analyze_dish(next(misses)), repeat=repeat, number=3
+    )
+    processor.analyze_dish("Filé mignon ao molho madeira")
+    results["llm_processor.analyze_dish[hit]"] = measure(
+        lambda: processor.analyze_dish("Filé mignon ao molho madeira"), repeat=repeat, number=100
+    )
+
+    # Backend local sem latência: custo próprio da análise por base de pratos/palavras-chave
+    backend = LocalBackend(DishDatabase(str(generate_dishes_csv(workdir / "pratos_backend.csv", 300))))
+    local = LLMProcessor(use_cache=False, backend=backend)
+    misses = iter(f"Costela assada número {i} com molho de cogumelos" for i in range(10 ** 9))
+    results["llm_processor.analyze_dish[miss,backend=local]"] = measure(
+        lambda: local.analyze_dish(next(misses)), repeat=repeat, number=100
+    )
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root_dir,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return 'desconhecido'
+
+
+def compare(current: dict, baseline_path: str) -> int:
+    """Imprime a razão atual/base por benchmark; retorna o número de regressões"""
+    baseline = json.loads(Path(baseline_path).read_text(encoding='utf-8'))['results']
+    regressions = 0
+    print(f"\nComparação com {baseline_path}:")
+    for name, stats in current.items():
+        if name not in baseline:
+            continue
+        ratio = stats['median_ms'] / baseline[name]['median_ms'] if baseline[name]['median_ms'] else float('inf')
+        flag = ''
+        if ratio > REGRESSION_THRESHOLD:
+            flag = '  <-- REGRESSÃO'
+            regressions += 1
+        print(f"  {name:<60} {baseline[name]['median_ms']:>10.3f} -> {stats['median_ms']:>10.3f} ms ({ratio:.2f}x){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wines', default='1000,100000', help='Tamanhos do catálogo de vinhos')
+    parser.add_argument('--dishes', default='100,300', help='Tamanhos da base de pratos')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--llm-latency', type=float, default=0.05, help='Latência simulada do LLM falso (s)')
+    parser.add_argument('--only', default='', help='Grupos a executar: fuzzy,recommender,dishes,cache')
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--compare', help='JSON de uma execução anterior para comparação')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    wine_sizes = [int(n) for n in args.wines.split(',') if n]
+    dish_sizes = [int(n) for n in args.dishes.split(',') if n]
+    groups = set(args.only.split(',')) if args.only else {'fuzzy', 'recommender', 'dishes', 'cache'}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        if 'fuzzy' in groups:
+            bench_fuzzy(results, workdir, dish_sizes, args.repeat)
+        if 'recommender' in groups:
+            bench_recommender(results, workdir, wine_sizes, args.repeat, args.llm_latency)
+        if 'dishes' in groups:
+            bench_dish_database(results, workdir, dish_sizes, args.repeat)
+        if 'cache' in groups:
+            bench_llm_cache(results, workdir, args.repeat, args.llm_latency)
+
+    for name, stats in results.items():
+        print(f"{name:<60} mediana {stats['median_ms']:>10.3f} ms  (min {stats['min_ms']:.3f}, max {stats['max_ms']:.3f})")
+
+    report = {
+        'meta': {
+            'commit': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': vars(args),
+        },
+        'results': results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\nResultados gravados em {args.output}")
+
+    if args.compare and compare(results, args.compare):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Simulação (relógio virtual, sem dormir) do orçamento de chamadas ao LLM
+(`src/llm_scheduler.py`) contra um provedor com cota de RPM/TPM.
+
+Recomendações chegam como um processo de Poisson; cada uma faz uma análise do
+prato e, depois da latência do provedor, uma justificativa. O provedor falso
+aplica a cota como token buckets de um minuto e recusa o excedente com
+LLMQuotaError. Compara-se:
+
+- sem scheduler: toda chamada vai direto ao provedor (análises recusadas viram erro
+  da requisição, justificativas recusadas caem no fallback local);
+- com scheduler: análises esperam até o prazo, justificativas só usam a sobra do
+  orçamento e são descartadas (fallback local) sob pressão.
+
+Uso:
+    python benchmarks/simulate_llm_scheduler.py [--rpm 15] [--tpm 8000] [--rates 0.1,0.25,0.5,1]
+                                                [--duration 600] [--latency 1.5]
+"""
+import argparse
+import heapq
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.llm_backends import LLMBackend, LLMQuotaError, build_analysis_prompt
+from src.llm_scheduler import (ANALYSIS_OUTPUT_TOKENS, JUSTIFICATION_OUTPUT_TOKENS, PRIORITY_ANALYSIS,
+                               PRIORITY_JUSTIFICATION, LLMScheduler, TokenBucket, estimate_tokens)
+
+# Tamanho típico do prompt de justificativa (o do prato usa o prompt real)
+JUSTIFICATION_PROMPT_TOKENS = 600
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class QuotaProvider(LLMBackend):
+    """Provedor falso: cota de RPM/TPM em token buckets sobre o relógio simulado"""
+
+    name = 'simulado'
+
+    def __init__(self, rpm: float, tpm: float, clock: SimulatedClock):
+        self.clock = clock
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.quota_errors = 0
+
+    def charge(self, tokens: int) -> None:
+        now = self.clock()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        if self.requests.level < 1 - 1e-9 or self.tokens.level < tokens - 1e-6:
+            self.quota_errors += 1
+            raise LLMQuotaError("429 Resource has been exhausted")
+        self.requests.take(1)
+        self.tokens.take(tokens)
+
+    def analyze_dish(self, dish_description: str) -> str:
+        self.charge(estimate_tokens(build_analysis_prompt(dish_description)) + ANALYSIS_OUTPUT_TOKENS)
+        return '{}'
+
+    def justify(self, wine, dish_params, perfil_fuzzy) -> str:
+        self.charge(JUSTIFICATION_PROMPT_TOKENS + JUSTIFICATION_OUTPUT_TOKENS)
+        return ''
+
+
+def simulate(rpm: float, tpm: float, rate: float, duration: float, latency: float, use_scheduler: bool,
+             analysis_wait: float, justification_wait: float, seed: int = 0) -> dict:
+    clock = SimulatedClock()
+    provider = QuotaProvider(rpm, tpm, clock)
+    scheduler = LLMScheduler(rpm, tpm, clock=clock) if use_scheduler else None
+    analysis_tokens = estimate_tokens(build_analysis_prompt("Prato de teste com molho da casa")) + ANALYSIS_OUTPUT_TOKENS
+    justification_tokens = JUSTIFICATION_PROMPT_TOKENS + JUSTIFICATION_OUTPUT_TOKENS
+
+    rng = np.random.default_rng(seed)
+    arrivals = np.cumsum(rng.exponential(1.0 / rate, size=int(rate * duration * 2) + 10))
+    events = [(float(t), i, 'chegada') for i, t in enumerate(arrivals[arrivals < duration])]
+    heapq.heapify(events)
+
+    result = {'requisicoes': len(events), 'analises_ok': 0, 'analises_falhas': 0,
+              'justificativas_llm': 0, 'justificativas_fallback': 0}
+    waits = []
+    waiting = []  # (ticket, tipo, id, enfileirada_em)
+
+    def call(kind: str, req: int, queued_at: float) -> None:
+        try:
+            if kind == 'analise':
+                provider.analyze_dish("Prato de teste com molho da casa")
+            else:
+                provider.justify(None, None, None)
+        except LLMQuotaError:
+            if scheduler is not None:
+                scheduler.penalize(10.0)
+            if kind == 'analise':
+                result['analises_falhas'] += 1
+            else:
+                result['justificativas_fallback'] += 1
+            return
+        if kind == 'analise':
+            result['analises_ok'] += 1
+            waits.append(clock() - queued_at)
+            heapq.heappush(events, (clock() + latency, req, 'analise_pronta'))
+        else:
+            result['justificativas_llm'] += 1
+
+    def request(kind: str, req: int) -> None:
+        if scheduler is None:
+            call(kind, req, clock())
+            return
+        if kind == 'analise':
+            ticket = scheduler.submit(PRIORITY_ANALYSIS, analysis_tokens, analysis_wait)
+        else:
+            ticket = scheduler.submit(PRIORITY_JUSTIFICATION, justification_tokens, justification_wait)
+        waiting.append((ticket, kind, req, clock()))
+
+    while events or waiting:
+        if waiting:
+            delay = scheduler.dispatch()
+            still_waiting = []
+            for ticket, kind, req, queued_at in waiting:
+                if ticket.state == 'liberado':
+                    call(kind, req, queued_at)
+                elif ticket.state == 'descartado':
+                    result['analises_falhas' if kind == 'analise' else 'justificativas_fallback'] += 1
+                else:
+                    still_waiting.append((ticket, kind, req, queued_at))
+            waiting = still_waiting
+            # Chamadas liberadas podem ter enfileirado novos eventos; reavalia
+            if any(ticket.state != 'aguardando' for ticket, *_ in waiting):
+                continue
+            next_dispatch = clock() + delay if waiting else float('inf')
+        else:
+            next_dispatch = float('inf')
+
+        next_event = events[0][0] if events else float('inf')
+        if next_dispatch == next_event == float('inf'):
+            break
+        clock.now = max(clock.now, min(next_dispatch, next_event))
+        while events and events[0][0] <= clock.now:
+            _, req, kind = heapq.heappop(events)
+            request('analise' if kind == 'chegada' else 'justificativa', req)
+
+    result['erros_de_cota'] = provider.quota_errors
+    result['espera_p95_s'] = float(np.percentile(waits, 95)) if waits else 0.0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rpm', type=float, default=15)
+    parser.add_argument('--tpm', type=float, default=8000)
+    parser.add_argument('--rates', default='0.1,0.25,0.5,1', help='recomendações por segundo')
+    parser.add_argument('--duration', type=float, default=600, help='segundos simulados')
+    parser.add_argument('--latency', type=float, default=1.5, help='latência (s) do provedor')
+    parser.add_argument('--analysis-wait', type=float, default=20)
+    parser.add_argument('--justification-wait', type=float, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"Cota: {args.rpm:g} RPM, {args.tpm:g} TPM; {args.duration:g}s simulados")
+    print(f"{'chegadas/s':>10} {'modo':>10} {'req':>5} {'análise ok':>10} {'falhas':>7} "
+          f"{'just. LLM':>9} {'fallback':>8} {'429':>5} {'p95 espera':>10}")
+    for rate in [float(v) for v in args.rates.split(',') if v]:
+        for use_scheduler in (False, True):
+            r = simulate(args.rpm, args.tpm, rate, args.duration, args.latency, use_scheduler,
+                         args.analysis_wait, args.justification_wait)
+            print(f"{rate:>10g} {'scheduler' if use_scheduler else 'direto':>10} {r['requisicoes']:>5} "
+                  f"{r['analises_ok']:>10} {r['analises_falhas']:>7} {r['justificativas_llm']:>9} "
+                  f"{r['justificativas_fallback']:>8} {r['erros_de_cota']:>5} {r['espera_p95_s']:>9.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Teste de estresse do Fuzzy Engine compartilhado entre várias threads.
+
+Calcula os perfis de forma serial como referência e depois repete o mesmo
+trabalho com 1, 2, 4 e 8 threads sobre UMA instância de FuzzyEngine, verificando
+que todos os resultados são idênticos à referência e medindo a vazão.
+
+Uso:
+    python benchmarks/stress_fuzzy_threads.py [--samples 2000] [--threads 1,2,4,8] [--skfuzzy]
+
+Retorna código de saída 1 se algum resultado divergir.
+"""
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.config import REQUIRED_DISH_PARAMS
+from src.fuzzy_engine import FuzzyEngine
+
+
+def make_samples(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return [
+        {name: float(v) for name, v in zip(REQUIRED_DISH_PARAMS, row)}
+        for row in rng.uniform(0, 10, size=(n, len(REQUIRED_DISH_PARAMS)))
+    ]
+
+
+def run_threads(engine, samples, n_threads):
+    """Executa todas as amostras no pool e retorna (resultados, segundos)"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_threads) as pool:
+        results = list(pool.map(engine.compute_wine_profile, samples, chunksize=16))
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=2000)
+    parser.add_argument('--threads', default='1,2,4,8')
+    parser.add_argument('--skfuzzy', action='store_true', help='Usa o simulador scikit-fuzzy em vez do avaliador compilado')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    engine = FuzzyEngine(use_compiled=not args.skfuzzy)
+    samples = make_samples(args.samples)
+    expected = [engine.compute_wine_profile(p) for p in samples]
+
+    failures = 0
+    baseline = None
+    print(f"{'threads':>8} {'req/s':>10} {'escala':>8} {'divergências':>13}")
+    for n_threads in [int(t) for t in args.threads.split(',')]:
+        results, elapsed = run_threads(engine, samples, n_threads)
+        mismatches = sum(r != e for r, e in zip(results, expected))
+        failures += mismatches
+
+        throughput = len(samples) / elapsed
+        baseline = baseline or throughput
+        print(f"{n_threads:>8} {throughput:>10.0f} {throughput / baseline:>7.2f}x {mismatches:>13}")
+
+    if failures:
+        print(f"\n❌ {failures} resultados divergiram da execução serial")
+        sys.exit(1)
+    print("\n✅ Todos os resultados concorrentes conferem com a execução serial")
+
+
+if __name__ == '__main__':
+    main()
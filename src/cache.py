@@ -1,20 +1,44 @@
 """
 Sistema de cache simples para requisições LLM
+
+As gravações em disco saem do caminho da requisição: `set` só marca o cache como
+alterado e um timer (`LLM_CACHE_FLUSH_INTERVAL`) grava o arquivo inteiro em
+segundo plano, no máximo uma vez por intervalo; o encerramento do processo grava
+o que estiver pendente.
 """
+import atexit
 import hashlib
 import json
+import os
+import threading
 from typing import Dict, Optional, Any
 from pathlib import Path
 
+try:
+    from . import config
+except ImportError:
+    import config
+
 class LLMCache:
-    """Cache em memória com persistência opcional em disco"""
+    """Cache em memória com persistência opcional em disco (seguro entre threads)"""
     
-    def __init__(self, cache_file: Optional[str] = None):
+    def __init__(self, cache_file: Optional[str] = None, flush_interval: Optional[float] = None):
+        """
+        `flush_interval`: segundos entre a primeira alteração pendente e a gravação
+        (padrão: LLM_CACHE_FLUSH_INTERVAL; 0 grava a cada `set`)
+        """
         self.cache: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
         self.cache_file = Path(cache_file) if cache_file else None
+        self.flush_interval = config.LLM_CACHE_FLUSH_INTERVAL if flush_interval is None else flush_interval
         
         if self.cache_file and self.cache_file.exists():
             self._load_cache()
+        if self.cache_file:
+            atexit.register(self.flush)
     
     def _hash_key(self, text: str) -> str:
         """Gera hash MD5 do texto para usar como chave"""
@@ -28,10 +52,30 @@ class LLMCache:
     def set(self, key: str, value: Any) -> None:
         """Armazena valor no cache"""
         hash_key = self._hash_key(key)
-        self.cache[hash_key] = value
-        
-        if self.cache_file:
-            self._save_cache()
+        with self._lock:
+            self.cache[hash_key] = value
+            
+            if not self.cache_file:
+                return
+            self._dirty = True
+            if self.flush_interval > 0 and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        # Intervalo 0: gravação imediata (comportamento antigo)
+        if self.flush_interval <= 0:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Grava o cache no disco se houver alterações pendentes"""
+        with self._write_lock:
+            with self._lock:
+                self._timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                snapshot = dict(self.cache)
+            self._save_cache(snapshot)
     
     def _load_cache(self) -> None:
         """Carrega cache do disco"""
@@ -41,18 +85,22 @@ class LLMCache:
         except Exception:
             self.cache = {}
     
-    def _save_cache(self) -> None:
-        """Salva cache no disco"""
+    def _save_cache(self, snapshot: Dict[str, Any]) -> None:
+        """Salva cache no disco (arquivo temporário + troca atômica)"""
         try:
             if self.cache_file:
                 self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-                with open(self.cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.cache, f, ensure_ascii=False, indent=2)
+                tmp = self.cache_file.with_name(f"{self.cache_file.name}.tmp-{os.getpid()}")
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False, indent=2)
+                os.replace(tmp, self.cache_file)
         except Exception:
             pass  # Falha silenciosa se não conseguir salvar
     
     def clear(self) -> None:
         """Limpa todo o cache"""
-        self.cache = {}
-        if self.cache_file and self.cache_file.exists():
-            self.cache_file.unlink()
+        with self._write_lock, self._lock:
+            self.cache = {}
+            self._dirty = False
+            if self.cache_file and self.cache_file.exists():
+                self.cache_file.unlink()
@@ -0,0 +1,343 @@
+"""
+Snapshot binário dos catálogos (vinhos e pratos) para carga rápida.
+
+Cada CSV é compilado em colunas NumPy (.npy) que podem ser mapeadas em memória:
+colunas numéricas são gravadas com o seu tipo, colunas de texto viram códigos
+int32 apontando para uma tabela de strings (bytes UTF-8 concatenados + offsets).
+O manifest guarda o SHA-256 do CSV de origem; quando o CSV muda o snapshot é
+recompilado.
+
+Layout em disco (um diretório por CSV):
+
+    <snapshot_dir>/<nome>-<hash do caminho>/
+        manifest.json          versão atual, hash/tamanho/mtime do CSV, colunas
+        <sha do CSV>/col_00.npy ...
+
+Novas versões são gravadas em um subdiretório próprio e publicadas trocando o
+manifest atomicamente, então leitores com arquivos já mapeados não são afetados.
+
+Compilação manual:
+
+    python src/catalog_snapshot.py data/vinhos.csv data/pratos.csv [--force]
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from .logger import setup_logger
+    from .lazy_imports import lazy_import
+except ImportError:
+    from logger import setup_logger
+    from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+logger = setup_logger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent / ".cache" / "snapshots"
+
+_build_lock = threading.Lock()
+
+
+def file_sha256(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StringTable:
+    """
+    Tabela de strings únicas: bytes UTF-8 separados por NUL e offsets de início
+    (n + 1 posições; a string i ocupa data[offsets[i]:offsets[i + 1] - 1])
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1] - 1]).decode('utf-8')
+
+    def to_array(self) -> np.ndarray:
+        """Todas as strings como array de objetos (decodifica o blob de uma vez)"""
+        if len(self) == 0:
+            return np.empty(0, dtype=object)
+        values = bytes(self.data).decode('utf-8').split('\x00')
+        if len(values) != len(self):
+            values = [self[i] for i in range(len(self))]
+        return np.array(values, dtype=object)
+
+    @staticmethod
+    def encode(values: List[str]):
+        """Retorna (blob uint8, offsets int64) para a lista de strings"""
+        encoded = [v.encode('utf-8') for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(e) + 1 for e in encoded], out=offsets[1:])
+        data = np.frombuffer(b'\x00'.join(encoded), dtype=np.uint8)
+        return data, offsets
+
+
+class StringColumn:
+    """Coluna de texto codificada: códigos int32 (-1 = ausente) + tabela de strings"""
+
+    def __init__(self, codes: np.ndarray, table: StringTable):
+        self.codes = codes
+        self.table = table
+        self._values = None
+        self._lower = None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def categories(self) -> np.ndarray:
+        """Strings únicas da coluna (array de objetos, decodificado uma vez)"""
+        if self._values is None:
+            self._values = self.table.to_array()
+        return self._values
+
+    def value(self, i: int):
+        """Valor da linha i, decodificando apenas essa string"""
+        code = self.codes[i]
+        return np.nan if code < 0 else self.table[code]
+
+    def lower_categories(self) -> np.ndarray:
+        """Strings únicas em minúsculas (para buscas; calculado uma vez)"""
+        if self._lower is None:
+            self._lower = np.array([v.lower() for v in self.categories], dtype=object)
+        return self._lower
+
+    def to_array(self) -> np.ndarray:
+        """Valores por linha como array de objetos (NaN onde ausente)"""
+        categories = np.append(self.categories, np.nan).astype(object)
+        return categories[self.codes]
+
+
+class CatalogSnapshot:
+    """Catálogo carregado do snapshot: colunas NumPy (mapeadas em memória) por nome"""
+
+    def __init__(self, path: Path, manifest: Dict, mmap: bool = True):
+        self.path = path
+        self.manifest = manifest
+        self.columns: Dict[str, Union[np.ndarray, StringColumn]] = {}
+
+        mmap_mode = 'r' if mmap else None
+        version_dir = path / manifest['version']
+
+        def load(entry, suffix):
+            return np.load(version_dir / f"{entry['file']}.{suffix}.npy", mmap_mode=mmap_mode)
+
+        for entry in manifest['columns']:
+            if entry['kind'] == 'string':
+                table = StringTable(load(entry, 'data'), load(entry, 'offsets'))
+                self.columns[entry['name']] = StringColumn(load(entry, 'codes'), table)
+            else:
+                self.columns[entry['name']] = load(entry, 'values')
+
+    def __len__(self) -> int:
+        return self.manifest['rows']
+
+    @property
+    def source_sha256(self) -> str:
+        """SHA-256 do conteúdo do CSV de que este snapshot foi compilado"""
+        return self.manifest['source']['sha256']
+
+    @property
+    def column_names(self) -> List[str]:
+        return [entry['name'] for entry in self.manifest['columns']]
+
+    def row(self, i: int) -> Dict:
+        """Linha i como dict (tipos Python; NaN onde ausente)"""
+        record = {}
+        for name, column in self.columns.items():
+            record[name] = column.value(i) if isinstance(column, StringColumn) else column[i].item()
+        return record
+
+    def to_dataframe(self) -> 'pd.DataFrame':
+        """DataFrame equivalente ao `pd.read_csv` do CSV de origem"""
+        data = {}
+        for name, column in self.columns.items():
+            data[name] = column.to_array() if isinstance(column, StringColumn) else column
+        return pd.DataFrame(data, columns=self.column_names, copy=False)
+
+
+def snapshot_path(csv_path: Union[str, Path], snapshot_dir: Optional[Union[str, Path]] = None) -> Path:
+    """Diretório do snapshot de um CSV (nome do arquivo + hash do caminho absoluto)"""
+    csv_path = Path(csv_path).resolve()
+    path_hash = hashlib.sha1(str(csv_path).encode('utf-8')).hexdigest()[:10]
+    return Path(snapshot_dir or DEFAULT_SNAPSHOT_DIR) / f"{csv_path.stem}-{path_hash}"
+
+
+def _read_manifest(path: Path) -> Optional[Dict]:
+    try:
+        manifest = json.loads((path / "manifest.json").read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if manifest.get('format') != SNAPSHOT_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def _write_manifest(path: Path, manifest: Dict) -> None:
+    tmp = path / f"manifest.json.tmp-{os.getpid()}-{threading.get_ident()}"
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp, path / "manifest.json")
+
+
+def is_fresh(csv_path: Union[str, Path], manifest: Optional[Dict], manifest_dir: Optional[Path] = None) -> bool:
+    """
+    Verifica se o snapshot corresponde ao CSV. Tamanho e mtime iguais dispensam
+    o hash; se só o mtime mudou (ex.: arquivo tocado), o SHA-256 decide.
+    """
+    if manifest is None:
+        return False
+    stat = os.stat(csv_path)
+    source = manifest['source']
+    if source['size'] == stat.st_size and source['mtime_ns'] == stat.st_mtime_ns:
+        return True
+    if source['size'] != stat.st_size or file_sha256(csv_path) != source['sha256']:
+        return False
+
+    # Conteúdo idêntico: registra o novo mtime para evitar o hash nas próximas cargas
+    if manifest_dir is not None:
+        source['mtime_ns'] = stat.st_mtime_ns
+        _write_manifest(manifest_dir, manifest)
+    return True
+
+
+def build_snapshot(csv_path: Union[str, Path], snapshot_dir: Optional[Union[str, Path]] = None) -> Path:
+    """Compila o CSV em um novo snapshot e o publica; retorna o diretório do snapshot"""
+    csv_path = Path(csv_path)
+    path = snapshot_path(csv_path, snapshot_dir)
+    stat = os.stat(csv_path)
+    # Hash e leitura sobre os mesmos bytes: o snapshot corresponde exatamente ao SHA-256 gravado
+    content = csv_path.read_bytes()
+    sha = hashlib.sha256(content).hexdigest()
+
+    df = pd.read_csv(io.BytesIO(content), encoding='utf-8')
+    version = sha[:16]
+    version_dir = path / f"{version}.tmp-{os.getpid()}-{threading.get_ident()}"
+    version_dir.mkdir(parents=True, exist_ok=True)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        file = f"col_{i:02d}"
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            np.save(version_dir / f"{file}.values.npy", series.to_numpy())
+            kind = 'numeric'
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            data, offsets = StringTable.encode([str(v) for v in uniques])
+            np.save(version_dir / f"{file}.codes.npy", codes.astype(np.int32))
+            np.save(version_dir / f"{file}.data.npy", data)
+            np.save(version_dir / f"{file}.offsets.npy", offsets)
+            kind = 'string'
+        columns.append({'name': name, 'file': file, 'kind': kind})
+
+    final_dir = path / version
+    try:
+        os.replace(version_dir, final_dir)
+    except OSError:
+        # Outro processo já publicou esta mesma versão (mesmo SHA-256)
+        shutil.rmtree(version_dir, ignore_errors=True)
+
+    previous = _read_manifest(path)
+    _write_manifest(path, {
+        'format': SNAPSHOT_FORMAT_VERSION,
+        'version': version,
+        'rows': len(df),
+        'columns': columns,
+        'source': {
+            'path': str(csv_path.resolve()),
+            'sha256': sha,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        },
+    })
+
+    # Versões antigas: arquivos já mapeados por outros leitores continuam válidos até serem fechados
+    if previous is not None and previous['version'] != version:
+        shutil.rmtree(path / previous['version'], ignore_errors=True)
+
+    logger.info(f"Snapshot de {csv_path.name} compilado: {len(df)} linhas, {len(columns)} colunas")
+    return path
+
+
+def open_snapshot(csv_path: Union[str, Path], snapshot_dir: Optional[Union[str, Path]] = None,
+                  mmap: bool = True, force: bool = False) -> CatalogSnapshot:
+    """Abre o snapshot do CSV, recompilando-o antes se estiver ausente ou desatualizado"""
+    path = snapshot_path(csv_path, snapshot_dir)
+    manifest = None if force else _read_manifest(path)
+
+    if not is_fresh(csv_path, manifest, manifest_dir=path):
+        with _build_lock:
+            manifest = None if force else _read_manifest(path)
+            if not is_fresh(csv_path, manifest, manifest_dir=path):
+                logger.info(f"Snapshot ausente ou desatualizado para {Path(csv_path).name}; recompilando")
+                build_snapshot(csv_path, snapshot_dir)
+                manifest = _read_manifest(path)
+
+    return CatalogSnapshot(path, manifest, mmap=mmap)
+
+
+def load_catalog(csv_path: Union[str, Path], use_snapshot: bool = True,
+                 snapshot_dir: Optional[Union[str, Path]] = None) -> 'pd.DataFrame':
+    """
+    Carrega um catálogo CSV como DataFrame, via snapshot binário quando possível.
+    Qualquer falha no snapshot (diretório sem permissão, arquivo corrompido) cai
+    para a leitura direta do CSV.
+    """
+    return load_catalog_with_sha(csv_path, use_snapshot, snapshot_dir)[0]
+
+
+def load_catalog_with_sha(csv_path: Union[str, Path], use_snapshot: bool = True,
+                          snapshot_dir: Optional[Union[str, Path]] = None) -> Tuple['pd.DataFrame', str]:
+    """
+    Como `load_catalog`, mas também retorna o SHA-256 do conteúdo efetivamente
+    carregado (não o do arquivo no momento da chamada, que pode já ter mudado)
+    """
+    if use_snapshot:
+        try:
+            snapshot = open_snapshot(csv_path, snapshot_dir)
+            return snapshot.to_dataframe(), snapshot.source_sha256
+        except Exception as e:
+            logger.warning(f"Snapshot indisponível para {csv_path} ({e}); lendo o CSV")
+    content = Path(csv_path).read_bytes()
+    return pd.read_csv(io.BytesIO(content), encoding='utf-8'), hashlib.sha256(content).hexdigest()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compila catálogos CSV em snapshots binários")
+    parser.add_argument('csv', nargs='+', help='Arquivos CSV (ex.: data/vinhos.csv data/pratos.csv)')
+    parser.add_argument('--snapshot-dir', default=None, help=f'Diretório dos snapshots (padrão: {DEFAULT_SNAPSHOT_DIR})')
+    parser.add_argument('--force', action='store_true', help='Recompila mesmo se o snapshot estiver atualizado')
+    args = parser.parse_args()
+
+    for csv_path in args.csv:
+        if not Path(csv_path).exists():
+            print(f"[!] Arquivo não encontrado: {csv_path}")
+            continue
+        snapshot = open_snapshot(csv_path, args.snapshot_dir, force=args.force)
+        print(f"{csv_path}: {len(snapshot)} linhas -> {snapshot.path}")
+
+
+if __name__ == '__main__':
+    main()
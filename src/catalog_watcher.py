@@ -0,0 +1,92 @@
+"""
+Observador de arquivos de catálogo: detecta alterações no CSV por polling e
+dispara um callback em uma thread de fundo
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+try:
+    from .logger import setup_logger
+    from .catalog_snapshot import file_sha256
+except ImportError:
+    from logger import setup_logger
+    from catalog_snapshot import file_sha256
+
+logger = setup_logger(__name__)
+
+
+class CatalogWatcher:
+    """
+    Verifica (tamanho, mtime) a cada `interval` segundos. Uma mudança só é
+    notificada depois que o arquivo fica estável por um ciclo (evita ler um CSV
+    ainda sendo salvo) e se o SHA-256 realmente mudou.
+    """
+
+    def __init__(self, path: str, on_change: Callable[[str], None], interval: float = 2.0):
+        self.path = str(path)
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stat = self._read_stat()
+        self._sha = self._read_sha()
+        self._pending: Optional[Tuple[int, int]] = None
+
+    def _read_stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _read_sha(self) -> Optional[str]:
+        try:
+            return file_sha256(self.path)
+        except OSError:
+            return None
+
+    def start(self) -> 'CatalogWatcher':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"catalog-watcher:{Path(self.path).name}",
+                                            daemon=True)
+            self._thread.start()
+            logger.info(f"Observando alterações em {self.path} (a cada {self.interval}s)")
+        return self
+
+    def stop(self, timeout: float = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception(f"Erro ao verificar {self.path}")
+
+    def check(self) -> bool:
+        """Uma rodada de verificação; retorna True se o callback foi disparado"""
+        stat = self._read_stat()
+        if stat is None or stat == self._stat:
+            self._pending = None
+            return False
+
+        # Primeira observação da mudança: espera mais um ciclo com o arquivo estável
+        if stat != self._pending:
+            self._pending = stat
+            return False
+
+        self._pending = None
+        self._stat = stat
+        sha = self._read_sha()
+        if sha is None or sha == self._sha:
+            return False
+
+        self._sha = sha
+        logger.info(f"Alteração detectada em {self.path}")
+        self.on_change(self.path)
+        return True
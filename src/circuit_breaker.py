@@ -0,0 +1,193 @@
+"""
+Circuit breaker para o backend LLM.
+
+Acompanha as últimas chamadas ao provedor (falhas e chamadas lentas). Quando a
+proporção de problemas passa do limite, o circuito abre e as chamadas são
+recusadas na hora com CircuitOpenError: a justificativa cai no texto simples sem
+esperar o provedor, e a análise responde 503 no servidor. Depois de
+`open_seconds` o circuito fica meio aberto e deixa passar poucas chamadas de
+teste; um sucesso fecha o circuito, uma falha o reabre.
+
+Cada chamada também tem um tempo máximo (`timeout`), então a latência de uma
+recomendação fica limitada mesmo durante incidentes no provedor.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Optional
+
+try:
+    from . import config
+    from .logger import setup_logger
+    from .llm_backends import LLMBackend, LLMBackendError, LLMResponseError, LLMUnavailableError
+except ImportError:
+    import config
+    from logger import setup_logger
+    from llm_backends import LLMBackend, LLMBackendError, LLMResponseError, LLMUnavailableError
+
+logger = setup_logger(__name__)
+
+CLOSED = 'fechado'
+OPEN = 'aberto'
+HALF_OPEN = 'meio_aberto'
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """Chamada recusada sem contatar o provedor: circuito aberto"""
+
+
+class LLMTimeoutError(LLMBackendError):
+    """O provedor não respondeu dentro do tempo máximo"""
+
+
+class CircuitBreaker:
+    """
+    Estado do circuito sobre as últimas `window` chamadas.
+
+    Abre quando, com pelo menos `min_calls` chamadas na janela, a fração de falhas
+    ou a de chamadas mais lentas que `slow_call` segundos atinge `failure_rate`.
+    """
+
+    def __init__(self, window: int = 20, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_call: float = 5.0, open_seconds: float = 15.0, half_open_probes: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+
+        self.state = CLOSED
+        self._calls = deque(maxlen=window)  # (falhou, lenta)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.counters = {'aberturas': 0, 'recusadas': 0}
+
+    def _refresh(self) -> None:
+        if self.state == OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+            self._probes = 0
+            logger.info("Circuito do LLM meio aberto: testando o provedor")
+
+    def check(self) -> None:
+        """Levanta CircuitOpenError se uma chamada seria recusada agora (não reserva nada)"""
+        with self._lock:
+            self._refresh()
+            if self.state == OPEN or (self.state == HALF_OPEN and self._probes >= self.half_open_probes):
+                self.counters['recusadas'] += 1
+                raise CircuitOpenError(f"Circuito do LLM aberto ({self._retry_in():.0f}s para novo teste)")
+
+    def before_call(self) -> None:
+        """Como `check`, mas no estado meio aberto ocupa uma das vagas de teste"""
+        with self._lock:
+            self._refresh()
+            if self.state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return
+            if self.state != CLOSED:
+                self.counters['recusadas'] += 1
+                raise CircuitOpenError(f"Circuito do LLM aberto ({self._retry_in():.0f}s para novo teste)")
+
+    def release(self) -> None:
+        """Devolve a vaga de teste de uma chamada que não chegou ao provedor"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _retry_in(self) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - self.clock())
+
+    def record(self, failed: bool, seconds: float) -> None:
+        """Registra o resultado de uma chamada liberada por `before_call`"""
+        slow = seconds > self.slow_call
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if failed or slow:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    logger.info("Circuito do LLM fechado: provedor recuperado")
+                return
+
+            self._calls.append((failed, slow))
+            if self.state == CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(f for f, _ in self._calls) / len(self._calls)
+                slow_calls = sum(s for _, s in self._calls) / len(self._calls)
+                if failures >= self.failure_rate or slow_calls >= self.failure_rate:
+                    self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = self.clock()
+        self._calls.clear()
+        self.counters['aberturas'] += 1
+        logger.warning(f"Circuito do LLM aberto por {self.open_seconds:.0f}s: "
+                       f"provedor falhando ou lento - usando respostas locais")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._refresh()
+            return {'estado': self.state, 'janela': len(self._calls), **self.counters}
+
+
+class CircuitBreakerBackend(LLMBackend):
+    """Backend protegido por um CircuitBreaker e por um tempo máximo por chamada"""
+
+    def __init__(self, backend: LLMBackend, breaker: Optional[CircuitBreaker] = None,
+                 timeout: float = None, max_concurrency: int = 16):
+        self.backend = backend
+        self.name = backend.name
+        self.breaker = breaker or CircuitBreaker(
+            window=config.LLM_BREAKER_WINDOW,
+            failure_rate=config.LLM_BREAKER_FAILURE_RATE,
+            slow_call=config.LLM_BREAKER_SLOW_CALL,
+            open_seconds=config.LLM_BREAKER_OPEN_SECONDS,
+        )
+        self.timeout = config.LLM_TIMEOUT if timeout is None else timeout
+        # Chamadas que estouram o tempo continuam no pool até o provedor responder
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='llm') \
+            if self.timeout > 0 else None
+
+    def check_available(self) -> None:
+        self.breaker.check()
+        self.backend.check_available()
+
+    def stats(self) -> Dict:
+        return {'circuito': self.breaker.stats(), 'timeout_s': self.timeout, **self.backend.stats()}
+
+    def _call(self, func, *args) -> str:
+        self.breaker.before_call()
+        start = time.perf_counter()
+        try:
+            if self._executor is None:
+                result = func(*args)
+            else:
+                try:
+                    result = self._executor.submit(func, *args).result(timeout=self.timeout)
+                except FutureTimeout:
+                    raise LLMTimeoutError(f"LLM não respondeu em {self.timeout:.1f}s")
+        except LLMUnavailableError:
+            # Recusada localmente (ex.: orçamento): não diz nada sobre o provedor
+            self.breaker.release()
+            raise
+        except LLMResponseError:
+            # O provedor respondeu a tempo: resposta fora do formato conta como chamada
+            # concluída, como quando o erro só aparece no parse feito pelo LLMProcessor
+            self.breaker.record(False, time.perf_counter() - start)
+            raise
+        except Exception:
+            self.breaker.record(True, time.perf_counter() - start)
+            raise
+        self.breaker.record(False, time.perf_counter() - start)
+        return result
+
+    def analyze_dish(self, dish_description: str) -> str:
+        return self._call(self.backend.analyze_dish, dish_description)
+
+    def justify(self, wine, dish_params: Dict[str, float], perfil_fuzzy: Dict[str, any]) -> str:
+        return self._call(self.backend.justify, wine, dish_params, perfil_fuzzy)
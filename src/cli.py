@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import sys
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Set
 
@@ -9,12 +10,16 @@ root_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(root_dir))
 
 from src.llm_processor import LLMProcessor
+from src.llm_backends import LLMBackendError
 from src.fuzzy_engine import FuzzyEngine
 from src.recommender import WineRecommender
+from src import config
 from src.config import MAX_DISH_DESCRIPTION_LENGTH, MIN_DISH_DESCRIPTION_LENGTH
-from src.logger import setup_logger
+from src.logger import request_log_level, setup_logger
+from src.tracing import request_scope, tracer
 
 logger = setup_logger(__name__)
+REQUEST_LOG_LEVEL = request_log_level()
 
 def print_header():
     print("=" * 80)
@@ -36,11 +41,12 @@ def get_main_menu_choice() -> str:
     print("  [2] 📊 Visualizar regras fuzzy geradas")
     print("  [3] 🌳 Visualizar árvore de decisão")
     print("  [4] 📈 Estatísticas do modelo")
-    print("  [5] ❌ Sair")
+    print("  [5] ⏱️  Latência por etapa (stats)")
+    print("  [6] ❌ Sair")
     print()
     print_separator()
     
-    choice = input("Escolha uma opção (1-5): ").strip()
+    choice = input("Escolha uma opção (1-6): ").strip()
     return choice
 
 
@@ -246,12 +252,65 @@ def show_statistics(fuzzy_engine):
     else:
         print(f"  Total de regras: {stats.get('total_regras', 0)}")
         print(f"  Tipo: {stats.get('tipo', 'desconhecido')}")
-    
+
+    counters = fuzzy_engine.get_inference_counters()
+    print()
+    print(f"  Inferências nesta sessão: {counters['chamadas']}")
+    print(f"  Sem regra ativa (método alternativo): {counters['fallbacks']} ({counters['taxa_fallback']:.1%})")
+
     print()
     print("=" * 80)
     input("\nPressione ENTER para voltar ao menu...")
 
 
+def show_latency_stats():
+    """Exibe percentis de latência por etapa e oferece exportação no formato Prometheus"""
+    print("\n⏱️  LATÊNCIA POR ETAPA")
+    print("=" * 80)
+    print()
+    
+    stats = tracer.stage_stats()
+    
+    if not stats:
+        print("  Nenhuma recomendação executada nesta sessão ainda.")
+    else:
+        print(f"  {'Etapa':<24} {'Chamadas':>9} {'Erros':>6} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10}")
+        for stage, entry in stats.items():
+            print(f"  {stage:<24} {entry['count']:>9} {entry['errors']:>6} "
+                  f"{entry['p50_ms']:>10.1f} {entry['p95_ms']:>10.1f} {entry['p99_ms']:>10.1f}")
+    
+    print()
+    print("=" * 80)
+    export = input("\nExportar métricas no formato Prometheus? (s/N): ").strip().lower()
+    if export == 's':
+        metrics_file = root_dir / "logs" / "metrics.prom"
+        metrics_file.parent.mkdir(parents=True, exist_ok=True)
+        metrics_file.write_text(tracer.to_prometheus(), encoding='utf-8')
+        print(f"✅ Métricas exportadas para {metrics_file}")
+        input("\nPressione ENTER para voltar ao menu...")
+
+
+@lru_cache(maxsize=None)
+def get_recommender(csv_path: str) -> WineRecommender:
+    """
+    Carrega o catálogo de vinhos uma única vez por sessão (na primeira recomendação)
+    e passa a recarregá-lo em segundo plano quando o CSV for editado
+    """
+    recommender = WineRecommender(csv_path)
+    if config.CATALOG_WATCH_INTERVAL > 0:
+        recommender.watch()
+    return recommender
+
+
+@lru_cache(maxsize=None)
+def get_llm_processor(csv_path: str) -> LLMProcessor:
+    """
+    Processador LLM único por sessão, sobre o mesmo backend das justificativas: o
+    circuit breaker e o cache acumulam estado entre as recomendações, como no servidor
+    """
+    return LLMProcessor(backend=get_recommender(csv_path).backend)
+
+
 def recommend_wine_for_dish(fuzzy_engine, csv_path):
     """Processo de recomendação de vinho"""
     try:
@@ -271,32 +330,33 @@ def recommend_wine_for_dish(fuzzy_engine, csv_path):
         # Obter opções de saída do usuário
         output_options = get_output_options()
         
-        print("\n[...] Processando com Gemini AI...")
-        logger.info(f"Iniciando analise para: {dish_description[:50]}...")
-        
-        # 1. Processar com LLM
-        llm = LLMProcessor()
-        dish_params = llm.analyze_dish(dish_description)
-        
-        print_dish_params(dish_params, show=1 in output_options)
-        
-        # 2. Calcular perfil fuzzy
-        print("\n[...] Aplicando regras fuzzy aprendidas...")
-        logger.info("Computando perfil fuzzy")
-        perfil_fuzzy = fuzzy_engine.compute_wine_profile(dish_params)
-        
-        print_fuzzy_profile(perfil_fuzzy, show=2 in output_options)
-        
-        # 3. Recomendar vinho
-        print("\n[...] Buscando o vinho ideal na base de dados...")
-        logger.info("Buscando recomendacao de vinho")
-        recommender = WineRecommender(str(csv_path))
-        wine = recommender.recommend(dish_params, perfil_fuzzy)
-        
-        print_recommendation(wine, output_options)
+        with request_scope() as request_id:
+            print("\n[...] Processando com Gemini AI...")
+            logger.log(REQUEST_LOG_LEVEL, "[%s] Iniciando analise para: %.50s...", request_id, dish_description)
+            
+            # 1. Processar com LLM
+            llm = get_llm_processor(str(csv_path))
+            dish_params = llm.analyze_dish(dish_description)
+            
+            print_dish_params(dish_params, show=1 in output_options)
+            
+            # 2. Calcular perfil fuzzy
+            print("\n[...] Aplicando regras fuzzy aprendidas...")
+            logger.log(REQUEST_LOG_LEVEL, "Computando perfil fuzzy")
+            perfil_fuzzy = fuzzy_engine.compute_wine_profile(dish_params)
+            
+            print_fuzzy_profile(perfil_fuzzy, show=2 in output_options)
+            
+            # 3. Recomendar vinho
+            print("\n[...] Buscando o vinho ideal na base de dados...")
+            logger.log(REQUEST_LOG_LEVEL, "Buscando recomendacao de vinho")
+            recommender = get_recommender(str(csv_path))
+            wine = recommender.recommend(dish_params, perfil_fuzzy, description=dish_description)
+            
+            print_recommendation(wine, output_options)
         
         print("\n✅ Recomendação concluída com sucesso!\n")
-        logger.info("Recomendacao concluida com sucesso")
+        logger.log(REQUEST_LOG_LEVEL, "Recomendacao concluida com sucesso")
         
         input("Pressione ENTER para voltar ao menu...")
         
@@ -305,6 +365,11 @@ def recommend_wine_for_dish(fuzzy_engine, csv_path):
         print(f"\n❌ {error_msg}")
         logger.error(error_msg)
         input("\nPressione ENTER para voltar ao menu...")
+    except LLMBackendError as e:
+        error_msg = f"Falha do LLM: {e}"
+        print(f"\n❌ {error_msg} - tente novamente em instantes")
+        logger.error(error_msg)
+        input("\nPressione ENTER para voltar ao menu...")
     except Exception as e:
         error_msg = f"Erro inesperado: {e}"
         print(f"\n❌ {error_msg}")
@@ -337,7 +402,9 @@ def main():
                 visualize_tree(fuzzy)
             elif choice == '4':
                 show_statistics(fuzzy)
-            elif choice == '5':
+            elif choice in ('5', 'stats'):
+                show_latency_stats()
+            elif choice == '6':
                 print("\n👋 Obrigado por usar o sistema! Até logo!\n")
                 break
             else:
@@ -360,5 +427,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        from src.server import main as serve
+        serve(sys.argv[2:])
+    else:
+        main()
 
@@ -2,19 +2,102 @@
 Configurações centralizadas do sistema
 """
 import os
-from dotenv import load_dotenv
+import threading
 
-load_dotenv()
+# Configurações lidas do ambiente (.env). São resolvidas no primeiro acesso
+# (ex.: `config.GEMINI_API_KEY`), de modo que importar este módulo não lê o .env
+_ENV_SETTINGS = {
+    # Modelo LLM
+    "GEMINI_MODEL": lambda: os.getenv("GEMINI_MODEL", "gemini-2.0-flash"),
+    # API Key
+    "GEMINI_API_KEY": lambda: os.getenv("GEMINI_API_KEY"),
+    # Número de pontos do universo de discurso das variáveis fuzzy (0 a 10)
+    "FUZZY_UNIVERSE_RESOLUTION": lambda: int(os.getenv("FUZZY_UNIVERSE_RESOLUTION", "101")),
+    # Armazenamento dos catálogos: "dataframe" (pandas) ou "mmap" (colunas do snapshot
+    # mapeadas em memória, compartilhadas entre processos)
+    "CATALOG_STORAGE": lambda: os.getenv("CATALOG_STORAGE", "dataframe").lower(),
+    # Intervalo (s) de verificação de alterações no CSV de vinhos (0 desativa no CLI)
+    "CATALOG_WATCH_INTERVAL": lambda: float(os.getenv("CATALOG_WATCH_INTERVAL", "2")),
+    # Arquivo JSON com termos e pesos da pontuação dos vinhos (vazio usa o padrão, ver wine_scoring)
+    "WINE_SCORING_FILE": lambda: os.getenv("WINE_SCORING_FILE", ""),
+    # Vinhos guardados por prato na tabela pré-calculada dos pratos cadastrados (0 desativa)
+    "RECOMMENDATION_TOP_K": lambda: int(os.getenv("RECOMMENDATION_TOP_K", "5")),
+    # Alternativas diversificadas: peso da diversidade (0 = só relevância, 1 = só
+    # diversidade) e quantos vinhos melhor pontuados entram na reordenação
+    "RECOMMENDATION_DIVERSITY": lambda: float(os.getenv("RECOMMENDATION_DIVERSITY", "0.3")),
+    "RECOMMENDATION_POOL_SIZE": lambda: int(os.getenv("RECOMMENDATION_POOL_SIZE", "100")),
+    # Harmonizações do catálogo citadas na descrição do prato: "bonus" (padrão), "filtro"
+    # (só vinhos com a harmonização concorrem) ou "desligado"; bônus por tag em pontos de score
+    "HARMONIZATION_TAG_MODE": lambda: os.getenv("HARMONIZATION_TAG_MODE", "bonus").lower(),
+    "HARMONIZATION_TAG_BONUS": lambda: float(os.getenv("HARMONIZATION_TAG_BONUS", "2.0")),
+    # Perfil de CPU por requisição (ver request_profiler): fração das requisições
+    # perfiladas (0 desliga), diretório (vazio = .cache/profiles), modo "cprofile"
+    # (.prof) ou "amostragem" (pilhas colapsadas) e intervalo (s) da amostragem
+    "PROFILE_RATE": lambda: float(os.getenv("PROFILE_RATE", "0")),
+    "PROFILE_DIR": lambda: os.getenv("PROFILE_DIR", ""),
+    "PROFILE_MODE": lambda: os.getenv("PROFILE_MODE", "cprofile").lower(),
+    "PROFILE_INTERVAL": lambda: float(os.getenv("PROFILE_INTERVAL", "0.001")),
+    # Atraso (s) da gravação em segundo plano do cache LLM após uma alteração (0 grava a cada item)
+    "LLM_CACHE_FLUSH_INTERVAL": lambda: float(os.getenv("LLM_CACHE_FLUSH_INTERVAL", "2")),
+    # Perfil de log: "development" ou "production" (mensagens por requisição em DEBUG)
+    "LOG_PROFILE": lambda: os.getenv("LOG_PROFILE", "development").lower(),
+    # Backend LLM: "gemini" (padrão) ou "local" (determinístico e offline, ver llm_backends)
+    "LLM_BACKEND": lambda: os.getenv("LLM_BACKEND", "gemini").lower(),
+    # Latência (s) e taxa de falhas (0 a 1) simuladas pelo backend local
+    "LOCAL_LLM_LATENCY": lambda: float(os.getenv("LOCAL_LLM_LATENCY", "0")),
+    "LOCAL_LLM_ERROR_RATE": lambda: float(os.getenv("LOCAL_LLM_ERROR_RATE", "0")),
+    # Orçamento compartilhado das chamadas ao Gemini: requisições e tokens estimados por
+    # minuto (0 em LLM_REQUESTS_PER_MINUTE desativa), fração reservada para as análises,
+    # espera máxima (s) por tipo de chamada e pausa (s) após um erro de cota do provedor
+    "LLM_REQUESTS_PER_MINUTE": lambda: float(os.getenv("LLM_REQUESTS_PER_MINUTE", "15")),
+    "LLM_TOKENS_PER_MINUTE": lambda: float(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000")),
+    "LLM_BUDGET_RESERVE": lambda: float(os.getenv("LLM_BUDGET_RESERVE", "0.2")),
+    "LLM_ANALYSIS_MAX_WAIT": lambda: float(os.getenv("LLM_ANALYSIS_MAX_WAIT", "20")),
+    "LLM_JUSTIFICATION_MAX_WAIT": lambda: float(os.getenv("LLM_JUSTIFICATION_MAX_WAIT", "1")),
+    "LLM_QUOTA_BACKOFF": lambda: float(os.getenv("LLM_QUOTA_BACKOFF", "10")),
+    # Tempo máximo (s) de cada chamada ao LLM (0 desativa) e circuit breaker: chamadas
+    # observadas, fração de falhas/lentas que abre o circuito, limite (s) de chamada
+    # lenta e tempo (s) aberto antes de testar o provedor de novo
+    "LLM_TIMEOUT": lambda: float(os.getenv("LLM_TIMEOUT", "10")),
+    "LLM_BREAKER_WINDOW": lambda: int(os.getenv("LLM_BREAKER_WINDOW", "20")),
+    "LLM_BREAKER_FAILURE_RATE": lambda: float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5")),
+    "LLM_BREAKER_SLOW_CALL": lambda: float(os.getenv("LLM_BREAKER_SLOW_CALL", "5")),
+    "LLM_BREAKER_OPEN_SECONDS": lambda: float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "15")),
+    # Servidor HTTP (python src/cli.py serve): endereço, porta, requisições aguardando
+    # na fila antes de responder 503, threads executando o pipeline e tamanho máximo de lote
+    "SERVER_HOST": lambda: os.getenv("SERVER_HOST", "127.0.0.1"),
+    "SERVER_PORT": lambda: int(os.getenv("SERVER_PORT", "8000")),
+    "SERVER_QUEUE_SIZE": lambda: int(os.getenv("SERVER_QUEUE_SIZE", "64")),
+    "SERVER_WORKERS": lambda: int(os.getenv("SERVER_WORKERS", "8")),
+    "SERVER_MAX_BATCH": lambda: int(os.getenv("SERVER_MAX_BATCH", "50")),
+}
 
-# Modelo LLM
-GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+_env_lock = threading.Lock()
+_env_loaded = False
 
-# API Key
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+def load_env() -> None:
+    """Carrega o arquivo .env uma única vez"""
+    global _env_loaded
+    with _env_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _env_loaded = True
+
+
+def __getattr__(name):
+    if name in _ENV_SETTINGS:
+        load_env()
+        value = _ENV_SETTINGS[name]()
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Validações
 MAX_DISH_DESCRIPTION_LENGTH = 500
 MIN_DISH_DESCRIPTION_LENGTH = 5
+MAX_ALTERNATIVES = 10
 
 # Colunas esperadas no CSV
 REQUIRED_CSV_COLUMNS = [
@@ -1,44 +1,108 @@
 """
 Módulo para gerenciamento da base de dados de pratos
 """
-import pandas as pd
+import re
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
 
 try:
+    from . import config
     from .logger import setup_logger
+    from .lazy_imports import lazy_import
+    from .catalog_snapshot import load_catalog_with_sha, open_snapshot
+    from .config import REQUIRED_DISH_PARAMS
+    from .dish_profile import DEFAULT_VALUE, DishProfile
 except ImportError:
+    import config
     from logger import setup_logger
+    from lazy_imports import lazy_import
+    from catalog_snapshot import load_catalog_with_sha, open_snapshot
+    from config import REQUIRED_DISH_PARAMS
+    from dish_profile import DEFAULT_VALUE, DishProfile
+
+pd = lazy_import('pandas')
 
 logger = setup_logger(__name__)
 
 class DishDatabase:
     """Gerencia a base de dados de pratos pré-cadastrados"""
     
-    def __init__(self, csv_path: str):
+    def __init__(self, csv_path: str, use_snapshot: bool = True, storage: Optional[str] = None):
+        """
+        `storage="mmap"` consulta diretamente as colunas do snapshot mapeadas em memória
+        (compartilhadas entre processos); o padrão continua sendo o DataFrame.
+        `source_sha256` é o SHA-256 do conteúdo carregado (None se nada foi carregado).
+        """
         logger.info(f"Carregando base de pratos: {csv_path}")
+        self.catalog = None
+        self.storage = 'dataframe'
+        self.source_sha256 = None
         
         if not Path(csv_path).exists():
             logger.warning(f"Arquivo de pratos não encontrado: {csv_path}")
             self.df = pd.DataFrame()
             return
         
+        if (storage or config.CATALOG_STORAGE) == 'mmap' and use_snapshot:
+            try:
+                self.catalog = open_snapshot(csv_path)
+                self.storage = 'mmap'
+                self.source_sha256 = self.catalog.source_sha256
+                self.df = None
+                logger.info(f"Base de pratos mapeada em memória: {len(self.catalog)} pratos")
+                return
+            except Exception as e:
+                logger.warning(f"Snapshot de pratos indisponível ({e}); usando DataFrame")
+        
         try:
-            self.df = pd.read_csv(csv_path, encoding='utf-8')
+            self.df, self.source_sha256 = load_catalog_with_sha(csv_path, use_snapshot=use_snapshot)
             logger.info(f"Base de pratos carregada: {len(self.df)} pratos")
         except Exception as e:
             logger.error(f"Erro ao carregar CSV de pratos: {e}")
             self.df = pd.DataFrame()
     
+    def _is_empty(self) -> bool:
+        return len(self.catalog) == 0 if self.catalog is not None else self.df.empty
+    
+    def _match(self, column: str, predicate: Callable[[str], bool]) -> np.ndarray:
+        """
+        Máscara por linha no modo mmap: o predicado é avaliado uma vez por valor
+        distinto (em minúsculas) e expandido pelos códigos da coluna
+        """
+        column = self.catalog.columns[column]
+        hits = np.fromiter((predicate(v) for v in column.lower_categories()), dtype=bool,
+                           count=len(column.lower_categories()))
+        # Código -1 (valor ausente) aponta para a posição extra, sempre False
+        return np.append(hits, False)[column.codes]
+    
+    def _records(self, mask: np.ndarray) -> List[Dict]:
+        return [self.catalog.row(i) for i in np.flatnonzero(mask)]
+    
     def search_dish(self, query: str) -> List[Dict]:
         """
         Busca pratos na base de dados por nome ou ingredientes
         """
-        if self.df.empty:
+        if self._is_empty():
             return []
         
         query_lower = query.lower()
         
+        if self.catalog is not None:
+            # Mesma semântica do str.contains (expressão regular) do modo DataFrame
+            pattern = re.compile(query_lower)
+            mask = (self._match('nome', lambda v: pattern.search(v) is not None) |
+                    self._match('ingredientes_principais', lambda v: pattern.search(v) is not None))
+            results = self._records(mask)
+            
+            if not results:
+                logger.info(f"Nenhum prato encontrado para: {query}")
+                return []
+            
+            logger.info(f"{len(results)} prato(s) encontrado(s)")
+            return results
+        
         # Busca por nome
         mask_nome = self.df['nome'].str.lower().str.contains(query_lower, na=False)
         
@@ -61,9 +125,13 @@ class DishDatabase:
         """
         Recupera um prato específico pelo nome exato
         """
-        if self.df.empty:
+        if self._is_empty():
             return None
         
+        if self.catalog is not None:
+            indices = np.flatnonzero(self._match('nome', lambda v: v == name.lower()))
+            return self.catalog.row(int(indices[0])) if len(indices) else None
+        
         result = self.df[self.df['nome'].str.lower() == name.lower()]
         
         if len(result) == 0:
@@ -75,18 +143,24 @@ class DishDatabase:
         """
         Lista todas as categorias de pratos disponíveis
         """
-        if self.df.empty:
+        if self._is_empty():
             return []
         
+        if self.catalog is not None:
+            return sorted(self.catalog.columns['categoria'].categories.tolist())
+        
         return sorted(self.df['categoria'].unique().tolist())
     
     def list_dishes_by_category(self, category: str) -> List[Dict]:
         """
         Lista todos os pratos de uma categoria
         """
-        if self.df.empty:
+        if self._is_empty():
             return []
         
+        if self.catalog is not None:
+            return self._records(self._match('categoria', lambda v: v == category.lower()))
+        
         results = self.df[self.df['categoria'].str.lower() == category.lower()]
         return results.to_dict('records')
     
@@ -94,24 +168,35 @@ class DishDatabase:
         """
         Retorna todos os pratos da base
         """
-        if self.df.empty:
+        if self._is_empty():
             return []
         
+        if self.catalog is not None:
+            return [self.catalog.row(i) for i in range(len(self.catalog))]
+        
         return self.df.to_dict('records')
     
-    def extract_parameters(self, dish: Dict) -> Dict[str, float]:
-        """
-        Extrai os 10 parâmetros de um prato do CSV
-        """
-        return {
-            'proteina': float(dish.get('proteina', 5)),
-            'gordura': float(dish.get('gordura', 5)),
-            'acidez': float(dish.get('acidez', 5)),
-            'dulcor': float(dish.get('dulcor', 5)),
-            'intensidade_sabor': float(dish.get('intensidade_sabor', 5)),
-            'crocancia': float(dish.get('crocancia', 5)),
-            'metodo_preparo': float(dish.get('metodo_preparo', 5)),
-            'especiarias': float(dish.get('especiarias', 5)),
-            'teor_umami': float(dish.get('teor_umami', 5)),
-            'nivel_salgado': float(dish.get('nivel_salgado', 5))
-        }
+    def extract_parameters(self, dish: Dict) -> DishProfile:
+        """
+        Extrai os 10 parâmetros de um prato do CSV (ausentes valem 5)
+        """
+        return DishProfile.from_mapping(dish)
+    
+    def parameter_matrix(self) -> np.ndarray:
+        """
+        Parâmetros de todos os pratos, na ordem da base, como a matriz float32
+        (N x 10) de `DishProfile.stack`, lida coluna a coluna (sem montar dicts)
+        """
+        n_rows = 0 if self._is_empty() else (len(self.catalog) if self.catalog is not None else len(self.df))
+        matrix = np.full((n_rows, len(REQUIRED_DISH_PARAMS)), DEFAULT_VALUE, dtype=np.float32)
+        if n_rows == 0:
+            return matrix
+        
+        for j, name in enumerate(REQUIRED_DISH_PARAMS):
+            if self.catalog is not None:
+                column = self.catalog.columns.get(name)
+                if isinstance(column, np.ndarray):
+                    matrix[:, j] = column
+            elif name in self.df.columns:
+                matrix[:, j] = pd.to_numeric(self.df[name], errors='coerce').to_numpy()
+        return matrix
@@ -0,0 +1,102 @@
+"""
+Parâmetros de um prato em layout fixo.
+
+DishProfile guarda os 10 parâmetros em um vetor float32 na ordem de
+REQUIRED_DISH_PARAMS e se comporta como um Mapping somente leitura
+(`perfil['acidez']`, `dict(perfil)`), então os consumidores que esperam dict
+continuam funcionando. Os estágios do pipeline leem o vetor direto (por posição)
+e vários perfis viram uma matriz (N x 10) com `DishProfile.stack`.
+"""
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+try:
+    from .config import REQUIRED_DISH_PARAMS
+except ImportError:
+    from config import REQUIRED_DISH_PARAMS
+
+PARAM_INDEX: Dict[str, int] = {name: i for i, name in enumerate(REQUIRED_DISH_PARAMS)}
+N_PARAMS = len(REQUIRED_DISH_PARAMS)
+DEFAULT_VALUE = 5.0
+
+
+class DishProfile(Mapping):
+    """Vetor float32 (len(REQUIRED_DISH_PARAMS),) com acesso por nome"""
+
+    __slots__ = ('values',)
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float32)
+        if values.shape != (N_PARAMS,):
+            raise ValueError(f"Perfil do prato precisa de {N_PARAMS} valores (recebido formato {values.shape})")
+        self.values = values
+
+    @classmethod
+    def from_mapping(cls, params: Mapping, default: Optional[float] = DEFAULT_VALUE) -> 'DishProfile':
+        """
+        Perfil a partir de um dict (ou linha do CSV); parâmetros ausentes recebem
+        `default` ou, com `default=None`, levantam ValueError
+        """
+        if isinstance(params, DishProfile):
+            return params
+        if default is None:
+            missing = [name for name in REQUIRED_DISH_PARAMS if name not in params]
+            if missing:
+                raise ValueError(f"Parâmetros ausentes: {', '.join(missing)}")
+        return cls([float(params.get(name, default)) for name in REQUIRED_DISH_PARAMS])
+
+    @classmethod
+    def coerce(cls, params: Union['DishProfile', Mapping]) -> 'DishProfile':
+        """O próprio perfil, ou um novo a partir de um dict (compatibilidade)"""
+        return params if isinstance(params, DishProfile) else cls.from_mapping(params)
+
+    @staticmethod
+    def stack(profiles: Iterable[Union['DishProfile', Mapping]]) -> np.ndarray:
+        """Matriz float32 (N x len(REQUIRED_DISH_PARAMS)) com um perfil por linha"""
+        rows = [DishProfile.coerce(p).values for p in profiles]
+        if not rows:
+            return np.empty((0, N_PARAMS), dtype=np.float32)
+        return np.stack(rows)
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> list:
+        """Um perfil por linha da matriz (as linhas são views, sem cópia)"""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        return [cls(row) for row in matrix]
+
+    def take(self, names: Iterable[str]) -> np.ndarray:
+        """Valores (float64) dos parâmetros pedidos, na ordem pedida"""
+        return self.values[[PARAM_INDEX[name] for name in names]].astype(np.float64)
+
+    def to_dict(self) -> Dict[str, float]:
+        """Forma dict (valores arredondados para esconder o ruído do float32)"""
+        return dict(zip(REQUIRED_DISH_PARAMS, np.round(self.values.astype(np.float64), 6).tolist()))
+
+    def __getitem__(self, name: str) -> float:
+        return round(float(self.values[PARAM_INDEX[name]]), 6)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(REQUIRED_DISH_PARAMS)
+
+    def __len__(self) -> int:
+        return N_PARAMS
+
+    def __contains__(self, name) -> bool:
+        return name in PARAM_INDEX
+
+    def __repr__(self) -> str:
+        return f"DishProfile({self.to_dict()})"
+
+    def __reduce__(self):
+        return DishProfile, (self.values.copy(),)
+
+
+def _accessor(index: int) -> property:
+    return property(lambda self: round(float(self.values[index]), 6))
+
+
+# Acesso por atributo: perfil.proteina, perfil.acidez, ...
+for _name, _index in PARAM_INDEX.items():
+    setattr(DishProfile, _name, _accessor(_index))
@@ -0,0 +1,278 @@
+"""
+Avaliador fuzzy compilado: tabelas de pertinência pré-calculadas e inferência
+Mamdani vetorizada com NumPy, sem passar pelo grafo do scikit-fuzzy a cada chamada
+"""
+import copy
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .fuzzy_rules import RuleSpec, required_inputs
+    from .dish_profile import PARAM_INDEX, DishProfile
+except ImportError:
+    from fuzzy_rules import RuleSpec, required_inputs
+    from dish_profile import PARAM_INDEX, DishProfile
+
+
+def build_universe(resolution: int, low: float = 0.0, high: float = 10.0) -> np.ndarray:
+    """Gera o universo de discurso com `resolution` pontos igualmente espaçados"""
+    if resolution < 2:
+        raise ValueError(f"Resolução do universo deve ser >= 2 (recebido {resolution})")
+    return np.linspace(low, high, int(resolution))
+
+
+def trimf(x: np.ndarray, abc: Sequence[float]) -> np.ndarray:
+    """Função de pertinência triangular (mesma semântica de skfuzzy.trimf)"""
+    a, b, c = [float(v) for v in abc]
+    y = np.zeros(len(x))
+
+    if a != b:
+        mask = (a < x) & (x < b)
+        y[mask] = (x[mask] - a) / (b - a)
+    if b != c:
+        mask = (b < x) & (x < c)
+        y[mask] = (c - x[mask]) / (c - b)
+    y[x == b] = 1.0
+    return y
+
+
+class CompiledFuzzyEvaluator:
+    """
+    Sistema fuzzy compilado em tabelas contíguas.
+
+    - `membership_table[i, t, :]`: pertinência do termo t da entrada i em cada ponto do universo
+    - `output_table[t, :]`: conjunto de saída do termo t do consequente
+    - `rule_index[r, a, k]`: posição (entrada*termos + termo) do k-ésimo termo alternativo do
+      antecedente a da regra r; posições livres apontam para slots fixos de pertinência
+      0.0 (termo alternativo inexistente) ou 1.0 (antecedente inexistente)
+
+    A inferência (OU=max entre termos, E=min entre antecedentes, acumulação=max,
+    defuzzificação por centróide) é feita indexando essas tabelas diretamente, então o
+    custo por chamada não depende do número de objetos do scikit-fuzzy nem de
+    reinterpolação de funções de pertinência.
+    """
+
+    def __init__(self,
+                 universe: np.ndarray,
+                 input_terms: Dict[str, Dict[str, Sequence[float]]],
+                 output_terms: Dict[str, Sequence[float]],
+                 rules: List[RuleSpec]):
+        self.universe = np.ascontiguousarray(universe, dtype=np.float64)
+        self.low = float(self.universe[0])
+        self.high = float(self.universe[-1])
+        self.step = (self.high - self.low) / (len(self.universe) - 1)
+
+        # Apenas as entradas usadas por alguma regra participam da inferência
+        used_inputs = required_inputs(rules)
+        self.input_names = [name for name in input_terms if name in used_inputs]
+        self.output_names = list(output_terms)
+        self._input_terms = input_terms
+        self._output_terms = output_terms
+        # Posição de cada entrada no vetor de DishProfile (None se alguma não for parâmetro do prato)
+        self._profile_index = (np.array([PARAM_INDEX[name] for name in self.input_names], dtype=np.intp)
+                               if all(name in PARAM_INDEX for name in self.input_names) else None)
+
+        n_terms = max(len(terms) for terms in input_terms.values())
+        self.n_terms = n_terms
+        self.term_index = {}
+        self.membership_table = np.zeros((len(self.input_names), n_terms, len(self.universe)))
+        for i, name in enumerate(self.input_names):
+            self.term_index[name] = {}
+            for t, (term, abc) in enumerate(input_terms[name].items()):
+                self.term_index[name][term] = t
+                self.membership_table[i, t] = trimf(self.universe, abc)
+
+        self.output_table = np.ascontiguousarray(
+            [trimf(self.universe, abc) for abc in output_terms.values()]
+        )
+
+        # Rampas de subida e descida de cada termo de saída como pares (pertinência, x) em
+        # ordem crescente de pertinência, deslocadas de 2 em 2 para caberem numa só tabela:
+        # o cruzamento do corte com a rampa s é `np.interp(corte + 2s, _slope_levels, _slope_x)`
+        levels, xs, bounds = [], [], []
+        for mf in self.output_table:
+            peak = int(mf.argmax())
+            zeros = np.flatnonzero(mf == 0.0)
+            start = int(zeros[zeros < peak].max(initial=0))
+            end = int(zeros[zeros > peak].min(initial=len(mf) - 1))
+            for part in (slice(start, peak + 1), slice(end, peak - 1 if peak else None, -1)):
+                offset = 2.0 * len(bounds)
+                levels.append(mf[part] + offset)
+                xs.append(self.universe[part])
+                bounds.append((mf[part].min() + offset, mf[part].max() + offset))
+        self._slope_levels = np.concatenate(levels)
+        self._slope_x = np.concatenate(xs)
+        self._slope_bounds = np.array(bounds).T
+        self._slope_term = np.repeat(np.arange(len(self.output_names)), 2)
+
+        self._zero_slot = len(self.input_names) * self.n_terms
+        self._one_slot = self._zero_slot + 1
+        # Codificação de cada regra (posições dos termos por antecedente), por identidade lógica
+        self._encoded: Dict[tuple, Tuple[Tuple[Tuple[int, ...], ...], int]] = {}
+        self._compile_rules(rules)
+
+    def _encode_rule(self, rule: RuleSpec) -> Tuple[Tuple[Tuple[int, ...], ...], int]:
+        encoded = self._encoded.get(rule.key)
+        if encoded is None:
+            input_pos = {name: i for i, name in enumerate(self.input_names)}
+            slots = tuple(
+                tuple(input_pos[var] * self.n_terms + self.term_index[var][term] for term in terms)
+                for var, terms in rule.antecedents
+            )
+            encoded = self._encoded[rule.key] = (slots, self.output_names.index(rule.consequent))
+            self.rules_encoded += 1
+        return encoded
+
+    def _compile_rules(self, rules: List[RuleSpec]) -> None:
+        """Converte as regras estruturadas em matrizes de índices"""
+        self.n_rules = len(rules)
+        self.rules_encoded = 0
+        encoded = [self._encode_rule(rule) for rule in rules]
+
+        max_ants = max((len(slots) for slots, _ in encoded), default=1)
+        max_alts = max((len(alts) for slots, _ in encoded for alts in slots), default=1)
+        self.rule_index = np.full((len(rules), max_ants, max_alts), self._zero_slot, dtype=np.intp)
+        self.rule_output = np.zeros((len(self.output_names), len(rules)), dtype=bool)
+
+        for r, (slots, output) in enumerate(encoded):
+            self.rule_index[r, len(slots):, :] = self._one_slot
+            for a, alts in enumerate(slots):
+                self.rule_index[r, a, :len(alts)] = alts
+            self.rule_output[output, r] = True
+
+        # Regras que saíram da base não precisam continuar no cache
+        keys = {rule.key for rule in rules}
+        for key in [key for key in self._encoded if key not in keys]:
+            del self._encoded[key]
+
+    def with_rules(self, rules: List[RuleSpec]) -> 'CompiledFuzzyEvaluator':
+        """
+        Novo avaliador para outra base de regras reaproveitando as tabelas de pertinência
+        e a codificação das regras que não mudaram (`rules_encoded` conta só as novas).
+        Se o conjunto de entradas usadas mudar, as tabelas são recompiladas por inteiro.
+        """
+        if required_inputs(rules) != set(self.input_names):
+            return CompiledFuzzyEvaluator(self.universe, self._input_terms, self._output_terms, rules)
+
+        evaluator = copy.copy(self)
+        evaluator._encoded = dict(self._encoded)
+        evaluator._compile_rules(rules)
+        return evaluator
+
+    def memberships(self, values: np.ndarray) -> np.ndarray:
+        """
+        Pertinência de cada termo para valores crisp na ordem de `input_names`.
+        Usa interpolação linear entre os dois pontos vizinhos da tabela.
+        """
+        values = np.clip(np.asarray(values, dtype=np.float64), self.low, self.high)
+        pos = (values - self.low) / self.step
+        idx = np.minimum(pos.astype(np.intp), len(self.universe) - 2)
+        frac = (pos - idx)[:, None]
+        rows = np.arange(len(self.input_names))
+        return (self.membership_table[rows, :, idx] * (1.0 - frac)
+                + self.membership_table[rows, :, idx + 1] * frac)
+
+    def activations(self, values: np.ndarray) -> np.ndarray:
+        """Grau de ativação de cada termo de saída (acumulação por máximo)"""
+        mu = np.empty(self._one_slot + 1)
+        mu[:self._zero_slot] = self.memberships(values).ravel()
+        mu[self._zero_slot] = 0.0
+        mu[self._one_slot] = 1.0
+
+        rule_strength = mu[self.rule_index].max(axis=2).min(axis=1)
+        return np.where(self.rule_output, rule_strength, 0.0).max(axis=1, initial=0.0)
+
+    def _crossings(self, term_activation: np.ndarray) -> np.ndarray:
+        """
+        Pontos em que o corte de cada termo cruza a subida e a descida da sua função
+        de pertinência: `a + μ·(b-a)` e `c - μ·(c-b)` quando os vértices caem no universo
+        """
+        query = term_activation[..., self._slope_term] + 2.0 * np.arange(len(self._slope_term))
+        query = np.clip(query, self._slope_bounds[0], self._slope_bounds[1])
+        return np.interp(query, self._slope_levels, self._slope_x)
+
+    @staticmethod
+    def _centroid(x: np.ndarray, aggregated: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Área e momento da função linear por partes nos pontos `x` (último eixo)"""
+        x1 = x[..., :-1]
+        dx = np.diff(x, axis=-1)
+        y1 = aggregated[..., :-1]
+        y2 = aggregated[..., 1:]
+        area = 0.5 * dx * (y1 + y2)
+        moment = area * x1 + dx ** 2 / 3.0 * (y2 + 0.5 * y1)
+        return area.sum(axis=-1), moment.sum(axis=-1)
+
+    def defuzzify(self, term_activation: np.ndarray) -> Optional[float]:
+        """
+        Centróide do conjunto agregado; None se nenhuma regra foi ativada.
+
+        Como o scikit-fuzzy, integra também nos pontos em que o corte de cada termo
+        cruza a função de pertinência, então o resultado é o mesmo do caminho de
+        referência em qualquer resolução do universo.
+        """
+        x = np.sort(np.concatenate((self.universe, self._crossings(term_activation))))
+        aggregated = np.zeros(len(x))
+        for cut, mf in zip(term_activation, self.output_table):
+            if cut > 0.0:
+                np.maximum(aggregated, np.minimum(cut, np.interp(x, self.universe, mf)), out=aggregated)
+
+        total_area, moment = self._centroid(x, aggregated)
+        if total_area <= 0.0:
+            return None
+        return float(moment / total_area)
+
+    def memberships_batch(self, values: np.ndarray) -> np.ndarray:
+        """Versão em lote de `memberships`: (N, entradas) -> (N, entradas, termos)"""
+        values = np.clip(np.asarray(values, dtype=np.float64), self.low, self.high)
+        pos = (values - self.low) / self.step
+        idx = np.minimum(pos.astype(np.intp), len(self.universe) - 2)
+        frac = (pos - idx)[:, :, None]
+        rows = np.arange(len(self.input_names))[None, :]
+        return (self.membership_table[rows, :, idx] * (1.0 - frac)
+                + self.membership_table[rows, :, idx + 1] * frac)
+
+    def rule_strengths_batch(self, values: np.ndarray) -> np.ndarray:
+        """Grau de disparo de cada regra para cada linha: (N, entradas) -> (N, regras)"""
+        n = len(values)
+        mu = np.empty((n, self._one_slot + 1))
+        mu[:, :self._zero_slot] = self.memberships_batch(values).reshape(n, -1)
+        mu[:, self._zero_slot] = 0.0
+        mu[:, self._one_slot] = 1.0
+        return mu[:, self.rule_index].max(axis=3).min(axis=2)
+
+    def defuzzify_batch(self, term_activation: np.ndarray) -> np.ndarray:
+        """Centróide por linha, com os mesmos pontos de `defuzzify`; NaN onde nenhuma regra foi ativada"""
+        n = len(term_activation)
+        extra = self._crossings(term_activation)
+        x = np.concatenate([np.broadcast_to(self.universe, (n, len(self.universe))), extra], axis=1)
+        x.sort(axis=1)
+
+        aggregated = np.zeros(x.shape)
+        for cut, mf in zip(term_activation.T, self.output_table):
+            np.maximum(aggregated, np.minimum(cut[:, None], np.interp(x, self.universe, mf)), out=aggregated)
+
+        total_area, moment = self._centroid(x, aggregated)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(total_area > 0.0, moment / total_area, np.nan)
+
+    def compute_batch(self, values: np.ndarray) -> np.ndarray:
+        """Valores defuzzificados para uma matriz (N, entradas) na ordem de `input_names`"""
+        strengths = self.rule_strengths_batch(values)
+        term_activation = np.where(self.rule_output[None, :, :], strengths[:, None, :], 0.0).max(axis=2, initial=0.0)
+        return self.defuzzify_batch(term_activation)
+
+    def input_vector(self, params: Dict[str, float], default: float = 5.0) -> np.ndarray:
+        """Valores das entradas na ordem de `input_names` (DishProfile é lido por posição)"""
+        if isinstance(params, DishProfile) and self._profile_index is not None:
+            return params.values[self._profile_index].astype(np.float64)
+        return np.array([params.get(name, default) for name in self.input_names], dtype=np.float64)
+
+    def input_matrix(self, profiles: np.ndarray) -> np.ndarray:
+        """Colunas de `input_names` de uma matriz (N x 10) de DishProfile.stack"""
+        if self._profile_index is None:
+            raise ValueError("Entradas do avaliador não são todas parâmetros do prato")
+        return np.asarray(profiles, dtype=np.float64)[:, self._profile_index]
+
+    def compute(self, params: Dict[str, float], default: float = 5.0) -> Optional[float]:
+        """Calcula o valor defuzzificado a partir de um dict de parâmetros"""
+        return self.defuzzify(self.activations(self.input_vector(params, default)))
@@ -0,0 +1,137 @@
+"""
+Análise de cobertura da base de regras fuzzy: varre o espaço de entradas em uma
+grade e encontra as regiões onde nenhuma regra é ativada (e o motor cairia no
+método alternativo)
+"""
+import sys
+import numpy as np
+from collections import Counter
+from typing import Dict, List, Tuple
+
+try:
+    from .logger import setup_logger
+    from .fuzzy_compiler import CompiledFuzzyEvaluator
+except ImportError:
+    from logger import setup_logger
+    from fuzzy_compiler import CompiledFuzzyEvaluator
+
+logger = setup_logger(__name__)
+
+
+class CoverageReport:
+    """Resultado da varredura de cobertura"""
+
+    def __init__(self, input_names: List[str], step: float, total_points: int,
+                 uncovered_points: int, regions: List[Tuple[Dict[str, str], int]]):
+        self.input_names = input_names
+        self.step = step
+        self.total_points = total_points
+        self.uncovered_points = uncovered_points
+        self.regions = regions  # [({variável: termo dominante}, pontos sem cobertura)], maiores primeiro
+
+    @property
+    def coverage(self) -> float:
+        """Fração dos pontos da grade em que alguma regra dispara"""
+        if not self.total_points:
+            return 1.0
+        return 1.0 - self.uncovered_points / self.total_points
+
+    def to_dict(self) -> Dict:
+        return {
+            'entradas': self.input_names,
+            'passo': self.step,
+            'pontos_total': self.total_points,
+            'pontos_sem_cobertura': self.uncovered_points,
+            'cobertura': self.coverage,
+            'regioes': [{'termos': terms, 'pontos': count} for terms, count in self.regions],
+        }
+
+    def to_text(self, limit: int = 20) -> List[str]:
+        """Resumo legível das regiões sem cobertura"""
+        lines = [
+            f"Cobertura: {self.coverage:.2%} ({self.total_points - self.uncovered_points}/{self.total_points} "
+            f"pontos, passo {self.step})"
+        ]
+        for i, (terms, count) in enumerate(self.regions[:limit]):
+            cond_str = " E ".join(f"{var} é {term}" for var, term in terms.items())
+            lines.append(f"{i+1}. {cond_str} - {count} pontos sem regra ativa")
+        if len(self.regions) > limit:
+            lines.append(f"... e mais {len(self.regions) - limit} regiões")
+        return lines
+
+
+class CoverageAnalyzer:
+    """Varre o espaço de entradas do avaliador compilado em lotes vetorizados"""
+
+    def __init__(self, evaluator: CompiledFuzzyEvaluator):
+        self.evaluator = evaluator
+        self.term_names = {
+            name: {index: term for term, index in evaluator.term_index[name].items()}
+            for name in evaluator.input_names
+        }
+
+    def analyze(self, step: float = 1.0, max_points: int = 2_000_000, chunk_size: int = 50_000) -> CoverageReport:
+        """
+        Avalia todos os pontos de uma grade regular com o passo indicado.
+        Se a grade exceder `max_points`, o passo é aumentado até caber.
+        Cada ponto sem cobertura é atribuído à região formada pelo termo de maior
+        pertinência de cada variável.
+        """
+        ev = self.evaluator
+        n_inputs = len(ev.input_names)
+
+        grid = np.arange(ev.low, ev.high + step / 2, step)
+        while len(grid) ** n_inputs > max_points:
+            step *= 1.25
+            grid = np.arange(ev.low, ev.high + step / 2, step)
+        grid = np.minimum(grid, ev.high)
+
+        shape = (len(grid),) * n_inputs
+        total = int(np.prod(shape))
+        logger.info(f"Analisando cobertura em {total} pontos (passo {step:.2f}, {n_inputs} entradas)")
+
+        uncovered = 0
+        regions = Counter()
+        for start in range(0, total, chunk_size):
+            flat = np.arange(start, min(start + chunk_size, total))
+            values = grid[np.stack(np.unravel_index(flat, shape), axis=1)]
+
+            strengths = ev.rule_strengths_batch(values)
+            dead = strengths.max(axis=1, initial=0.0) <= 0.0
+            if not dead.any():
+                continue
+
+            uncovered += int(dead.sum())
+            dominant = ev.memberships_batch(values[dead]).argmax(axis=2)
+            for key, count in zip(*np.unique(dominant, axis=0, return_counts=True)):
+                regions[tuple(key)] += int(count)
+
+        named_regions = [
+            ({name: self.term_names[name][int(t)] for name, t in zip(ev.input_names, key)}, count)
+            for key, count in regions.most_common()
+        ]
+        return CoverageReport(list(ev.input_names), round(step, 4), total, uncovered, named_regions)
+
+
+def main():
+    import argparse
+    from pathlib import Path
+
+    root_dir = Path(__file__).parent.parent
+    sys.path.insert(0, str(root_dir))
+    from src.fuzzy_engine import FuzzyEngine
+
+    parser = argparse.ArgumentParser(description="Análise de cobertura das regras fuzzy")
+    parser.add_argument('--dishes', default=str(root_dir / "data" / "pratos.csv"), help="CSV de pratos para aprender regras")
+    parser.add_argument('--step', type=float, default=1.0, help="Passo da grade (0-10)")
+    parser.add_argument('--limit', type=int, default=20, help="Número máximo de regiões exibidas")
+    args = parser.parse_args()
+
+    engine = FuzzyEngine(args.dishes, use_learned_rules=True)
+    report = engine.analyze_coverage(step=args.step)
+    for line in report.to_text(limit=args.limit):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
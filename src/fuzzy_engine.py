@@ -1,78 +1,87 @@
+import hashlib
+import json
+import threading
+import time
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
-from typing import Dict, List
+from typing import Dict, List, Optional
 from pathlib import Path
 
 try:
-    from .logger import setup_logger
+    from .logger import request_log_level, setup_logger
+    from .tracing import traced
     from .fuzzy_tree_builder import FuzzyTreeBuilder
+    from .fuzzy_compiler import CompiledFuzzyEvaluator, build_universe
+    from .fuzzy_rules import DEFAULT_RULES, RuleSpec, required_inputs
+    from .rule_optimizer import RuleBaseOptimizer
+    from .fuzzy_coverage import CoverageAnalyzer, CoverageReport
+    from . import config
+    from .lazy_imports import lazy_import
+    from .dish_profile import DishProfile
 except ImportError:
-    from logger import setup_logger
+    from logger import request_log_level, setup_logger
+    from tracing import traced
     from fuzzy_tree_builder import FuzzyTreeBuilder
+    from fuzzy_compiler import CompiledFuzzyEvaluator, build_universe
+    from fuzzy_rules import DEFAULT_RULES, RuleSpec, required_inputs
+    from rule_optimizer import RuleBaseOptimizer
+    from fuzzy_coverage import CoverageAnalyzer, CoverageReport
+    import config
+    from lazy_imports import lazy_import
+    from dish_profile import DishProfile
+
+# O scikit-fuzzy só é necessário no caminho de referência (use_compiled=False)
+fuzz = lazy_import('skfuzzy')
+ctrl = lazy_import('skfuzzy.control')
 
 logger = setup_logger(__name__)
+REQUEST_LOG_LEVEL = request_log_level()
+
+# Profundidade máxima da árvore usada para aprender regras dos pratos
+LEARNED_TREE_MAX_DEPTH = 4
+
+# Funções de pertinência triangulares [a, b, c] de cada variável de entrada
+INPUT_MEMBERSHIP_FUNCTIONS = {
+    'intensidade_sabor': {'baixo': [0, 0, 5], 'medio': [3, 5, 7], 'alto': [5, 10, 10]},
+    'acidez': {'baixa': [0, 0, 5], 'media': [3, 5, 7], 'alta': [5, 10, 10]},
+    'gordura': {'baixa': [0, 0, 5], 'media': [3, 5, 7], 'alta': [5, 10, 10]},
+    'especiarias': {'baixo': [0, 0, 5], 'medio': [3, 5, 7], 'alto': [5, 10, 10]},
+    'dulcor': {'baixo': [0, 0, 4], 'medio': [3, 5, 7], 'alto': [6, 10, 10]},
+    'proteina': {'baixa': [0, 0, 5], 'media': [3, 5, 7], 'alta': [5, 10, 10]},
+    'metodo_preparo': {'baixo': [0, 0, 5], 'medio': [3, 5, 7], 'alto': [5, 10, 10]},
+}
+
+# Funções de pertinência do perfil do vinho (variável de saída)
+OUTPUT_MEMBERSHIP_FUNCTIONS = {
+    'leve': [0, 0, 5],
+    'medio': [3, 5, 7],
+    'encorpado': [5, 10, 10],
+}
+
 
 class FuzzyEngine:
-    def __init__(self, dishes_csv: str = None, use_learned_rules: bool = True):
+    def __init__(self, dishes_csv: str = None, use_learned_rules: bool = True,
+                 resolution: Optional[int] = None, use_compiled: bool = True):
         logger.info("Inicializando Fuzzy Engine")
         
         self.use_learned_rules = use_learned_rules
+        self.use_compiled = use_compiled
         self.tree_builder = None
         self.learned_rules = []
         self.required_inputs = set()  # Rastreia quais inputs são necessários
         
-        # Variáveis de entrada
-        self.intensidade_sabor = ctrl.Antecedent(np.arange(0, 11, 1), 'intensidade_sabor')
-        self.acidez = ctrl.Antecedent(np.arange(0, 11, 1), 'acidez')
-        self.gordura = ctrl.Antecedent(np.arange(0, 11, 1), 'gordura')
-        self.especiarias = ctrl.Antecedent(np.arange(0, 11, 1), 'especiarias')
-        self.dulcor = ctrl.Antecedent(np.arange(0, 11, 1), 'dulcor')
-        self.proteina = ctrl.Antecedent(np.arange(0, 11, 1), 'proteina')
-        self.metodo_preparo = ctrl.Antecedent(np.arange(0, 11, 1), 'metodo_preparo')
-        
-        # Variável de saída
-        self.perfil_vinho = ctrl.Consequent(np.arange(0, 11, 1), 'perfil_vinho')
-        
-        # Funções de pertinência para intensidade_sabor
-        self.intensidade_sabor['baixo'] = fuzz.trimf(self.intensidade_sabor.universe, [0, 0, 5])
-        self.intensidade_sabor['medio'] = fuzz.trimf(self.intensidade_sabor.universe, [3, 5, 7])
-        self.intensidade_sabor['alto'] = fuzz.trimf(self.intensidade_sabor.universe, [5, 10, 10])
-        
-        # Funções de pertinência para acidez
-        self.acidez['baixa'] = fuzz.trimf(self.acidez.universe, [0, 0, 5])
-        self.acidez['media'] = fuzz.trimf(self.acidez.universe, [3, 5, 7])
-        self.acidez['alta'] = fuzz.trimf(self.acidez.universe, [5, 10, 10])
-        
-        # Funções de pertinência para gordura
-        self.gordura['baixa'] = fuzz.trimf(self.gordura.universe, [0, 0, 5])
-        self.gordura['media'] = fuzz.trimf(self.gordura.universe, [3, 5, 7])
-        self.gordura['alta'] = fuzz.trimf(self.gordura.universe, [5, 10, 10])
-        
-        # Funções de pertinência para especiarias
-        self.especiarias['baixo'] = fuzz.trimf(self.especiarias.universe, [0, 0, 5])
-        self.especiarias['medio'] = fuzz.trimf(self.especiarias.universe, [3, 5, 7])
-        self.especiarias['alto'] = fuzz.trimf(self.especiarias.universe, [5, 10, 10])
-        
-        # Funções de pertinência para dulcor
-        self.dulcor['baixo'] = fuzz.trimf(self.dulcor.universe, [0, 0, 4])
-        self.dulcor['medio'] = fuzz.trimf(self.dulcor.universe, [3, 5, 7])
-        self.dulcor['alto'] = fuzz.trimf(self.dulcor.universe, [6, 10, 10])
-        
-        # Funções de pertinência para proteina
-        self.proteina['baixa'] = fuzz.trimf(self.proteina.universe, [0, 0, 5])
-        self.proteina['media'] = fuzz.trimf(self.proteina.universe, [3, 5, 7])
-        self.proteina['alta'] = fuzz.trimf(self.proteina.universe, [5, 10, 10])
-        
-        # Funções de pertinência para metodo_preparo
-        self.metodo_preparo['baixo'] = fuzz.trimf(self.metodo_preparo.universe, [0, 0, 5])
-        self.metodo_preparo['medio'] = fuzz.trimf(self.metodo_preparo.universe, [3, 5, 7])
-        self.metodo_preparo['alto'] = fuzz.trimf(self.metodo_preparo.universe, [5, 10, 10])
-        
-        # Funções de pertinência para perfil do vinho
-        self.perfil_vinho['leve'] = fuzz.trimf(self.perfil_vinho.universe, [0, 0, 5])
-        self.perfil_vinho['medio'] = fuzz.trimf(self.perfil_vinho.universe, [3, 5, 7])
-        self.perfil_vinho['encorpado'] = fuzz.trimf(self.perfil_vinho.universe, [5, 10, 10])
+        # Variáveis do scikit-fuzzy e ctrl.Rule por regra (RuleSpec.key), reaproveitadas entre trocas
+        self._ctrl_variables = None
+        self._ctrl_rules = {}
+        
+        # Contadores de inferência (quantas vezes o método alternativo foi usado)
+        self.inference_counters = {'chamadas': 0, 'fallbacks': 0}
+        self._counters_lock = threading.Lock()
+        
+        # Universo de discurso compartilhado por todas as variáveis
+        if resolution is None:
+            resolution = config.FUZZY_UNIVERSE_RESOLUTION
+        self.resolution = int(resolution)
+        self.universe = build_universe(self.resolution)
         
         # Se CSV de pratos fornecido, aprender regras
         if use_learned_rules and dishes_csv and Path(dishes_csv).exists():
@@ -80,28 +89,179 @@ class FuzzyEngine:
         else:
             self._use_default_rules()
         
-        # Sistema de controle
-        self.control_system = ctrl.ControlSystem(self.rules)
-        self.simulator = ctrl.ControlSystemSimulation(self.control_system)
+        self._apply_rules()
+        
+        logger.info(f"Fuzzy Engine inicializado com {len(self.rule_specs)} regras (resolução {self.resolution})")
+        logger.info(f"Inputs necessários: {self.required_inputs}")
+    
+    def _apply_rules(self):
+        """(Re)constrói sistema de controle, avaliador compilado e inputs a partir de `rule_specs`"""
+        # Sistema de controle do scikit-fuzzy: construído sob demanda (ver `control_system`)
+        self._control = None
+        
+        # Simuladores do scikit-fuzzy guardam estado nas próprias variáveis,
+        # então cada thread recebe um sistema de controle privado
+        self._thread_state = threading.local()
+        
+        # Tabelas de pertinência e regras compiladas para o caminho rápido (sem estado)
+        self.evaluator = self._compile_evaluator()
         
         # Detectar quais inputs são realmente necessários
         self._detect_required_inputs()
+        self._rules_fingerprint = None
+    
+    @property
+    def rules_fingerprint(self) -> str:
+        """
+        Hash da base de regras ativa, das funções de pertinência e da resolução: muda
+        sempre que a inferência de um mesmo prato pode mudar
+        """
+        if self._rules_fingerprint is None:
+            payload = json.dumps({
+                'regras': [[list(map(list, spec.antecedents)), spec.consequent] for spec in self.rule_specs],
+                'entradas': INPUT_MEMBERSHIP_FUNCTIONS,
+                'saida': OUTPUT_MEMBERSHIP_FUNCTIONS,
+                'resolucao': self.resolution,
+                'compilado': self.use_compiled,
+            }, sort_keys=True, ensure_ascii=False)
+            self._rules_fingerprint = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        return self._rules_fingerprint
+    
+    def _build_control(self):
+        """Variáveis e regras do scikit-fuzzy para as regras ativas (cacheadas até a próxima troca)"""
+        if self._control is None:
+            if self._ctrl_variables is None:
+                self._ctrl_variables = self._build_variables()
+            antecedents, consequent = self._ctrl_variables
+            
+            # Só as regras que ainda não existiam são convertidas; cada ctrl.Rule entra uma vez
+            previous, cached, rules = self._ctrl_rules, {}, []
+            for spec in self.rule_specs:
+                rule = previous.pop(spec.key, None) or self._build_ctrl_rule(spec, antecedents, consequent)
+                cached.setdefault(spec.key, rule)
+                rules.append(rule)
+            self._ctrl_rules = cached
+            self._control = (antecedents, consequent, rules, ctrl.ControlSystem(rules))
+        return self._control
+    
+    @property
+    def rules(self) -> List:
+        """Regras ativas como ctrl.Rule"""
+        return self._build_control()[2]
+    
+    @property
+    def control_system(self):
+        """Sistema de controle do scikit-fuzzy com as regras ativas"""
+        return self._build_control()[3]
+    
+    def _build_variables(self):
+        """Cria antecedentes e consequente com as funções de pertinência configuradas"""
+        antecedents = {}
+        for name, terms in INPUT_MEMBERSHIP_FUNCTIONS.items():
+            antecedent = ctrl.Antecedent(self.universe, name)
+            for term, abc in terms.items():
+                antecedent[term] = fuzz.trimf(antecedent.universe, abc)
+            antecedents[name] = antecedent
         
-        logger.info(f"Fuzzy Engine inicializado com {len(self.rules)} regras")
-        logger.info(f"Inputs necessários: {self.required_inputs}")
+        consequent = ctrl.Consequent(self.universe, 'perfil_vinho')
+        for term, abc in OUTPUT_MEMBERSHIP_FUNCTIONS.items():
+            consequent[term] = fuzz.trimf(consequent.universe, abc)
+        
+        return antecedents, consequent
+    
+    @property
+    def simulator(self) -> 'ctrl.ControlSystemSimulation':
+        """Simulador do scikit-fuzzy exclusivo da thread atual"""
+        simulator = getattr(self._thread_state, 'simulator', None)
+        if simulator is None:
+            simulator = self._new_simulator()
+            self._thread_state.simulator = simulator
+        return simulator
+    
+    def _new_simulator(self) -> 'ctrl.ControlSystemSimulation':
+        """Recria as regras sobre variáveis novas para obter um simulador independente"""
+        antecedents, consequent = self._build_variables()
+        rules = [self._build_ctrl_rule(spec, antecedents, consequent) for spec in self.rule_specs]
+        return ctrl.ControlSystemSimulation(ctrl.ControlSystem(rules))
+    
+    @staticmethod
+    def _build_ctrl_rule(spec: RuleSpec, antecedents: Dict, consequent) -> 'ctrl.Rule':
+        """Converte uma regra estruturada em ctrl.Rule (termos com OU, variáveis com E)"""
+        combined = None
+        for var, terms in spec.antecedents:
+            clause = antecedents[var][terms[0]]
+            for term in terms[1:]:
+                clause = clause | antecedents[var][term]
+            combined = clause if combined is None else combined & clause
+        
+        return ctrl.Rule(combined, consequent[spec.consequent])
+    
+    def _compile_evaluator(self, rule_specs: List[RuleSpec] = None) -> CompiledFuzzyEvaluator:
+        """Compila as regras (por padrão, as ativas) em tabelas de pertinência pré-calculadas"""
+        return CompiledFuzzyEvaluator(
+            self.universe,
+            INPUT_MEMBERSHIP_FUNCTIONS,
+            OUTPUT_MEMBERSHIP_FUNCTIONS,
+            self.rule_specs if rule_specs is None else rule_specs
+        )
+    
+    def optimize_rules(self, samples: List[Dict[str, float]] = None,
+                       contribution_threshold: float = 0.01, max_error: float = 0.1) -> Dict:
+        """
+        Otimiza a base de regras ativa (fusão, subsunção e poda) e a substitui.
+        As amostras padrão são os pratos de treinamento; sem eles, pontos aleatórios do espaço.
+        Retorna o relatório com a variação no número de regras, erro e speedup por chamada.
+        """
+        if samples is None:
+            samples = self._training_samples()
+        
+        optimizer = RuleBaseOptimizer(
+            self._compile_evaluator, samples,
+            contribution_threshold=contribution_threshold,
+            max_error=max_error,
+            timer=None if self.use_compiled else lambda specs: self._time_skfuzzy(specs, samples),
+            # Cada medição do scikit-fuzzy monta um simulador: menos rodadas intercaladas
+            timing_rounds=9 if self.use_compiled else 3
+        )
+        self.rule_specs, report = optimizer.optimize(self.rule_specs)
+        self._apply_rules()
+        return report
+    
+    def _training_samples(self, n_random: int = 500) -> List[Dict[str, float]]:
+        """Parâmetros dos pratos de treinamento ou, na falta deles, amostras aleatórias fixas"""
+        names = list(INPUT_MEMBERSHIP_FUNCTIONS)
+        if self.tree_builder is not None and self.tree_builder.dishes_df is not None:
+            return self.tree_builder.dishes_df[names].astype(float).to_dict('records')
+        
+        rng = np.random.default_rng(0)
+        return [dict(zip(names, row)) for row in rng.uniform(0, 10, size=(n_random, len(names)))]
+    
+    def _time_skfuzzy(self, rule_specs: List[RuleSpec], samples: List[Dict[str, float]]) -> float:
+        """Tempo médio (µs) por chamada do scikit-fuzzy para uma base de regras"""
+        active = self.rule_specs
+        self.rule_specs = rule_specs
+        try:
+            simulator = self._new_simulator()
+        finally:
+            self.rule_specs = active
+        
+        inputs = required_inputs(rule_specs)
+        samples = samples[:50]
+        # Primeira chamada (montagem interna do simulador) fora da medição
+        for params in samples[:1]:
+            for name in inputs:
+                simulator.input[name] = params.get(name, 5.0)
+            simulator.compute()
+        start = time.perf_counter()
+        for params in samples:
+            for name in inputs:
+                simulator.input[name] = params.get(name, 5.0)
+            simulator.compute()
+        return (time.perf_counter() - start) / max(len(samples), 1) * 1e6
     
     def _detect_required_inputs(self):
         """Detecta quais antecedentes são necessários baseado nas regras"""
-        # Inputs básicos que sempre estão presentes
-        self.required_inputs = {'intensidade_sabor', 'acidez', 'gordura', 'especiarias', 'dulcor'}
-        
-        # Verificar se alguma regra usa proteina ou metodo_preparo
-        for rule in self.rules:
-            rule_str = str(rule)
-            if 'proteina' in rule_str.lower():
-                self.required_inputs.add('proteina')
-            if 'metodo_preparo' in rule_str.lower():
-                self.required_inputs.add('metodo_preparo')
+        self.required_inputs = required_inputs(self.rule_specs)
     
     def _learn_rules_from_dishes(self, dishes_csv: str):
         """Aprende regras automaticamente dos pratos conhecidos"""
@@ -109,208 +269,210 @@ class FuzzyEngine:
         
         try:
             self.tree_builder = FuzzyTreeBuilder(dishes_csv)
-            tree, learned_rules = self.tree_builder.train(max_depth=4)
+            tree, learned_rules = self.tree_builder.train(max_depth=LEARNED_TREE_MAX_DEPTH)
             self.learned_rules = learned_rules
             
-            # Converter regras aprendidas para regras fuzzy do scikit-fuzzy
-            self.rules = self._convert_learned_rules_to_fuzzy()
+            # Converter regras aprendidas para a forma estruturada
+            self.rule_specs = self._convert_learned_rules_to_fuzzy()
             
-            logger.info(f"{len(self.rules)} regras geradas automaticamente")
+            logger.info(f"{len(self.rule_specs)} regras geradas automaticamente")
         except Exception as e:
             logger.error(f"Erro ao aprender regras: {e}. Usando regras padrão.")
             self._use_default_rules()
     
-    def _convert_learned_rules_to_fuzzy(self) -> List:
-        """Converte regras aprendidas para formato scikit-fuzzy"""
-        fuzzy_rules = []
+    def add_dishes(self, dishes, impurity_threshold: float = 0.3, support_growth: float = 0.5) -> Dict:
+        """
+        Incorpora pratos novos (DataFrame ou lista de dicts com as colunas do CSV de pratos)
+        às regras aprendidas sem retreinar: a árvore é atualizada por
+        FuzzyTreeBuilder.add_dishes e o avaliador compilado recodifica apenas as regras
+        que mudaram. Otimizações feitas por `optimize_rules` precisam ser refeitas.
+        """
+        if not self.use_learned_rules:
+            raise ValueError("Motor configurado sem regras aprendidas (use_learned_rules=False)")
+        
+        if self.tree_builder is None:
+            self.tree_builder = FuzzyTreeBuilder()
+            self.tree_builder.max_depth = LEARNED_TREE_MAX_DEPTH
+        
+        report = self.tree_builder.add_dishes(dishes, impurity_threshold, support_growth)
+        self.learned_rules = self.tree_builder.rules
+        report.update(self._update_rule_specs(self._convert_learned_rules_to_fuzzy()))
         
-        # Mapear atributos para variáveis fuzzy
-        attr_map = {
-            'intensidade_sabor': self.intensidade_sabor,
-            'acidez': self.acidez,
-            'gordura': self.gordura,
-            'especiarias': self.especiarias,
-            'dulcor': self.dulcor,
-            'proteina': self.proteina,
-            'metodo_preparo': self.metodo_preparo
+        logger.info(f"Base de regras atualizada: +{report['regras_adicionadas']} "
+                    f"-{report['regras_removidas']} ({len(self.rule_specs)} regras)")
+        return report
+    
+    def _update_rule_specs(self, rule_specs: List[RuleSpec]) -> Dict:
+        """Troca a base de regras recompilando só as regras novas (ver CompiledFuzzyEvaluator.with_rules)"""
+        old_keys = {spec.key for spec in self.rule_specs}
+        new_keys = {spec.key for spec in rule_specs}
+        
+        self.rule_specs = rule_specs
+        self._control = None
+        self._thread_state = threading.local()
+        self.evaluator = self.evaluator.with_rules(rule_specs)
+        self._detect_required_inputs()
+        self._rules_fingerprint = None
+        
+        return {
+            'regras_adicionadas': len(new_keys - old_keys),
+            'regras_removidas': len(old_keys - new_keys),
+            'regras_compiladas': self.evaluator.rules_encoded,
         }
+    
+    def _convert_learned_rules_to_fuzzy(self) -> List[RuleSpec]:
+        """Converte regras aprendidas para a forma estruturada usada pelo motor"""
+        fuzzy_rules = []
         
         # SEMPRE adicionar regras padrão primeiro para garantir que todos os antecedentes sejam usados
         fuzzy_rules.extend(self._get_default_rules())
         logger.info(f"Adicionadas {len(fuzzy_rules)} regras padrão")
         
-        # Tentar adicionar regras aprendidas (mas não é crítico se falhar)
+        # Adicionar regras aprendidas cujas variáveis e termos o motor conhece
         for rule in self.learned_rules:
-            try:
-                # Construir antecedentes
-                antecedents = []
-                for attr, (fuzzy_val, _) in rule.conditions.items():
-                    if attr in attr_map:
-                        antecedents.append(attr_map[attr][fuzzy_val])
-                
-                if not antecedents:
-                    continue
-                
-                # Combinar antecedentes com AND
-                combined = antecedents[0]
-                for ant in antecedents[1:]:
-                    combined = combined & ant
-                
-                # Criar regra
-                fuzzy_rule = ctrl.Rule(combined, self.perfil_vinho[rule.conclusion])
-                fuzzy_rules.append(fuzzy_rule)
-                
-            except Exception as e:
-                logger.debug(f"Não foi possível converter regra: {e}")
+            antecedents = [
+                (attr, fuzzy_val) for attr, (fuzzy_val, _) in rule.conditions.items()
+                if fuzzy_val in INPUT_MEMBERSHIP_FUNCTIONS.get(attr, {})
+            ]
+            
+            if not antecedents or rule.conclusion not in OUTPUT_MEMBERSHIP_FUNCTIONS:
+                logger.debug(f"Não foi possível converter regra: {rule}")
                 continue
+            
+            fuzzy_rules.append(RuleSpec(antecedents, rule.conclusion, rule.confidence, rule.support))
         
         return fuzzy_rules
     
     def _use_default_rules(self):
         """Usa regras fuzzy padrão (manuais)"""
         logger.info("Usando regras fuzzy padrão")
-        self.rules = self._get_default_rules()
+        self.rule_specs = self._get_default_rules()
     
-    def _get_default_rules(self) -> List:
+    def _get_default_rules(self) -> List[RuleSpec]:
         """Retorna regras fuzzy padrão"""
-        return [
-            # Regras para vinhos leves
-            ctrl.Rule(
-                self.intensidade_sabor['baixo'] & self.gordura['baixa'],
-                self.perfil_vinho['leve']
-            ),
-            ctrl.Rule(
-                self.intensidade_sabor['baixo'] & self.acidez['alta'],
-                self.perfil_vinho['leve']
-            ),
-            ctrl.Rule(
-                self.gordura['baixa'] & self.acidez['alta'],
-                self.perfil_vinho['leve']
-            ),
-            ctrl.Rule(
-                self.acidez['alta'] & self.especiarias['baixo'],
-                self.perfil_vinho['leve']
-            ),
-            
-            # Regras para vinhos médios
-            ctrl.Rule(
-                self.intensidade_sabor['medio'] & self.gordura['media'],
-                self.perfil_vinho['medio']
-            ),
-            ctrl.Rule(
-                self.intensidade_sabor['medio'] & self.especiarias['medio'],
-                self.perfil_vinho['medio']
-            ),
-            ctrl.Rule(
-                self.acidez['media'] & self.gordura['media'],
-                self.perfil_vinho['medio']
-            ),
-            ctrl.Rule(
-                self.intensidade_sabor['medio'] & self.acidez['media'],
-                self.perfil_vinho['medio']
-            ),
-            
-            # Regras para vinhos encorpados
-            ctrl.Rule(
-                self.intensidade_sabor['alto'] & self.gordura['alta'],
-                self.perfil_vinho['encorpado']
-            ),
-            ctrl.Rule(
-                self.intensidade_sabor['alto'] & self.especiarias['alto'],
-                self.perfil_vinho['encorpado']
-            ),
-            ctrl.Rule(
-                self.gordura['alta'] & self.especiarias['alto'],
-                self.perfil_vinho['encorpado']
-            ),
-            ctrl.Rule(
-                self.acidez['baixa'] & self.intensidade_sabor['alto'],
-                self.perfil_vinho['encorpado']
-            ),
-            
-            # Regras especiais para pratos doces
-            ctrl.Rule(
-                self.dulcor['alto'] & self.acidez['baixa'],
-                self.perfil_vinho['encorpado']
-            ),
-            ctrl.Rule(
-                self.dulcor['alto'] & self.intensidade_sabor['alto'],
-                self.perfil_vinho['encorpado']
-            ),
-            ctrl.Rule(
-                self.dulcor['medio'] & self.acidez['alta'],
-                self.perfil_vinho['medio']
-            ),
-        ]
+        return list(DEFAULT_RULES)
     
+    @traced('compute_wine_profile')
     def compute_wine_profile(self, params: Dict[str, float]) -> Dict[str, any]:
         """
-        Calcula o perfil de vinho baseado nos parâmetros do prato.
+        Calcula o perfil de vinho baseado nos parâmetros do prato (DishProfile ou dict).
         Retorna um dict com o valor numérico e a categoria (leve/medio/encorpado).
+        Seguro para chamadas concorrentes: o avaliador compilado não tem estado e o
+        caminho scikit-fuzzy usa um simulador por thread.
         """
-        logger.info("Calculando perfil fuzzy do vinho")
+        logger.log(REQUEST_LOG_LEVEL, "Calculando perfil fuzzy do vinho")
         
-        # Definir apenas os inputs que são realmente necessários
-        for input_name in self.required_inputs:
-            self.simulator.input[input_name] = params.get(input_name, 5.0)
+        # Pré-verificação barata: se nenhuma regra dispara não há o que defuzzificar
+        evaluator = self.evaluator  # a base de regras pode ser trocada por add_dishes
+        values = evaluator.input_vector(params)
+        term_activation = evaluator.activations(values)
         
-        try:
-            self.simulator.compute()
-            perfil_valor = self.simulator.output['perfil_vinho']
-        except Exception as e:
-            logger.warning(f"Erro no cálculo fuzzy: {e}. Usando método alternativo.")
-            # Fallback: cálculo simples baseado em intensidade e gordura
-            intensidade = params.get('intensidade_sabor', 5.0)
-            gordura = params.get('gordura', 5.0)
-            dulcor = params.get('dulcor', 5.0)
-            
-            if dulcor > 7:
-                perfil_valor = 8.0  # Sobremesas -> encorpado/doce
-            elif intensidade > 7 and gordura > 6:
-                perfil_valor = 8.0  # encorpado
-            elif intensidade < 5 and gordura < 5:
-                perfil_valor = 3.0  # leve
-            else:
-                perfil_valor = 5.0  # medio
-        
-        # Categorização
-        if perfil_valor < 4:
-            categoria = 'leve'
-        elif perfil_valor < 7:
-            categoria = 'medio'
+        if term_activation.max() <= 0.0:
+            perfil_valor = None
+        elif self.use_compiled:
+            perfil_valor = evaluator.defuzzify(term_activation)
         else:
-            categoria = 'encorpado'
+            simulator = self.simulator
+            
+            # Definir apenas os inputs que são realmente necessários
+            for input_name in self.required_inputs:
+                simulator.input[input_name] = params.get(input_name, 5.0)
+            
+            simulator.compute()
+            perfil_valor = float(simulator.output['perfil_vinho'])
         
-        logger.info(f"Perfil calculado: {categoria} ({perfil_valor:.2f})")
+        with self._counters_lock:
+            self.inference_counters['chamadas'] += 1
+            if perfil_valor is None:
+                self.inference_counters['fallbacks'] += 1
+        
+        if perfil_valor is None:
+            logger.warning("Nenhuma regra fuzzy ativada para o prato. Usando método alternativo.")
+            perfil_valor = self._fallback_profile_value(params)
+        
+        categoria = self._categorize(perfil_valor)
+        
+        logger.log(REQUEST_LOG_LEVEL, "Perfil calculado: %s (%.2f)", categoria, perfil_valor)
         
         return {
             'valor': perfil_valor,
             'categoria': categoria
         }
     
+    @traced('compute_wine_profiles')
+    def compute_wine_profiles(self, profiles) -> List[Dict[str, any]]:
+        """
+        Perfis de vinho de vários pratos de uma vez, a partir de DishProfiles, dicts
+        ou da matriz (N x 10) de `DishProfile.stack`. No modo compilado a inferência
+        é feita em lote sobre a matriz.
+        """
+        matrix = profiles if isinstance(profiles, np.ndarray) else DishProfile.stack(profiles)
+        evaluator = self.evaluator
+        if not self.use_compiled or evaluator._profile_index is None:
+            return [self.compute_wine_profile(profile) for profile in DishProfile.from_matrix(matrix)]
+        if len(matrix) == 0:
+            return []
+        
+        values = evaluator.compute_batch(evaluator.input_matrix(matrix))
+        results = []
+        fallbacks = 0
+        for row, perfil_valor in zip(matrix, values.tolist()):
+            if np.isnan(perfil_valor):
+                fallbacks += 1
+                perfil_valor = self._fallback_profile_value(DishProfile(row))
+            results.append({'valor': perfil_valor, 'categoria': self._categorize(perfil_valor)})
+        
+        with self._counters_lock:
+            self.inference_counters['chamadas'] += len(results)
+            self.inference_counters['fallbacks'] += fallbacks
+        return results
+    
+    @staticmethod
+    def _categorize(perfil_valor: float) -> str:
+        if perfil_valor < 4:
+            return 'leve'
+        elif perfil_valor < 7:
+            return 'medio'
+        return 'encorpado'
+    
+    @staticmethod
+    def _fallback_profile_value(params: Dict[str, float]) -> float:
+        """Cálculo simples baseado em intensidade e gordura, usado quando nenhuma regra dispara"""
+        intensidade = params.get('intensidade_sabor', 5.0)
+        gordura = params.get('gordura', 5.0)
+        dulcor = params.get('dulcor', 5.0)
+        
+        if dulcor > 7:
+            return 8.0  # Sobremesas -> encorpado/doce
+        elif intensidade > 7 and gordura > 6:
+            return 8.0  # encorpado
+        elif intensidade < 5 and gordura < 5:
+            return 3.0  # leve
+        else:
+            return 5.0  # medio
+    
+    def get_inference_counters(self) -> Dict:
+        """Retorna contadores de inferência e a taxa de uso do método alternativo"""
+        with self._counters_lock:
+            counters = dict(self.inference_counters)
+        counters['taxa_fallback'] = counters['fallbacks'] / counters['chamadas'] if counters['chamadas'] else 0.0
+        return counters
+    
+    def analyze_coverage(self, step: float = 1.0, max_points: int = 2_000_000) -> CoverageReport:
+        """Varre o espaço de entradas e relata as regiões em que nenhuma regra dispara"""
+        return CoverageAnalyzer(self.evaluator).analyze(step=step, max_points=max_points)
+    
     def get_rules_text(self) -> List[str]:
         """Retorna lista de regras em formato legível"""
-        if self.tree_builder and self.learned_rules:
-            return self.tree_builder.get_rules_text()
-        else:
-            # Regras padrão em texto
-            return [
-                "1. SE intensidade_sabor é baixo E gordura é baixa ENTÃO perfil=leve",
-                "2. SE intensidade_sabor é baixo E acidez é alta ENTÃO perfil=leve",
-                "3. SE gordura é baixa E acidez é alta ENTÃO perfil=leve",
-                "4. SE acidez é alta E especiarias é baixo ENTÃO perfil=leve",
-                "5. SE intensidade_sabor é medio E gordura é media ENTÃO perfil=medio",
-                "6. SE intensidade_sabor é medio E especiarias é medio ENTÃO perfil=medio",
-                "7. SE acidez é media E gordura é media ENTÃO perfil=medio",
-                "8. SE intensidade_sabor é medio E acidez é media ENTÃO perfil=medio",
-                "9. SE intensidade_sabor é alto E gordura é alta ENTÃO perfil=encorpado",
-                "10. SE intensidade_sabor é alto E especiarias é alto ENTÃO perfil=encorpado",
-                "11. SE gordura é alta E especiarias é alto ENTÃO perfil=encorpado",
-                "12. SE acidez é baixa E intensidade_sabor é alto ENTÃO perfil=encorpado",
-                "13. SE dulcor é alto E acidez é baixa ENTÃO perfil=encorpado",
-                "14. SE dulcor é alto E intensidade_sabor é alto ENTÃO perfil=encorpado",
-                "15. SE dulcor é medio E acidez é alta ENTÃO perfil=medio"
-            ]
+        learned = [spec for spec in self.rule_specs if spec.is_learned]
+        
+        if learned:
+            # Ordenar por confiança e suporte
+            learned.sort(key=lambda r: (r.confidence, r.support), reverse=True)
+            return [f"{i+1}. {spec.to_text()} - Confiança: {spec.confidence:.2f}, Suporte: {spec.support} pratos"
+                    for i, spec in enumerate(learned)]
+        
+        return [f"{i+1}. {spec.to_text()}" for i, spec in enumerate(self.rule_specs)]
     
     def get_tree_visualization(self) -> str:
         """Retorna visualização da árvore de decisão"""
@@ -325,6 +487,6 @@ class FuzzyEngine:
             return self.tree_builder.get_statistics()
         else:
             return {
-                'total_regras': len(self.rules),
+                'total_regras': len(self.rule_specs),
                 'tipo': 'regras_padrao'
             }
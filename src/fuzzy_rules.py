@@ -0,0 +1,93 @@
+"""
+Representação estruturada das regras fuzzy, independente do scikit-fuzzy.
+
+Regras padrão, regras aprendidas, texto exibido no CLI, entradas necessárias e o
+avaliador compilado derivam todos desta mesma forma.
+"""
+from typing import Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+TermSpec = Union[str, Sequence[str]]
+
+
+class RuleSpec:
+    """
+    Regra fuzzy no formato SE var1 é termo E var2 é termo ... ENTÃO perfil=consequente.
+
+    Cada antecedente é um par (variável, termos); quando há mais de um termo para a
+    mesma variável eles são combinados com OU (ex.: gordura é baixa ou media).
+    """
+    __slots__ = ('antecedents', 'consequent', 'confidence', 'support')
+
+    def __init__(self, antecedents: Iterable[Tuple[str, TermSpec]], consequent: str,
+                 confidence: Optional[float] = None, support: Optional[int] = None):
+        normalized = []
+        for var, terms in antecedents:
+            if isinstance(terms, str):
+                terms = (terms,)
+            normalized.append((var, tuple(terms)))
+
+        self.antecedents: Tuple[Tuple[str, Tuple[str, ...]], ...] = tuple(normalized)
+        self.consequent = consequent
+        self.confidence = confidence  # Apenas regras aprendidas possuem confiança
+        self.support = support        # e suporte (número de pratos)
+
+    @property
+    def variables(self) -> Tuple[str, ...]:
+        """Variáveis de entrada usadas pela regra"""
+        return tuple(var for var, _ in self.antecedents)
+
+    @property
+    def is_learned(self) -> bool:
+        return self.confidence is not None
+
+    @property
+    def key(self) -> Tuple[frozenset, str]:
+        """Identidade lógica da regra (ordem dos antecedentes e dos termos é irrelevante)"""
+        return frozenset((var, frozenset(terms)) for var, terms in self.antecedents), self.consequent
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RuleSpec) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        cond_str = " AND ".join(f"{var}={'|'.join(terms)}" for var, terms in self.antecedents)
+        return f"RuleSpec(IF {cond_str} THEN {self.consequent})"
+
+    def to_text(self) -> str:
+        """Retorna representação textual da regra"""
+        cond_str = " E ".join(f"{var} é {' ou '.join(terms)}" for var, terms in self.antecedents)
+        return f"SE {cond_str} ENTÃO perfil={self.consequent}"
+
+
+# Regras fuzzy padrão (manuais)
+DEFAULT_RULES: List[RuleSpec] = [
+    # Regras para vinhos leves
+    RuleSpec([('intensidade_sabor', 'baixo'), ('gordura', 'baixa')], 'leve'),
+    RuleSpec([('intensidade_sabor', 'baixo'), ('acidez', 'alta')], 'leve'),
+    RuleSpec([('gordura', 'baixa'), ('acidez', 'alta')], 'leve'),
+    RuleSpec([('acidez', 'alta'), ('especiarias', 'baixo')], 'leve'),
+
+    # Regras para vinhos médios
+    RuleSpec([('intensidade_sabor', 'medio'), ('gordura', 'media')], 'medio'),
+    RuleSpec([('intensidade_sabor', 'medio'), ('especiarias', 'medio')], 'medio'),
+    RuleSpec([('acidez', 'media'), ('gordura', 'media')], 'medio'),
+    RuleSpec([('intensidade_sabor', 'medio'), ('acidez', 'media')], 'medio'),
+
+    # Regras para vinhos encorpados
+    RuleSpec([('intensidade_sabor', 'alto'), ('gordura', 'alta')], 'encorpado'),
+    RuleSpec([('intensidade_sabor', 'alto'), ('especiarias', 'alto')], 'encorpado'),
+    RuleSpec([('gordura', 'alta'), ('especiarias', 'alto')], 'encorpado'),
+    RuleSpec([('acidez', 'baixa'), ('intensidade_sabor', 'alto')], 'encorpado'),
+
+    # Regras especiais para pratos doces
+    RuleSpec([('dulcor', 'alto'), ('acidez', 'baixa')], 'encorpado'),
+    RuleSpec([('dulcor', 'alto'), ('intensidade_sabor', 'alto')], 'encorpado'),
+    RuleSpec([('dulcor', 'medio'), ('acidez', 'alta')], 'medio'),
+]
+
+
+def required_inputs(rules: Iterable[RuleSpec]) -> Set[str]:
+    """Conjunto de variáveis de entrada referenciadas por alguma regra"""
+    return {var for rule in rules for var in rule.variables}
@@ -2,16 +2,20 @@
 Módulo para construir árvore de decisão fuzzy e regras baseadas nos pratos conhecidos
 """
 import numpy as np
-import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Tuple, Set
+from typing import Dict, Iterable, Iterator, List, Tuple, Set, Union
 from collections import defaultdict
-import skfuzzy as fuzz
 
 try:
     from .logger import setup_logger
+    from .catalog_snapshot import load_catalog
+    from .lazy_imports import lazy_import
 except ImportError:
     from logger import setup_logger
+    from catalog_snapshot import load_catalog
+    from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
 
 logger = setup_logger(__name__)
 
@@ -27,6 +31,8 @@ class FuzzyTreeNode:
         self.right = None  # valores > threshold
         self.is_leaf = category is not None
         self.confidence = 0.0
+        self.built_support = len(self.samples)  # Amostras quando o nó foi construído
+        self.rule = None  # Regra gerada por esta folha (ver extract_rules_from_tree)
         
     def __repr__(self, level=0):
         ret = "  " * level
@@ -70,6 +76,7 @@ class FuzzyTreeBuilder:
         self.rules = []
         self.dishes_df = None
         self.feature_importance = {}
+        self.max_depth = 5
         
         # Atributos considerados para análise
         self.attributes = [
@@ -90,7 +97,7 @@ class FuzzyTreeBuilder:
         """Carrega pratos do CSV"""
         logger.info(f"Carregando pratos de {csv_path}")
         try:
-            self.dishes_df = pd.read_csv(csv_path, encoding='utf-8')
+            self.dishes_df = load_catalog(csv_path)
             logger.info(f"{len(self.dishes_df)} pratos carregados")
             
             # Mapear harmonizações para categorias
@@ -220,15 +227,8 @@ class FuzzyTreeBuilder:
             self.rules = []
         
         if node.is_leaf:
-            # Fuzzificar condições
-            fuzzy_conditions = {}
-            for attr, threshold in conditions.items():
-                fuzzy_val = self._fuzzify_value(attr, threshold)
-                fuzzy_conditions[attr] = (fuzzy_val, threshold)
-            
-            rule = FuzzyRule(fuzzy_conditions, node.category, node.confidence)
-            rule.support = len(node.samples)
-            self.rules.append(rule)
+            node.rule = self._make_rule(node, conditions)
+            self.rules.append(node.rule)
         else:
             # Explorar ramo esquerdo (<=)
             if node.left:
@@ -244,6 +244,32 @@ class FuzzyTreeBuilder:
         
         return self.rules
     
+    def _make_rule(self, leaf: FuzzyTreeNode, conditions: Dict[str, float]) -> FuzzyRule:
+        """Gera a regra de uma folha a partir das condições do caminho até ela"""
+        # Fuzzificar condições
+        fuzzy_conditions = {}
+        for attr, threshold in conditions.items():
+            fuzzy_val = self._fuzzify_value(attr, threshold)
+            fuzzy_conditions[attr] = (fuzzy_val, threshold)
+        
+        rule = FuzzyRule(fuzzy_conditions, leaf.category, leaf.confidence)
+        rule.support = len(leaf.samples)
+        return rule
+    
+    def _leaves(self, node: FuzzyTreeNode = None, conditions: Dict = None) -> Iterator[Tuple[FuzzyTreeNode, Dict]]:
+        """Percorre as folhas na mesma ordem de extract_rules_from_tree, com as condições do caminho"""
+        if node is None:
+            node, conditions = self.tree, {}
+        
+        if node.is_leaf:
+            yield node, conditions
+            return
+        
+        if node.left:
+            yield from self._leaves(node.left, {**conditions, node.attribute: node.threshold})
+        if node.right:
+            yield from self._leaves(node.right, {**conditions, node.attribute: node.threshold + 0.1})
+    
     def _fuzzify_value(self, attribute: str, value: float) -> str:
         """Converte valor numérico em termo fuzzy (baixo/medio/alto)"""
         # Tratamento especial para acidez que usa "baixa/media/alta"
@@ -287,6 +313,7 @@ class FuzzyTreeBuilder:
         
         # Construir árvore
         logger.info(f"Construindo árvore (max_depth={max_depth})")
+        self.max_depth = max_depth
         self.tree = self.build_tree(max_depth=max_depth)
         
         # Extrair regras
@@ -300,6 +327,92 @@ class FuzzyTreeBuilder:
         
         return self.tree, self.rules
     
+    def add_dishes(self, dishes: Union['pd.DataFrame', Iterable[Dict]],
+                   impurity_threshold: float = 0.3, support_growth: float = 0.5) -> Dict:
+        """
+        Atualiza a árvore e as regras com pratos novos sem treinar do zero.
+
+        Cada prato desce pela árvore existente e é acrescentado às amostras dos nós do
+        caminho. Uma folha atingida só é redividida (build_tree a partir dela, até
+        `max_depth`) se a impureza de Gini passou de `impurity_threshold` com os pratos
+        novos ou se o suporte cresceu `support_growth` (fração) desde que ela foi
+        construída; as demais apenas recalculam categoria e confiança. Só as folhas
+        atingidas geram regras novas.
+        
+        Retorna um relatório com o que foi atualizado.
+        """
+        new_df = dishes.copy() if isinstance(dishes, pd.DataFrame) else pd.DataFrame(list(dishes))
+        report = {
+            'novos_pratos': len(new_df),
+            'folhas_afetadas': 0,
+            'folhas_redivididas': 0,
+            'regras_regeneradas': 0,
+            'treino_completo': False,
+        }
+        if new_df.empty:
+            return report
+        
+        new_df['categoria_vinho'] = new_df['harmonizacao_sugerida'].apply(self._map_harmonization_to_category)
+        if self.dishes_df is None or len(self.dishes_df) == 0:
+            self.dishes_df = new_df.reset_index(drop=True)
+        else:
+            start = int(self.dishes_df.index.max()) + 1
+            new_df.index = pd.RangeIndex(start, start + len(new_df))
+            self.dishes_df = pd.concat([self.dishes_df, new_df])
+        
+        if self.tree is None:
+            logger.info("Árvore ainda não construída; treinando do zero")
+            self.train(self.max_depth)
+            report['treino_completo'] = True
+            report['regras_regeneradas'] = len(self.rules)
+            return report
+        
+        # Descer cada prato novo até a sua folha, atualizando as amostras do caminho
+        affected = {}  # id(folha) -> (folha, pai, lado, profundidade, amostras antes da atualização)
+        for idx, row in new_df.iterrows():
+            node, parent, side, depth = self.tree, None, None, 0
+            while not node.is_leaf:
+                node.samples.append(idx)
+                parent, side = node, 'left' if row[node.attribute] <= node.threshold else 'right'
+                node, depth = getattr(node, side), depth + 1
+            affected.setdefault(id(node), (node, parent, side, depth, len(node.samples)))
+            node.samples.append(idx)
+        
+        changed = set()
+        for leaf, parent, side, depth, n_before in affected.values():
+            gini = self.calculate_gini_impurity(leaf.samples)
+            crossed = gini > impurity_threshold >= self.calculate_gini_impurity(leaf.samples[:n_before])
+            grown = len(leaf.samples) >= leaf.built_support * (1 + support_growth)
+            
+            if depth < self.max_depth and gini > 0 and (crossed or grown):
+                subtree = self.build_tree(leaf.samples, depth, self.max_depth)
+                if parent is None:
+                    self.tree = subtree
+                else:
+                    setattr(parent, side, subtree)
+                if not subtree.is_leaf:
+                    report['folhas_redivididas'] += 1
+                changed.update(id(node) for node, _ in self._leaves(subtree, {}))
+            else:
+                categories = self.dishes_df.loc[leaf.samples, 'categoria_vinho']
+                leaf.category = categories.mode()[0]
+                leaf.confidence = (categories == leaf.category).sum() / len(categories)
+                changed.add(id(leaf))
+        
+        # Regenerar só as regras das folhas alteradas; as demais são reaproveitadas
+        rules = []
+        for leaf, conditions in self._leaves():
+            if leaf.rule is None or id(leaf) in changed:
+                leaf.rule = self._make_rule(leaf, conditions)
+                report['regras_regeneradas'] += 1
+            rules.append(leaf.rule)
+        self.rules = self._remove_redundant_rules(rules)
+        
+        report['folhas_afetadas'] = len(affected)
+        logger.info(f"{len(new_df)} pratos adicionados: {report['folhas_afetadas']} folhas afetadas, "
+                    f"{report['folhas_redivididas']} redivididas, {report['regras_regeneradas']} regras regeneradas")
+        return report
+    
     def _remove_redundant_rules(self, rules: List[FuzzyRule]) -> List[FuzzyRule]:
         """Remove regras redundantes mantendo as de maior confiança"""
         unique_rules = {}
@@ -0,0 +1,112 @@
+"""
+Índice das harmonizações do catálogo de vinhos.
+
+A coluna `harmonizacoes` guarda texto livre separado por ';' ("carne
+vermelha;cordeiro;queijos duros"). O índice lê cada valor distinto da coluna uma
+única vez e monta:
+
+- o vocabulário de tags (normalizadas: minúsculas, sem acentos, espaços simples);
+- um índice invertido tag -> vinhos, em formato CSR (offsets + ids ordenados);
+- um dict das tags por chave de palavras (plural/singular tolerado: "queijo duro"
+  casa com "queijos duros"), consultado com as sequências de palavras da descrição
+  de um prato ("cordeiro assado" encontra "cordeiro" e "cordeiro assado").
+
+Por requisição não há varredura das strings do catálogo: a descrição vira algumas
+consultas ao dict e as tags encontradas viram conjuntos de ids (listas invertidas
+e a sua união).
+"""
+import re
+import unicodedata
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def normalize_tag(text: str) -> str:
+    """Minúsculas, sem acentos e com espaços simples"""
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.split())
+
+
+def _words(text: str) -> Tuple[str, ...]:
+    # Palavras normalizadas, sem o plural simples (s final), para casar singular e plural
+    return tuple(w[:-1] if w.endswith('s') and len(w) > 3 else w
+                 for w in re.findall(r'\w+', normalize_tag(text)))
+
+
+class TagIndex:
+    """Vocabulário e índice invertido das tags de harmonização de um catálogo"""
+
+    def __init__(self, codes: np.ndarray, values: Sequence[str], separator: str = ';'):
+        """
+        `codes` é o código por vinho da coluna `harmonizacoes` (-1 = ausente) e `values`
+        o texto de cada código (ver `WineCatalog.codes`)
+        """
+        codes = np.asarray(codes)
+        self.n_wines = len(codes)
+
+        # Tags de cada valor distinto da coluna (cada texto é lido uma vez)
+        tag_ids: Dict[str, int] = {}
+        value_tags: List[List[int]] = []
+        for value in values:
+            ids = []
+            for part in str(value).split(separator):
+                tag = normalize_tag(part)
+                if tag and tag not in ('nan', 'none'):
+                    ids.append(tag_ids.setdefault(tag, len(tag_ids)))
+            value_tags.append(sorted(set(ids)))
+        self.vocabulary: List[str] = list(tag_ids)
+        self.tag_ids = tag_ids
+
+        # Vinhos agrupados por código da coluna: cada grupo herda as tags do seu valor
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(value_tags) + 1))
+        postings: List[List[np.ndarray]] = [[] for _ in tag_ids]
+        for code, ids in enumerate(value_tags):
+            wines = order[bounds[code]:bounds[code + 1]]
+            if len(wines):
+                for tag in ids:
+                    postings[tag].append(wines)
+
+        lists = [np.sort(np.concatenate(p)).astype(np.int32) if p else np.empty(0, dtype=np.int32)
+                 for p in postings]
+        self.offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        self.offsets[1:] = np.cumsum([len(p) for p in lists])
+        self.wine_ids = np.concatenate(lists) if lists else np.empty(0, dtype=np.int32)
+
+        # Chave de palavras -> tags ("queijos duros" e "queijo duro" têm a mesma chave;
+        # tags do catálogo que só diferem no plural ficam todas sob ela)
+        self._keys: Dict[Tuple[str, ...], List[int]] = {}
+        for tag, i in tag_ids.items():
+            key = _words(tag)
+            if key:
+                self._keys.setdefault(key, []).append(i)
+        self._max_words = max((len(k) for k in self._keys), default=0)
+
+    def __len__(self) -> int:
+        return len(self.vocabulary)
+
+    def match(self, description: str) -> List[int]:
+        """Ids das tags citadas na descrição (sem repetição, na ordem em que aparecem)"""
+        if not self._keys or not description:
+            return []
+        words = _words(description)
+        found = []
+        for start in range(len(words)):
+            for end in range(start + 1, min(start + self._max_words, len(words)) + 1):
+                for tag in self._keys.get(words[start:end], ()):
+                    if tag not in found:
+                        found.append(tag)
+        return found
+
+    def wines(self, tags: Sequence[int]) -> np.ndarray:
+        """Ids (ordenados) dos vinhos com pelo menos uma das tags (união)"""
+        if not tags:
+            return np.empty(0, dtype=np.int32)
+        if len(tags) == 1:
+            return self.wine_ids[self.offsets[tags[0]]:self.offsets[tags[0] + 1]]
+        return np.unique(np.concatenate([self.wine_ids[self.offsets[t]:self.offsets[t + 1]] for t in tags]))
+
+    def stats(self) -> Dict:
+        return {'tags': len(self.vocabulary), 'ocorrencias': int(len(self.wine_ids))}
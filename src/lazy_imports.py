@@ -0,0 +1,45 @@
+"""
+Importação preguiçosa de dependências pesadas (pandas, scikit-fuzzy, Gemini SDK):
+o módulo real só é carregado no primeiro acesso a um atributo
+"""
+import importlib
+import sys
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Proxy de módulo que executa o import na primeira vez em que é usado"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'carregado' if self.__dict__['_lazy_module'] is not None else 'não carregado'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Retorna o módulo já importado ou um proxy que o importa no primeiro uso"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -0,0 +1,374 @@
+"""
+Backends de LLM usados na análise dos pratos e nas justificativas.
+
+- GeminiBackend: Google Gemini (ou qualquer modelo com `generate_content(prompt)`,
+  como o LLM falso dos benchmarks)
+- LocalBackend: determinístico e offline; deriva os parâmetros da base de pratos
+  ou de palavras-chave da descrição e pode simular latência e falhas
+
+O backend padrão vem de `config.LLM_BACKEND` ("gemini" ou "local"). O backend
+configurado pelo ambiente é protegido por um circuit breaker (circuit_breaker) e,
+no caso do Gemini, passa pelo orçamento de RPM/TPM de llm_scheduler.
+"""
+import json
+import random
+import re
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from . import config
+    from .config import REQUIRED_DISH_PARAMS
+    from .logger import setup_logger
+    from .lazy_imports import lazy_import
+except ImportError:
+    import config
+    from config import REQUIRED_DISH_PARAMS
+    from logger import setup_logger
+    from lazy_imports import lazy_import
+
+# O SDK do Gemini só é importado quando um modelo real é configurado
+genai = lazy_import('google.generativeai')
+
+logger = setup_logger(__name__)
+
+root_dir = Path(__file__).parent.parent
+
+
+class LLMBackendError(RuntimeError):
+    """Falha do backend ao gerar uma resposta"""
+
+
+class LLMUnavailableError(LLMBackendError):
+    """Chamada recusada localmente, sem contatar o provedor (orçamento, circuito aberto)"""
+
+
+class LLMQuotaError(LLMBackendError):
+    """O provedor recusou a chamada por limite de cota (HTTP 429 / ResourceExhausted)"""
+
+
+class LLMResponseError(LLMBackendError):
+    """O provedor respondeu, mas sem o JSON esperado (ausente, malformado ou incompleto)"""
+
+
+def build_analysis_prompt(dish_description: str) -> str:
+    return f"""
+Analise o seguinte prato e retorne EXATAMENTE um objeto JSON válido com os 10 parâmetros abaixo.
+Use valores numéricos de 0 a 10 para cada parâmetro.
+
+Prato: {dish_description}
+
+Retorne apenas o JSON, sem texto adicional, no seguinte formato:
+{{
+    "proteina": <0-10>,
+    "gordura": <0-10>,
+    "acidez": <0-10>,
+    "dulcor": <0-10>,
+    "intensidade_sabor": <0-10>,
+    "crocancia": <0-10>,
+    "metodo_preparo": <0-10, onde 0=cru, 5=cozido, 10=grelhado/defumado>,
+    "especiarias": <0-10>,
+    "teor_umami": <0-10>,
+    "nivel_salgado": <0-10>
+}}
+"""
+
+
+def build_justification_prompt(wine, dish_params: Dict[str, float], perfil_fuzzy: Dict[str, any]) -> str:
+    return f"""
+Você é um sommelier expert. Explique de forma envolvente e didática por que o vinho {wine['nome']}
+é a escolha perfeita para um prato com as seguintes características:
+
+**Características do Prato:**
+- Intensidade de sabor: {dish_params['intensidade_sabor']}/10
+- Acidez: {dish_params['acidez']}/10
+- Gordura: {dish_params['gordura']}/10
+- Dulçor: {dish_params['dulcor']}/10
+- Especiarias: {dish_params['especiarias']}/10
+- Método de preparo: {dish_params['metodo_preparo']}/10
+- Perfil Fuzzy calculado: {perfil_fuzzy['categoria']} ({perfil_fuzzy['valor']:.1f}/10)
+
+**Vinho Selecionado:**
+- Nome: {wine['nome']}
+- Uva: {wine['uva']}
+- Tipo: {wine['tipo']}
+- País/Região: {wine['país']}, {wine['região']}
+- Acidez: {wine['acidez']}/10
+- Corpo: {wine['corpo']}/10
+- Doçura: {wine['doçura']}/10
+- Intensidade: {wine['intensidade_sabor']}/10
+
+Sua resposta deve ter EXATAMENTE 3 parágrafos curtos (2-3 frases cada):
+
+1. **Harmonização Técnica**: Explique cientificamente por que os atributos do vinho (acidez, corpo, taninos)
+   complementam o prato, citando valores específicos.
+
+2. **Experiência Sensorial**: Descreva como a combinação funcionará no paladar,
+   quais sabores serão realçados ou equilibrados.
+
+3. **Fato Interessante**: Compartilhe uma curiosidade fascinante sobre o vinho, sua uva, região
+   ou uma história/tradição relacionada à harmonização.
+
+Seja conciso, técnico mas acessível. Use linguagem de sommelier profissional.
+NÃO use markdown, asteriscos ou formatação especial.
+"""
+
+
+class LLMBackend(ABC):
+    """Interface dos backends: texto bruto da análise (JSON) e da justificativa"""
+
+    name = 'base'
+
+    @abstractmethod
+    def analyze_dish(self, dish_description: str) -> str:
+        """Resposta da análise do prato: um objeto JSON com os 10 parâmetros"""
+
+    @abstractmethod
+    def justify(self, wine, dish_params: Dict[str, float], perfil_fuzzy: Dict[str, any]) -> str:
+        """Justificativa da harmonização em texto corrido (parágrafos separados por linha em branco)"""
+
+    def check_available(self) -> None:
+        """Levanta LLMUnavailableError se a próxima chamada seria recusada (sem consumir nada)"""
+
+    def stats(self) -> Dict:
+        """Estado das camadas de proteção (orçamento, circuito) em volta do provedor"""
+        return {}
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Google Gemini; `model` permite injetar qualquer objeto com `generate_content(prompt)`.
+
+    Com o SDK real, a análise é lida em streaming e a chamada termina assim que o
+    objeto JSON fecha (o resto da resposta, como a cerca de markdown, é descartado);
+    uma resposta que claramente não é JSON é abandonada sem esperar o fim.
+    """
+
+    name = 'gemini'
+
+    def __init__(self, model=None, stream: Optional[bool] = None):
+        if model is None:
+            if not config.GEMINI_API_KEY:
+                raise ValueError("GEMINI_API_KEY não encontrada no arquivo .env")
+            genai.configure(api_key=config.GEMINI_API_KEY)
+            model = genai.GenerativeModel(config.GEMINI_MODEL)
+            stream = True if stream is None else stream
+        self.model = model
+        self.stream = bool(stream)
+
+    def _request(self, prompt: str, **kwargs):
+        try:
+            return self.model.generate_content(prompt, **kwargs)
+        except Exception as e:
+            if type(e).__name__ in ('ResourceExhausted', 'TooManyRequests') or getattr(e, 'code', None) == 429:
+                raise LLMQuotaError(f"Cota da API Gemini excedida: {e}") from e
+            raise LLMBackendError(f"Falha na chamada à API Gemini: {e}") from e
+
+    def _generate(self, prompt: str) -> str:
+        response = self._request(prompt)
+        if not response or not hasattr(response, 'text'):
+            raise LLMBackendError("Resposta vazia da API Gemini")
+        return response.text
+
+    def _generate_json(self, prompt: str) -> str:
+        """Texto do primeiro valor JSON da resposta, lido em streaming"""
+        try:
+            from .llm_response import JSONStreamExtractor
+        except ImportError:
+            from llm_response import JSONStreamExtractor
+
+        extractor = JSONStreamExtractor(unpack_arrays=False)
+        received = []
+        chunks = iter(self._request(prompt, stream=True))
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            except Exception as e:
+                raise LLMBackendError(f"Falha no streaming da API Gemini: {e}") from e
+            text = getattr(chunk, 'text', '') or ''
+            received.append(text)
+            try:
+                values = extractor.feed(text)
+            except ValueError as e:
+                # A resposta bruta fica só no log
+                logger.error(f"{e}\nResposta: {''.join(received)[:200]}")
+                raise LLMResponseError(str(e)) from e
+            if values:
+                return values[0]
+        if not received:
+            raise LLMBackendError("Resposta vazia da API Gemini")
+        # Sem JSON completo: quem chama reporta o erro de parse com a resposta recebida
+        return ''.join(received)
+
+    def analyze_dish(self, dish_description: str) -> str:
+        prompt = build_analysis_prompt(dish_description)
+        return self._generate_json(prompt) if self.stream else self._generate(prompt)
+
+    def justify(self, wine, dish_params: Dict[str, float], perfil_fuzzy: Dict[str, any]) -> str:
+        return self._generate(build_justification_prompt(wine, dish_params, perfil_fuzzy))
+
+
+def _normalize(text: str) -> str:
+    """Minúsculas e sem acentos, para comparar palavras-chave"""
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+# Palavras-chave (sem acento, casadas no início de palavra) -> valores sugeridos;
+# parâmetros citados por mais de uma palavra-chave recebem a média, os não citados ficam em 5
+KEYWORD_HINTS: List[Tuple[Tuple[str, ...], Dict[str, float]]] = [
+    (('picanha', 'file', 'costela', 'carne', 'bife', 'cordeiro', 'javali', 'cabrito'),
+     {'proteina': 9, 'gordura': 7, 'intensidade_sabor': 8}),
+    (('porco', 'pernil', 'lombo', 'linguica', 'pato'), {'proteina': 8, 'gordura': 7, 'intensidade_sabor': 7}),
+    (('frango', 'galinha', 'peru'), {'proteina': 7, 'gordura': 4, 'intensidade_sabor': 5}),
+    (('peixe', 'salmao', 'bacalhau', 'atum', 'tilapia', 'robalo', 'linguado'),
+     {'proteina': 7, 'gordura': 5, 'intensidade_sabor': 5}),
+    (('camarao', 'lula', 'polvo', 'ostra', 'mexilhao', 'frutos do mar', 'lagosta'),
+     {'proteina': 7, 'gordura': 3, 'acidez': 6, 'intensidade_sabor': 5}),
+    (('massa', 'macarrao', 'lasanha', 'nhoque', 'risoto', 'arroz', 'pizza'),
+     {'proteina': 3, 'gordura': 5, 'intensidade_sabor': 5}),
+    (('salada', 'legumes', 'vegetais', 'folhas'), {'proteina': 2, 'gordura': 2, 'acidez': 6, 'intensidade_sabor': 3}),
+    (('chocolate', 'sobremesa', 'bolo', 'pudim', 'torta', 'brigadeiro', 'sorvete', 'mousse'),
+     {'dulcor': 9, 'gordura': 6, 'proteina': 2}),
+    (('mel', 'caramel', 'acucar', 'doce'), {'dulcor': 7}),
+    (('queijo', 'parmesao', 'gorgonzola', 'brie'), {'gordura': 7, 'teor_umami': 7, 'nivel_salgado': 6}),
+    (('creme', 'manteiga', 'nata', 'bechamel', 'carbonara'), {'gordura': 8}),
+    (('bacon', 'presunto', 'salame', 'defumad', 'salgad'), {'nivel_salgado': 8, 'intensidade_sabor': 7}),
+    (('cogumelo', 'shoyu', 'trufa', 'shiitake'), {'teor_umami': 8, 'intensidade_sabor': 6}),
+    (('tomate', 'molho vermelho', 'sugo'), {'acidez': 6, 'teor_umami': 6}),
+    (('limao', 'citric', 'vinagre', 'maracuja', 'ceviche'), {'acidez': 8}),
+    (('picante', 'pimenta', 'curry', 'apimentad', 'wasabi', 'gengibre'), {'especiarias': 8, 'intensidade_sabor': 7}),
+    (('grelhad', 'assad', 'churrasco', 'brasa', 'defumad'), {'metodo_preparo': 9, 'crocancia': 6}),
+    (('frit', 'empanad', 'crocante', 'tempura'), {'metodo_preparo': 7, 'crocancia': 8, 'gordura': 7}),
+    (('cozid', 'ensopad', 'guisad', 'refogad', 'moqueca', 'caldo', 'sopa'), {'metodo_preparo': 5, 'crocancia': 2}),
+    (('cru', 'tartar', 'sashimi', 'carpaccio', 'ceviche'), {'metodo_preparo': 0, 'crocancia': 2}),
+]
+
+
+class LocalBackend(LLMBackend):
+    """
+    Stand-in determinístico e offline. A análise usa, em ordem: o prato da base cujo
+    nome aparece na descrição (o mais longo), ou as palavras-chave de KEYWORD_HINTS.
+    A justificativa é montada a partir dos atributos do vinho e do prato.
+
+    `latency` (s) e `error_rate` (0 a 1) simulam o comportamento de uma API remota; as
+    falhas seguem uma sequência pseudoaleatória fixa por `seed`.
+    """
+
+    name = 'local'
+
+    def __init__(self, dish_database=None, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        if dish_database is None:
+            try:
+                from .dish_database import DishDatabase
+            except ImportError:
+                from dish_database import DishDatabase
+            dish_database = DishDatabase(str(root_dir / "data" / "pratos.csv"))
+
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        # Nomes normalizados, do mais longo para o mais curto (o mais específico vence)
+        dishes = sorted(((_normalize(d['nome']), dish_database.extract_parameters(d))
+                         for d in dish_database.get_all_dishes() if str(d['nome']).strip()),
+                        key=lambda item: len(item[0]), reverse=True)
+        self._dishes = [(re.compile(rf"\b{re.escape(name)}\b"), params) for name, params in dishes]
+        self._hints = [(re.compile(r"\b(?:" + "|".join(map(re.escape, keywords)) + ")"), values)
+                       for keywords, values in KEYWORD_HINTS]
+        logger.info(f"Backend LLM local com {len(self._dishes)} pratos de referência "
+                    f"(latência {latency * 1000:.0f} ms, falhas {error_rate:.0%})")
+
+    def _simulate_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise LLMBackendError("Falha simulada do backend local")
+
+    def estimate_parameters(self, dish_description: str) -> Dict[str, float]:
+        """Parâmetros do prato sem simular latência nem falhas"""
+        text = _normalize(dish_description)
+        for pattern, params in self._dishes:
+            if pattern.search(text):
+                return dict(params)
+
+        hints: Dict[str, List[float]] = {}
+        for pattern, values in self._hints:
+            if pattern.search(text):
+                for param, value in values.items():
+                    hints.setdefault(param, []).append(value)
+
+        return {param: float(sum(hints[param]) / len(hints[param])) if param in hints else 5.0
+                for param in REQUIRED_DISH_PARAMS}
+
+    def analyze_dish(self, dish_description: str) -> str:
+        self._simulate_call()
+        return json.dumps(self.estimate_parameters(dish_description))
+
+    def justify(self, wine, dish_params: Dict[str, float], perfil_fuzzy: Dict[str, any]) -> str:
+        self._simulate_call()
+        categoria = perfil_fuzzy['categoria']
+
+        if dish_params['gordura'] > 6:
+            tecnica = f"A acidez {wine['acidez']}/10 e o corpo {wine['corpo']}/10 limpam a gordura do prato a cada gole."
+        elif dish_params['acidez'] > 6:
+            tecnica = f"A acidez {wine['acidez']}/10 acompanha a acidez marcante do prato sem deixá-lo agressivo."
+        else:
+            tecnica = f"O corpo {wine['corpo']}/10 acompanha a estrutura de um prato de perfil {categoria}."
+
+        if dish_params['especiarias'] > 6:
+            sensorial = "No paladar, a fruta do vinho suaviza o calor das especiarias."
+        elif dish_params['dulcor'] > 6:
+            sensorial = f"A doçura {wine['doçura']}/10 equilibra o dulçor do prato, sem que um apague o outro."
+        else:
+            sensorial = f"A intensidade {wine['intensidade_sabor']}/10 realça os sabores do prato sem encobri-los."
+
+        curiosidade = f"A uva {wine['uva']} é uma das assinaturas de {wine['região']}, {wine['país']}."
+
+        return "\n\n".join([
+            f"{wine['nome']} tem perfil {categoria}, alinhado ao prato. {tecnica}",
+            sensorial,
+            curiosidade,
+        ])
+
+
+def create_backend(model=None, dish_database=None, name: Optional[str] = None) -> LLMBackend:
+    """
+    Backend configurado: um `model` injetado vira GeminiBackend(model); senão vale
+    `name` ou `config.LLM_BACKEND`. Levanta ValueError se o Gemini não tiver chave.
+
+    O backend é envolvido por um circuit breaker (com tempo máximo por chamada) e,
+    no Gemini real, pelo scheduler compartilhado do processo, de modo que análise e
+    justificativas (mesmo em instâncias diferentes) dividem a mesma cota.
+    """
+    if model is not None:
+        return GeminiBackend(model)
+
+    try:
+        from .circuit_breaker import CircuitBreakerBackend
+        from .llm_scheduler import ScheduledBackend, shared_scheduler
+    except ImportError:
+        from circuit_breaker import CircuitBreakerBackend
+        from llm_scheduler import ScheduledBackend, shared_scheduler
+
+    name = (name or config.LLM_BACKEND).lower()
+    if name == 'local':
+        return CircuitBreakerBackend(LocalBackend(dish_database, latency=config.LOCAL_LLM_LATENCY,
+                                                  error_rate=config.LOCAL_LLM_ERROR_RATE))
+    if name == 'gemini':
+        # O breaker fica dentro do scheduler: com o circuito aberto, nenhuma cota é consumida
+        backend = CircuitBreakerBackend(GeminiBackend())
+        scheduler = shared_scheduler()
+        return ScheduledBackend(backend, scheduler) if scheduler is not None else backend
+    raise ValueError(f"LLM_BACKEND desconhecido: {name} (use 'gemini' ou 'local')")
@@ -1,124 +1,84 @@
-import json
-from typing import Dict
-import google.generativeai as genai
+from typing import Optional
 from pathlib import Path
 
 try:
-    from .config import GEMINI_API_KEY, GEMINI_MODEL, REQUIRED_DISH_PARAMS
-    from .logger import setup_logger
+    from .logger import request_log_level, setup_logger
+    from .tracing import traced
     from .cache import LLMCache
+    from .llm_backends import LLMBackend, LLMBackendError, LLMResponseError, create_backend
+    from .llm_response import parse_dish_params
+    from .dish_profile import DishProfile
 except ImportError:
-    from config import GEMINI_API_KEY, GEMINI_MODEL, REQUIRED_DISH_PARAMS
-    from logger import setup_logger
+    from logger import request_log_level, setup_logger
+    from tracing import traced
     from cache import LLMCache
+    from llm_backends import LLMBackend, LLMBackendError, LLMResponseError, create_backend
+    from llm_response import parse_dish_params
+    from dish_profile import DishProfile
 
 logger = setup_logger(__name__)
+REQUEST_LOG_LEVEL = request_log_level()
 
 class LLMProcessor:
-    def __init__(self, use_cache: bool = True):
-        if not GEMINI_API_KEY:
-            logger.error("GEMINI_API_KEY não encontrada no arquivo .env")
-            raise ValueError("GEMINI_API_KEY não encontrada no arquivo .env")
-        
-        genai.configure(api_key=GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(GEMINI_MODEL)
+    def __init__(self, use_cache: bool = True, model=None, cache_file: Optional[str] = None,
+                 backend: Optional[LLMBackend] = None):
+        """
+        `backend` escolhe o LLM (ver llm_backends); sem ele, vale `config.LLM_BACKEND`.
+        `model` permite injetar qualquer objeto com `generate_content(prompt)` (ex.: um
+        modelo falso para benchmarks), usado através do GeminiBackend.
+        """
+        if backend is None:
+            try:
+                backend = create_backend(model)
+            except ValueError as e:
+                logger.error(str(e))
+                raise
+        self.backend = backend
         
         # Configurar cache
         self.use_cache = use_cache
         if use_cache:
-            cache_dir = Path(__file__).parent.parent / ".cache"
-            cache_file = cache_dir / "llm_cache.json"
+            if cache_file is None:
+                cache_file = Path(__file__).parent.parent / ".cache" / "llm_cache.json"
             self.cache = LLMCache(str(cache_file))
             logger.info("Cache LLM ativado")
         else:
             self.cache = None
         
-        logger.info(f"LLM Processor inicializado com modelo {GEMINI_MODEL}")
+        logger.info(f"LLM Processor inicializado com backend {backend.name}")
     
-    def analyze_dish(self, dish_description: str) -> Dict[str, float]:
+    @traced('analyze_dish')
+    def analyze_dish(self, dish_description: str) -> DishProfile:
         # Verificar cache
         if self.use_cache and self.cache:
             cached_result = self.cache.get(dish_description)
             if cached_result:
-                logger.info("Resultado recuperado do cache")
-                return cached_result
-        
-        logger.info(f"Analisando prato: {dish_description[:50]}...")
+                logger.log(REQUEST_LOG_LEVEL, "Resultado recuperado do cache")
+                return DishProfile.from_mapping(cached_result)
         
-        prompt = f"""
-Analise o seguinte prato e retorne EXATAMENTE um objeto JSON válido com os 10 parâmetros abaixo.
-Use valores numéricos de 0 a 10 para cada parâmetro.
-
-Prato: {dish_description}
-
-Retorne apenas o JSON, sem texto adicional, no seguinte formato:
-{{
-    "proteina": <0-10>,
-    "gordura": <0-10>,
-    "acidez": <0-10>,
-    "dulcor": <0-10>,
-    "intensidade_sabor": <0-10>,
-    "crocancia": <0-10>,
-    "metodo_preparo": <0-10, onde 0=cru, 5=cozido, 10=grelhado/defumado>,
-    "especiarias": <0-10>,
-    "teor_umami": <0-10>,
-    "nivel_salgado": <0-10>
-}}
-"""
+        logger.log(REQUEST_LOG_LEVEL, "Analisando prato: %.50s...", dish_description)
         
         try:
-            response = self.model.generate_content(prompt)
-            
-            # Validar que a resposta existe
-            if not response or not hasattr(response, 'text'):
-                logger.error("Resposta vazia da API Gemini")
-                raise ValueError("Resposta vazia da API Gemini")
-            
-            text = response.text.strip()
+            text = self.backend.analyze_dish(dish_description)
             
-            # Remove markdown code blocks se existirem
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
+            # Extrai o JSON (com ou sem cercas de markdown) e valida em uma passada
+            params = DishProfile(parse_dish_params(text))
             
-            text = text.strip()
-            
-            # Parse JSON
-            params = json.loads(text)
-            
-            # Validação usando config
-            for key in REQUIRED_DISH_PARAMS:
-                if key not in params:
-                    logger.error(f"Parâmetro {key} não encontrado na resposta da LLM")
-                    raise ValueError(f"Parâmetro {key} não encontrado na resposta da LLM")
-                
-                # Validar que o valor é numérico
-                try:
-                    value = float(params[key])
-                except (TypeError, ValueError):
-                    logger.error(f"Parâmetro {key} não é numérico: {params[key]}")
-                    raise ValueError(f"Parâmetro {key} não é numérico: {params[key]}")
-                
-                # Garantir valores entre 0 e 10
-                params[key] = max(0.0, min(10.0, value))
-            
-            # Salvar no cache
+            # Salvar no cache (o arquivo guarda a forma dict)
             if self.use_cache and self.cache:
-                self.cache.set(dish_description, params)
+                self.cache.set(dish_description, params.to_dict())
             
-            logger.info("Análise do prato concluída com sucesso")
+            logger.log(REQUEST_LOG_LEVEL, "Análise do prato concluída com sucesso")
             return params
             
-        except json.JSONDecodeError as e:
-            response_preview = text[:200] if 'text' in locals() and text else "N/A"
-            error_msg = f"Erro ao parsear JSON da LLM: {e}\nResposta: {response_preview}"
-            logger.error(error_msg)
-            raise ValueError(error_msg)
+        except LLMBackendError as e:
+            # Falha do serviço (não da entrada): propagada como está para quem chama decidir
+            logger.error(f"Falha do backend LLM ({self.backend.name}): {e}")
+            raise
         except Exception as e:
-            error_msg = f"Erro ao processar resposta da LLM: {str(e)}"
-            logger.error(error_msg)
-            raise ValueError(error_msg)
+            # Resposta fora do formato é falha do provedor, não da entrada; o texto bruto só vai para o log
+            response_preview = text[:200] if 'text' in locals() and text else "N/A"
+            logger.error(f"Resposta inválida do LLM ({self.backend.name}): {e}\nResposta: {response_preview}")
+            message = str(e) if isinstance(e, ValueError) else f"Erro ao processar resposta da LLM: {e}"
+            raise LLMResponseError(message) from e
 
@@ -0,0 +1,213 @@
+"""
+Leitura das respostas de análise do LLM.
+
+- JSONStreamExtractor: recebe o texto em pedaços (streaming) e entrega cada valor
+  JSON assim que ele fecha, ignorando cercas de markdown e texto ao redor. Em uma
+  resposta com vários pratos (lista de objetos), cada objeto é entregue sozinho,
+  antes do fim da lista. Respostas claramente malformadas (sem JSON no início,
+  colchetes trocados, objeto grande demais) são recusadas sem esperar o resto.
+- parse_dish_params: valida os parâmetros do prato em uma passada, direto para um
+  vetor float na ordem de REQUIRED_DISH_PARAMS (valores limitados a 0-10).
+"""
+import json
+import math
+import re
+from typing import Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+try:
+    from .config import REQUIRED_DISH_PARAMS
+except ImportError:
+    from config import REQUIRED_DISH_PARAMS
+
+# Texto aceito antes do JSON (ex.: "```json" ou uma frase curta do modelo)
+MAX_PREFIX_CHARS = 200
+# Tamanho máximo de um valor JSON (a análise de um prato tem ~250 caracteres)
+MAX_VALUE_CHARS = 8192
+
+_CLOSING = {'{': '}', '[': ']'}
+_OPEN = re.compile(r'[{\[]')
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_IN_STRING = re.compile(r'["\\]')
+
+
+class JSONStreamExtractor:
+    """
+    Extrai valores JSON de um texto que chega em pedaços.
+
+    Com `unpack_arrays`, uma lista de objetos na raiz é entregue objeto a objeto; uma
+    lista de outros valores (ex.: os 10 números de um prato) é entregue inteira.
+    Levanta ValueError assim que a resposta não puder mais ser um JSON válido.
+
+    Só os caracteres estruturais ({}[]" e escapes) são visitados, via regex; o resto
+    do texto é copiado em fatias.
+    """
+
+    def __init__(self, unpack_arrays: bool = True, max_prefix: int = MAX_PREFIX_CHARS,
+                 max_length: int = MAX_VALUE_CHARS):
+        self.unpack_arrays = unpack_arrays
+        self.max_prefix = max_prefix
+        self.max_length = max_length
+        self.done = False
+        self._stack: List[str] = []
+        self._root: List[str] = []     # pedaços do valor raiz
+        self._root_length = 0
+        self._element: Optional[List[str]] = None  # pedaços do objeto atual de uma lista raiz
+        self._emitted_elements = 0
+        self._in_string = False
+        self._escape = False
+        self._prefix = 0
+
+    def feed(self, chunk: str) -> List[str]:
+        """Consome um pedaço e retorna os valores JSON (texto) completados por ele"""
+        completed = []
+        pos, n = 0, len(chunk)
+        root_from = elem_from = 0
+
+        while pos < n and not self.done:
+            if not self._stack:
+                match = _OPEN.search(chunk, pos)
+                prefix = chunk[pos:match.start() if match else n]
+                self._prefix += len(prefix) - sum(c.isspace() for c in prefix)
+                if self._prefix > self.max_prefix:
+                    raise ValueError(f"Resposta da LLM sem JSON nos primeiros {self.max_prefix} caracteres")
+                if match is None:
+                    return completed
+                self._stack.append(match.group())
+                root_from, pos = match.start(), match.end()
+                continue
+
+            if self._escape:
+                self._escape = False
+                pos += 1
+                continue
+
+            match = (_IN_STRING if self._in_string else _STRUCTURAL).search(chunk, pos)
+            if match is None:
+                pos = n
+                break
+            i, char = match.start(), match.group()
+            pos = i + 1
+            if self._root_length + pos - root_from > self.max_length:
+                raise ValueError(f"JSON da LLM maior que {self.max_length} caracteres")
+
+            if char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = not self._in_string
+            elif char in _CLOSING:
+                if self.unpack_arrays and self._stack == ['['] and char == '{':
+                    self._element, elem_from = [], i
+                self._stack.append(char)
+            else:
+                opener = self._stack.pop()
+                if _CLOSING[opener] != char:
+                    raise ValueError(f"JSON malformado na resposta da LLM: '{char}' fecha '{opener}'")
+                if self._element is not None and len(self._stack) == 1:
+                    self._element.append(chunk[elem_from:pos])
+                    completed.append(''.join(self._element))
+                    self._element = None
+                    self._emitted_elements += 1
+                elif not self._stack:
+                    self.done = True
+                    if not self._emitted_elements:
+                        self._root.append(chunk[root_from:pos])
+                        completed.append(''.join(self._root))
+
+        # O valor continua no próximo pedaço
+        if self._stack and not self.done:
+            self._root.append(chunk[root_from:n])
+            self._root_length += n - root_from
+            if self._element is not None:
+                self._element.append(chunk[elem_from:n])
+            if self._root_length > self.max_length:
+                raise ValueError(f"JSON da LLM maior que {self.max_length} caracteres")
+        return completed
+
+    def close(self) -> None:
+        """Fim do texto: levanta ValueError se nenhum valor JSON foi completado"""
+        if not self.done:
+            raise ValueError("Resposta da LLM terminou antes de completar o JSON")
+
+
+_decoder = json.JSONDecoder()
+
+
+def extract_json(text: str):
+    """
+    Primeiro valor JSON (já decodificado) de um texto completo. O caminho comum usa o
+    decodificador nativo a partir do primeiro { ou [; o extrator só entra para
+    diagnosticar respostas inválidas.
+    """
+    match = _OPEN.search(text)
+    if match is not None and len(''.join(text[:match.start()].split())) <= MAX_PREFIX_CHARS:
+        try:
+            return _decoder.raw_decode(text, match.start())[0]
+        except json.JSONDecodeError:
+            pass
+
+    extractor = JSONStreamExtractor(unpack_arrays=False)
+    values = extractor.feed(text)
+    extractor.close()
+    try:
+        return json.loads(values[0])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Erro ao parsear JSON da LLM: {e}")
+
+
+def _number(key: str, value) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Parâmetro {key} não é numérico: {value}")
+    if not math.isfinite(number):
+        raise ValueError(f"Parâmetro {key} não é numérico: {value}")
+    return number
+
+
+def parse_dish_params(data: Union[str, dict, list]) -> np.ndarray:
+    """
+    Vetor (len(REQUIRED_DISH_PARAMS),) com os parâmetros limitados a 0-10, a partir
+    do texto da resposta, de um objeto {parâmetro: valor} ou de uma lista de valores
+    já na ordem de REQUIRED_DISH_PARAMS. Levanta ValueError com o parâmetro faltante
+    ou inválido.
+    """
+    if isinstance(data, str):
+        data = extract_json(data)
+
+    if isinstance(data, dict):
+        missing = next((key for key in REQUIRED_DISH_PARAMS if key not in data), None)
+        if missing is not None:
+            raise ValueError(f"Parâmetro {missing} não encontrado na resposta da LLM")
+        values = [_number(key, data[key]) for key in REQUIRED_DISH_PARAMS]
+    elif isinstance(data, list):
+        if len(data) != len(REQUIRED_DISH_PARAMS):
+            raise ValueError(f"Lista com {len(data)} valores; esperados {len(REQUIRED_DISH_PARAMS)}")
+        values = [_number(key, value) for key, value in zip(REQUIRED_DISH_PARAMS, data)]
+    else:
+        raise ValueError(f"Resposta da LLM não é um objeto JSON: {type(data).__name__}")
+
+    return np.clip(np.array(values, dtype=np.float64), 0.0, 10.0)
+
+
+def iter_dish_params(chunks: Iterable[str]) -> Iterator[np.ndarray]:
+    """
+    Vetores de parâmetros de uma resposta em streaming, um por prato, entregues assim
+    que cada objeto fecha (uma lista de pratos não precisa chegar inteira)
+    """
+    extractor = JSONStreamExtractor()
+    for chunk in chunks:
+        for text in extractor.feed(chunk):
+            try:
+                yield parse_dish_params(json.loads(text))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Erro ao parsear JSON da LLM: {e}")
+        if extractor.done:
+            return
+    extractor.close()
+
+
+def params_dict(values: np.ndarray) -> dict:
+    """Vetor na ordem de REQUIRED_DISH_PARAMS -> dict {parâmetro: valor}"""
+    return dict(zip(REQUIRED_DISH_PARAMS, values.tolist()))
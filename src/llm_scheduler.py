@@ -0,0 +1,276 @@
+"""
+Orçamento de chamadas ao LLM: token buckets de requisições por minuto (RPM) e de
+tokens estimados por minuto (TPM), compartilhados por todos os componentes que
+usam o mesmo provedor.
+
+As chamadas entram em uma fila por prioridade (análise do prato antes de
+justificativa) e cada uma tem um prazo: se o orçamento não libera a chamada a
+tempo, ela é descartada com LLMBudgetExceeded em vez de estourar a cota do
+provedor. As justificativas, que têm fallback local, só consomem o orçamento
+enquanto sobra uma reserva para as análises.
+
+O relógio e a espera são injetáveis, então o comportamento pode ser simulado sem
+dormir (ver benchmarks/simulate_llm_scheduler.py).
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    from . import config
+    from .logger import setup_logger
+    from .llm_backends import (LLMBackend, LLMQuotaError, LLMUnavailableError,
+                               build_analysis_prompt, build_justification_prompt)
+except ImportError:
+    import config
+    from logger import setup_logger
+    from llm_backends import (LLMBackend, LLMQuotaError, LLMUnavailableError,
+                              build_analysis_prompt, build_justification_prompt)
+
+logger = setup_logger(__name__)
+
+# Prioridades (menor = atendida primeiro)
+PRIORITY_ANALYSIS = 0
+PRIORITY_JUSTIFICATION = 1
+
+# Tokens de saída esperados por tipo de chamada (somados à estimativa do prompt)
+ANALYSIS_OUTPUT_TOKENS = 150
+JUSTIFICATION_OUTPUT_TOKENS = 400
+
+
+class LLMBudgetExceeded(LLMUnavailableError):
+    """Chamada descartada: o orçamento de RPM/TPM não a liberaria dentro do prazo"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa grosseira (~4 caracteres por token), suficiente para o orçamento"""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Balde de `capacity` unidades reabastecido a `rate_per_minute` unidades por minuto"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None, now: float = 0.0):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self.level = self.capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        if now > self.updated:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Segundos até haver `amount` no balde (inf se nunca couber)"""
+        self.refill(now)
+        if amount > self.capacity:
+            return float('inf')
+        missing = amount - self.level
+        # Tolerância para arredondamento de ponto flutuante no reabastecimento
+        return 0.0 if missing <= 1e-9 else missing / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+
+class Ticket:
+    """Uma chamada aguardando orçamento"""
+
+    __slots__ = ('priority', 'seq', 'tokens', 'deadline', 'state')
+
+    def __init__(self, priority: int, seq: int, tokens: int, deadline: float):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.deadline = deadline
+        self.state = 'aguardando'  # -> 'liberado' | 'descartado'
+
+    def __lt__(self, other: 'Ticket') -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class LLMScheduler:
+    """
+    Fila por prioridade na frente dos buckets de RPM e TPM.
+
+    - Ordem estrita: nenhuma chamada passa na frente da primeira da fila (mesma
+      prioridade em ordem de chegada), para que análises não sejam adiadas por
+      justificativas menores.
+    - Chamadas com prioridade > 0 só são liberadas se, depois delas, os buckets
+      ainda tiverem `reserve` (fração da capacidade) para as análises.
+    - Uma chamada cujo prazo vence, ou que nem com os buckets reabastecendo
+      caberia no prazo, é descartada na hora.
+    - `penalize(seconds)` suspende as liberações após um erro de cota do provedor.
+
+    `clock` e `wait(condition, timeout)` permitem simular o tempo.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, reserve: float = 0.2,
+                 clock: Callable[[], float] = time.monotonic,
+                 wait: Optional[Callable[[threading.Condition, float], None]] = None):
+        self.clock = clock
+        now = clock()
+        self.requests = TokenBucket(requests_per_minute, now=now)
+        self.tokens = TokenBucket(tokens_per_minute, now=now)
+        self.reserve = reserve
+        self._wait = wait or (lambda condition, timeout: condition.wait(timeout))
+        self._cond = threading.Condition()
+        self._queue: List[Ticket] = []
+        self._seq = itertools.count()
+        self._blocked_until = now
+        self.counters = {'liberadas': 0, 'descartadas': 0, 'penalidades': 0}
+
+    def submit(self, priority: int, tokens: int, max_wait: float) -> Ticket:
+        """Enfileira uma chamada com prazo `max_wait` segundos a partir de agora"""
+        with self._cond:
+            ticket = Ticket(priority, next(self._seq), tokens, self.clock() + max_wait)
+            heapq.heappush(self._queue, ticket)
+            self._dispatch()
+            return ticket
+
+    def dispatch(self) -> float:
+        """Libera/descarta o que for possível agora; retorna os segundos até o próximo evento"""
+        with self._cond:
+            return self._dispatch()
+
+    def _dispatch(self) -> float:
+        now = self.clock()
+        changed = False
+
+        while True:
+            next_event = float('inf')
+            while self._queue:
+                head = self._queue[0]
+                delay = self._time_until(head, now)
+                if delay > 0:
+                    next_event = delay
+                    break
+                heapq.heappop(self._queue)
+                self.requests.take(1)
+                self.tokens.take(head.tokens)
+                head.state = 'liberado'
+                self.counters['liberadas'] += 1
+                changed = True
+
+            # Descartes não dependem da posição na fila; se a primeira sair, tenta de novo
+            expired = [t for t in self._queue if t.deadline <= now or now + self._time_until(t, now) > t.deadline]
+            if not expired:
+                break
+            for ticket in expired:
+                ticket.state = 'descartado'
+            self._queue = [t for t in self._queue if t.state == 'aguardando']
+            heapq.heapify(self._queue)
+            self.counters['descartadas'] += len(expired)
+            changed = True
+
+        for ticket in self._queue:
+            next_event = min(next_event, ticket.deadline - now)
+        if changed:
+            self._cond.notify_all()
+        return next_event
+
+    def _time_until(self, ticket: Ticket, now: float) -> float:
+        """Atraso mínimo até o orçamento comportar `ticket` (ignorando a fila à frente)"""
+        reserve = self.reserve if ticket.priority > PRIORITY_ANALYSIS else 0.0
+        return max(
+            self._blocked_until - now,
+            self.requests.time_until(1 + reserve * self.requests.capacity, now),
+            self.tokens.time_until(ticket.tokens + reserve * self.tokens.capacity, now),
+        )
+
+    def acquire(self, priority: int, tokens: int, max_wait: float) -> bool:
+        """Bloqueia até a chamada ser liberada (True) ou descartada (False)"""
+        with self._cond:
+            ticket = Ticket(priority, next(self._seq), tokens, self.clock() + max_wait)
+            heapq.heappush(self._queue, ticket)
+            while True:
+                timeout = self._dispatch()
+                if ticket.state != 'aguardando':
+                    return ticket.state == 'liberado'
+                self._wait(self._cond, timeout)
+
+    def penalize(self, seconds: float) -> None:
+        """Suspende as liberações por `seconds` (ex.: o provedor respondeu com erro de cota)"""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, self.clock() + seconds)
+            self.counters['penalidades'] += 1
+            self._dispatch()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            now = self.clock()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                'fila': len(self._queue),
+                'rpm_disponivel': round(self.requests.level, 2),
+                'tpm_disponivel': round(self.tokens.level),
+                **self.counters,
+            }
+
+
+class ScheduledBackend(LLMBackend):
+    """Backend que pede orçamento ao LLMScheduler antes de cada chamada ao backend real"""
+
+    def __init__(self, backend: LLMBackend, scheduler: LLMScheduler,
+                 analysis_max_wait: float = None, justification_max_wait: float = None,
+                 quota_backoff: float = None):
+        self.backend = backend
+        self.scheduler = scheduler
+        self.name = backend.name
+        self.analysis_max_wait = config.LLM_ANALYSIS_MAX_WAIT if analysis_max_wait is None else analysis_max_wait
+        self.justification_max_wait = (config.LLM_JUSTIFICATION_MAX_WAIT if justification_max_wait is None
+                                       else justification_max_wait)
+        self.quota_backoff = config.LLM_QUOTA_BACKOFF if quota_backoff is None else quota_backoff
+
+    def check_available(self) -> None:
+        self.backend.check_available()
+
+    def stats(self) -> Dict:
+        return {'orcamento': self.scheduler.stats(), **self.backend.stats()}
+
+    def _call(self, priority: int, tokens: int, max_wait: float, func, *args) -> str:
+        # Backend indisponível (ex.: circuito aberto) falha antes de esperar pelo orçamento
+        self.backend.check_available()
+        if not self.scheduler.acquire(priority, tokens, max_wait):
+            raise LLMBudgetExceeded(f"Orçamento do LLM esgotado (prazo de {max_wait:.1f}s)")
+        try:
+            return func(*args)
+        except LLMQuotaError:
+            logger.warning(f"Cota do provedor excedida - suspendendo chamadas por {self.quota_backoff:.0f}s")
+            self.scheduler.penalize(self.quota_backoff)
+            raise
+
+    def analyze_dish(self, dish_description: str) -> str:
+        tokens = estimate_tokens(build_analysis_prompt(dish_description)) + ANALYSIS_OUTPUT_TOKENS
+        return self._call(PRIORITY_ANALYSIS, tokens, self.analysis_max_wait,
+                          self.backend.analyze_dish, dish_description)
+
+    def justify(self, wine, dish_params: Dict[str, float], perfil_fuzzy: Dict[str, any]) -> str:
+        tokens = (estimate_tokens(build_justification_prompt(wine, dish_params, perfil_fuzzy))
+                  + JUSTIFICATION_OUTPUT_TOKENS)
+        return self._call(PRIORITY_JUSTIFICATION, tokens, self.justification_max_wait,
+                          self.backend.justify, wine, dish_params, perfil_fuzzy)
+
+
+_shared_scheduler: Optional[LLMScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler() -> Optional[LLMScheduler]:
+    """Scheduler do processo a partir de LLM_REQUESTS_PER_MINUTE/LLM_TOKENS_PER_MINUTE (None se 0)"""
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None and config.LLM_REQUESTS_PER_MINUTE > 0:
+            _shared_scheduler = LLMScheduler(config.LLM_REQUESTS_PER_MINUTE, config.LLM_TOKENS_PER_MINUTE,
+                                             reserve=config.LLM_BUDGET_RESERVE)
+            logger.info(f"Orçamento do LLM: {config.LLM_REQUESTS_PER_MINUTE:g} RPM, "
+                        f"{config.LLM_TOKENS_PER_MINUTE:g} TPM")
+        return _shared_scheduler
@@ -1,44 +1,89 @@
 """
-Sistema de logging estruturado
+Sistema de logging estruturado.
+
+Os loggers enfileiram os registros (QueueHandler) e uma única thread de fundo
+(QueueListener) os escreve no console e no arquivo, de modo que a thread que
+atende a requisição nunca espera por I/O de log.
 """
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
 from pathlib import Path
 
-def setup_logger(name: str = "wine_pairing", level: int = logging.INFO) -> logging.Logger:
+try:
+    from . import config
+except ImportError:
+    import config
+
+# Perfis de log (variável LOG_PROFILE): nível dos loggers e nível das mensagens por requisição
+LOG_PROFILES = {
+    'development': {'level': logging.INFO, 'request_level': logging.INFO},
+    'production': {'level': logging.INFO, 'request_level': logging.DEBUG},
+}
+
+_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_lock = threading.Lock()
+_queue = None
+_listener = None
+
+
+def _profile() -> dict:
+    return LOG_PROFILES.get(config.LOG_PROFILE, LOG_PROFILES['development'])
+
+
+def request_log_level() -> int:
+    """Nível das mensagens emitidas a cada requisição (DEBUG no perfil de produção)"""
+    return _profile()['request_level']
+
+
+def _start_listener() -> queue.Queue:
+    """Cria os handlers de saída e a thread que consome a fila (uma vez por processo)"""
+    global _queue, _listener
+    with _lock:
+        if _queue is not None:
+            return _queue
+
+        formatter = logging.Formatter(_FORMAT, datefmt=_DATE_FORMAT)
+
+        # Handler para console
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        handlers = [console_handler]
+
+        # Handler para arquivo (opcional)
+        log_dir = Path(__file__).parent.parent / "logs"
+        try:
+            log_dir.mkdir(parents=True, exist_ok=True)
+            file_handler = logging.FileHandler(log_dir / "wine_pairing.log", encoding='utf-8')
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except Exception:
+            pass  # Se não conseguir criar logs, continua sem arquivo
+
+        _queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        # Esvazia a fila antes do encerramento do processo
+        atexit.register(_listener.stop)
+        return _queue
+
+
+def setup_logger(name: str = "wine_pairing", level: int = None) -> logging.Logger:
     """
     Configura e retorna um logger estruturado
     """
     logger = logging.getLogger(name)
-    logger.setLevel(level)
-    
+    logger.setLevel(_profile()['level'] if level is None else level)
+
     # Evitar duplicação de handlers
     if logger.handlers:
         return logger
-    
-    # Handler para console
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(level)
-    
-    # Formato detalhado
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_handler.setFormatter(formatter)
-    
-    logger.addHandler(console_handler)
-    
-    # Handler para arquivo (opcional)
-    log_dir = Path(__file__).parent.parent / "logs"
-    if not log_dir.exists():
-        try:
-            log_dir.mkdir(parents=True, exist_ok=True)
-            file_handler = logging.FileHandler(log_dir / "wine_pairing.log", encoding='utf-8')
-            file_handler.setLevel(logging.DEBUG)
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-        except Exception:
-            pass  # Se não conseguir criar logs, continua sem arquivo
-    
+
+    logger.addHandler(logging.handlers.QueueHandler(_start_listener()))
+
     return logger
@@ -0,0 +1,247 @@
+"""
+Pipeline de harmonização com os componentes carregados uma única vez.
+
+Reúne FuzzyEngine, WineRecommender, DishDatabase e LLMProcessor (com o cache LLM)
+em uma instância compartilhada por todas as requisições do servidor HTTP. Os
+componentes já são seguros para chamadas concorrentes, então o serviço não
+serializa as requisições.
+"""
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    from . import config
+    from .config import MAX_ALTERNATIVES, MAX_DISH_DESCRIPTION_LENGTH, MIN_DISH_DESCRIPTION_LENGTH
+    from .logger import request_log_level, setup_logger
+    from .tracing import request_scope, tracer
+    from .dish_database import DishDatabase
+    from .fuzzy_engine import FuzzyEngine
+    from .llm_backends import LLMBackend, LLMBackendError, create_backend
+    from .llm_processor import LLMProcessor
+    from .recommender import WineRecommender
+    from .dish_profile import DishProfile
+    from .recommendation_table import load_or_build
+    from .request_profiler import RequestProfiler
+except ImportError:
+    import config
+    from config import MAX_ALTERNATIVES, MAX_DISH_DESCRIPTION_LENGTH, MIN_DISH_DESCRIPTION_LENGTH
+    from logger import request_log_level, setup_logger
+    from tracing import request_scope, tracer
+    from dish_database import DishDatabase
+    from fuzzy_engine import FuzzyEngine
+    from llm_backends import LLMBackend, LLMBackendError, create_backend
+    from llm_processor import LLMProcessor
+    from recommender import WineRecommender
+    from dish_profile import DishProfile
+    from recommendation_table import load_or_build
+    from request_profiler import RequestProfiler
+
+logger = setup_logger(__name__)
+REQUEST_LOG_LEVEL = request_log_level()
+
+root_dir = Path(__file__).parent.parent
+
+# Espera (s) depois de uma falha antes de tentar recalcular a tabela de novo
+TABLE_REBUILD_BACKOFF = 60.0
+
+
+def clean_description(description) -> str:
+    """Remove caracteres de controle e valida a descrição; levanta ValueError se inválida"""
+    if not isinstance(description, str):
+        raise ValueError("Descrição do prato deve ser um texto")
+
+    description = re.sub(r'[\x00-\x1F\x7F]', '', description).strip()
+    if not description:
+        raise ValueError("Descrição do prato não pode estar vazia")
+    if len(description) < MIN_DISH_DESCRIPTION_LENGTH:
+        raise ValueError(f"Descrição muito curta: use pelo menos {MIN_DISH_DESCRIPTION_LENGTH} caracteres")
+    if len(description) > MAX_DISH_DESCRIPTION_LENGTH:
+        raise ValueError(f"Descrição muito longa: use no máximo {MAX_DISH_DESCRIPTION_LENGTH} caracteres")
+    if not re.search(r'[a-zA-ZÀ-ÿ]', description):
+        raise ValueError("Descrição deve conter pelo menos uma palavra")
+    return description
+
+
+class PairingService:
+    """Pipeline completo (análise -> perfil fuzzy -> vinho) sobre componentes aquecidos"""
+
+    def __init__(self, wines_csv: str = None, dishes_csv: str = None, model=None,
+                 llm_cache_file: Optional[str] = None, watch_catalog: bool = False,
+                 backend: Optional[LLMBackend] = None, profiler: Optional[RequestProfiler] = None):
+        """
+        Um único backend LLM atende a análise e as justificativas: `backend`, ou um
+        GeminiBackend sobre `model` (ex.: o LLM falso dos benchmarks), ou o definido em
+        `config.LLM_BACKEND` (o backend local reaproveita a base de pratos do serviço).
+        `profiler` perfila uma fração das requisições (ver `RequestProfiler.from_config`).
+        """
+        wines_csv = str(wines_csv or root_dir / "data" / "vinhos.csv")
+        dishes_csv = str(dishes_csv or root_dir / "data" / "pratos.csv")
+        self.wines_csv, self.dishes_csv = wines_csv, dishes_csv
+
+        start = time.perf_counter()
+        self.fuzzy_engine = FuzzyEngine(dishes_csv, use_learned_rules=True)
+        self.dish_database = DishDatabase(dishes_csv)
+        self.backend = backend or create_backend(model, self.dish_database)
+        self.recommender = WineRecommender(wines_csv, backend=self.backend)
+        self.llm = LLMProcessor(cache_file=llm_cache_file, backend=self.backend)
+        if watch_catalog:
+            self.recommender.watch()
+        self.profiler = profiler
+        
+        # Pratos cadastrados: perfil e vinhos pré-calculados (ver recommendation_table)
+        self._table = None  # (tabela, catálogo usado no cálculo)
+        self._table_lock = threading.Lock()
+        self._table_rebuilding = False
+        self._table_failed_at = None  # time.monotonic() da última falha de cálculo
+        if config.RECOMMENDATION_TOP_K > 0 and len(self.dish_database.get_all_dishes()):
+            self._build_table()
+
+        self.started_at = time.time()
+        logger.info(f"Serviço de harmonização pronto em {time.perf_counter() - start:.2f}s")
+
+    def _build_table(self) -> None:
+        catalog = self.recommender.catalog
+        try:
+            table = load_or_build(self.wines_csv, self.dishes_csv, self.fuzzy_engine, self.dish_database,
+                                  self.recommender, catalog=catalog)
+        except Exception as e:
+            self._table_failed_at = time.monotonic()
+            logger.warning(f"Tabela de recomendações indisponível ({e}); pratos cadastrados usam o pipeline")
+            return
+        self._table = (table, catalog)
+        self._table_failed_at = None
+
+    def _rebuild_table(self) -> None:
+        try:
+            self._build_table()
+        finally:
+            self._table_rebuilding = False
+
+    def _precomputed(self, description: str):
+        """
+        (entrada da tabela, catálogo da tabela) para um prato cadastrado, ou None. Se o catálogo foi recarregado
+        ou a base de regras mudou, a tabela é recalculada em segundo plano e, até lá,
+        o pipeline completo atende. Depois de uma falha, a próxima tentativa espera
+        TABLE_REBUILD_BACKOFF segundos.
+        """
+        current = self._table
+        if current is None:
+            return None
+        table, catalog = current
+        entry = table.lookup(description)
+        if entry is None or not len(entry[2]):
+            return None
+        if catalog is self.recommender.catalog and table.rules_fingerprint == self.fuzzy_engine.rules_fingerprint:
+            return entry, catalog
+
+        failed_at = self._table_failed_at
+        if failed_at is not None and time.monotonic() - failed_at < TABLE_REBUILD_BACKOFF:
+            return None
+        with self._table_lock:
+            if not self._table_rebuilding:
+                self._table_rebuilding = True
+                logger.info("Catálogo ou regras mudaram: recalculando a tabela de recomendações")
+                threading.Thread(target=self._rebuild_table, name='recommendation-table', daemon=True).start()
+        return None
+
+    def analyze(self, description: str) -> DishProfile:
+        """Parâmetros do prato: pratos cadastrados vêm da base, os demais passam pelo LLM"""
+        dish = self.dish_database.get_dish_by_name(description)
+        if dish is not None:
+            logger.log(REQUEST_LOG_LEVEL, "Prato encontrado na base: %s", dish['nome'])
+            return self.dish_database.extract_parameters(dish)
+        return self.llm.analyze_dish(description)
+
+    def recommend(self, description: str, request_id: Optional[str] = None, alternatives: int = 0,
+                  diversity: Optional[float] = None, filters: Optional[Dict] = None) -> Dict:
+        """
+        Executa o pipeline para uma descrição; levanta ValueError para entradas inválidas.
+        Com `alternatives`, o vinho traz até esse número de alternativas diversificadas;
+        `filters` restringe os vinhos (tipo, uva, país, região, teor_min, teor_max).
+        """
+        description = clean_description(description)
+        if isinstance(alternatives, bool) or not isinstance(alternatives, int) \
+                or not 0 <= alternatives <= MAX_ALTERNATIVES:
+            raise ValueError(f"Alternativas deve ser um inteiro de 0 a {MAX_ALTERNATIVES}")
+        if diversity is not None and (isinstance(diversity, bool) or not isinstance(diversity, (int, float))
+                                      or not 0 <= diversity <= 1):
+            raise ValueError("Diversidade deve ser um número de 0 a 1")
+        if filters is not None and not isinstance(filters, dict):
+            raise ValueError("Filtros devem ser um objeto JSON")
+
+        with request_scope(request_id) as request_id:
+            logger.log(REQUEST_LOG_LEVEL, "[%s] Iniciando analise para: %.50s...", request_id, description)
+            if self.profiler is not None and self.profiler.sampled():
+                with self.profiler.profile(request_id, description):
+                    dish_params, perfil_fuzzy, wine = self._pipeline(description, alternatives, diversity, filters)
+            else:
+                dish_params, perfil_fuzzy, wine = self._pipeline(description, alternatives, diversity, filters)
+
+            return {
+                'request_id': request_id,
+                'prato': description,
+                'parametros': dish_params,
+                'perfil': perfil_fuzzy,
+                'vinho': wine,
+                'etapas_ms': {stage: seconds * 1000 for stage, seconds in tracer.request_spans(request_id)},
+            }
+
+    def _pipeline(self, description: str, alternatives: int, diversity: Optional[float],
+                  filters: Optional[Dict]):
+        """(parâmetros, perfil fuzzy, vinho) de uma descrição já validada, dentro do span 'pipeline'"""
+        with tracer.span('pipeline'):
+            # A tabela pré-calculada vale para o catálogo inteiro, sem filtros
+            precomputed = None if filters else self._precomputed(description)
+            if precomputed is not None:
+                (dish_params, perfil_fuzzy, top), catalog = precomputed
+                logger.log(REQUEST_LOG_LEVEL, "Prato com recomendação pré-calculada: %s", description)
+                wine = self.recommender.describe(catalog, int(top[0]), dish_params, perfil_fuzzy)
+                if alternatives:
+                    wine['alternativas'] = self.recommender.alternatives(
+                        dish_params, perfil_fuzzy, alternatives, diversity, catalog=catalog,
+                        description=description)
+            else:
+                dish_params = self.analyze(description)
+                perfil_fuzzy = self.fuzzy_engine.compute_wine_profile(dish_params)
+                wine = self.recommender.recommend(dish_params, perfil_fuzzy, alternatives, diversity, filters,
+                                                  description)
+        return dish_params, perfil_fuzzy, wine
+
+    def recommend_batch(self, descriptions: List[str]) -> List[Dict]:
+        """Um resultado por descrição, na mesma ordem; erros de um prato não interrompem o lote"""
+        results = []
+        for description in descriptions:
+            try:
+                results.append(self.recommend(description))
+            except (ValueError, LLMBackendError) as e:
+                results.append({'prato': description, 'erro': str(e)})
+        return results
+
+    def close(self) -> None:
+        """Grava pendências (cache LLM) antes do encerramento"""
+        if self.llm.cache is not None:
+            self.llm.cache.flush()
+
+    def rules(self) -> Dict:
+        return {
+            'total': len(self.fuzzy_engine.rule_specs),
+            'regras': self.fuzzy_engine.get_rules_text(),
+        }
+
+    def stats(self) -> Dict:
+        return {
+            'uptime_s': time.time() - self.started_at,
+            'vinhos': len(self.recommender),
+            'armazenamento_catalogo': self.recommender.storage,
+            'regras': len(self.fuzzy_engine.rule_specs),
+            'inferencias': self.fuzzy_engine.get_inference_counters(),
+            'backend_llm': self.backend.name,
+            'protecao_llm': self.backend.stats(),
+            'cache_llm': len(self.llm.cache.cache) if self.llm.cache else 0,
+            'tabela_recomendacoes': len(self._table[0]) if self._table else 0,
+            'perfilamento': self.profiler.stats() if self.profiler is not None else None,
+            'etapas': tracer.stage_stats(),
+        }
@@ -0,0 +1,230 @@
+"""
+Tabela pré-calculada de recomendações dos pratos cadastrados.
+
+Para um prato da DishDatabase a resposta depende só dos parâmetros guardados, da
+base de regras fuzzy, da pontuação dos vinhos e do catálogo. O job offline
+calcula de uma vez o perfil fuzzy (em lote) e os K melhores vinhos de cada prato
+e grava uma tabela indexada pelo nome do prato; no serviço, um prato cadastrado
+vira uma consulta a um dict seguida da justificativa.
+
+A tabela é identificada por uma impressão digital das entradas: SHA-256 dos
+catálogos de vinhos e de pratos efetivamente carregados, base de regras (`FuzzyEngine.rules_fingerprint`),
+pontuação (`WineScorer.fingerprint`), uso das harmonizações e K. Qualquer mudança gera outra chave, então
+uma tabela antiga nunca é lida; a anterior é apagada quando a nova é gravada.
+
+Layout em disco (um diretório por par de CSVs):
+
+    <table_dir>/<vinhos>-<pratos>-<hash dos caminhos>/<impressão digital>.npz
+
+Geração manual:
+
+    python src/recommendation_table.py [--wines data/vinhos.csv] [--dishes data/pratos.csv] [--top-k 5]
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from . import config
+    from .logger import setup_logger
+    from .catalog_snapshot import file_sha256
+    from .dish_profile import DishProfile
+except ImportError:
+    import config
+    from logger import setup_logger
+    from catalog_snapshot import file_sha256
+    from dish_profile import DishProfile
+
+logger = setup_logger(__name__)
+
+TABLE_FORMAT_VERSION = 1
+DEFAULT_TABLE_DIR = Path(__file__).parent.parent / ".cache" / "recommendations"
+
+
+class RecommendationTable:
+    """
+    Perfil fuzzy e K melhores vinhos (índices no catálogo, -1 quando há menos de K
+    vinhos válidos) de cada prato cadastrado, com busca pelo nome em minúsculas
+    """
+
+    def __init__(self, fingerprint: str, rules_fingerprint: str, names: List[str], params: np.ndarray,
+                 valores: np.ndarray, categorias: List[str], top: np.ndarray, scores: np.ndarray):
+        self.fingerprint = fingerprint
+        self.rules_fingerprint = rules_fingerprint
+        self.names = list(names)
+        self.params = np.asarray(params, dtype=np.float32)
+        self.valores = np.asarray(valores, dtype=np.float64)
+        self.categorias = list(categorias)
+        self.top = np.asarray(top, dtype=np.int32)
+        self.scores = np.asarray(scores, dtype=np.float64)
+
+        # Nomes repetidos ficam com o primeiro prato, como em DishDatabase.get_dish_by_name
+        self._index: Dict[str, int] = {}
+        for i, name in enumerate(self.names):
+            self._index.setdefault(name.lower(), i)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def top_k(self) -> int:
+        return self.top.shape[1]
+
+    def lookup(self, name: str) -> Optional[Tuple[DishProfile, Dict[str, any], np.ndarray]]:
+        """(parâmetros, perfil fuzzy, índices dos melhores vinhos) do prato, ou None"""
+        i = self._index.get(name.lower())
+        if i is None:
+            return None
+        perfil = {'valor': float(self.valores[i]), 'categoria': self.categorias[i]}
+        top = self.top[i]
+        return DishProfile(self.params[i]), perfil, top[top >= 0]
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Grava em .npz (arquivo temporário + troca atômica)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.tmp-{os.getpid()}-{threading.get_ident()}.npz")
+        np.savez(tmp, format=np.array(TABLE_FORMAT_VERSION), fingerprint=np.array(self.fingerprint),
+                 rules_fingerprint=np.array(self.rules_fingerprint), names=np.array(self.names, dtype=str),
+                 params=self.params, valores=self.valores, categorias=np.array(self.categorias, dtype=str),
+                 top=self.top, scores=self.scores)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> Optional['RecommendationTable']:
+        """Tabela gravada por `save`, ou None se o arquivo não existir ou for de outro formato"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['format']) != TABLE_FORMAT_VERSION:
+                    return None
+                return cls(str(data['fingerprint']), str(data['rules_fingerprint']), data['names'].tolist(),
+                           data['params'], data['valores'], data['categorias'].tolist(), data['top'], data['scores'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def table_fingerprint(wines_csv: Union[str, Path], dishes_csv: Union[str, Path], fuzzy_engine,
+                      recommender, top_k: int, catalog=None, dish_database=None) -> str:
+    """
+    Impressão digital de tudo o que determina a tabela. Vinhos e pratos entram pelo
+    SHA-256 do conteúdo que `catalog` (padrão: o catálogo atual) e `dish_database`
+    carregaram, não dos CSVs em disco: se um arquivo mudou depois da carga, as linhas
+    calculadas não ficam sob a chave nova. Sem `dish_database`, usa o CSV de pratos.
+    """
+    catalog = recommender.catalog if catalog is None else catalog
+    if dish_database is not None:
+        dishes_sha = dish_database.source_sha256
+    else:
+        dishes_sha = file_sha256(dishes_csv) if Path(dishes_csv).exists() else None
+    payload = json.dumps({
+        'formato': TABLE_FORMAT_VERSION,
+        'vinhos': catalog.source_sha256 or file_sha256(wines_csv),
+        'pratos': dishes_sha,
+        'regras': fuzzy_engine.rules_fingerprint,
+        'pontuacao': recommender.scorer.fingerprint,
+        'harmonizacoes': [recommender.tag_mode, recommender.tag_bonus],
+        'top_k': top_k,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def table_dir(wines_csv: Union[str, Path], dishes_csv: Union[str, Path],
+              base_dir: Optional[Union[str, Path]] = None) -> Path:
+    """Diretório das tabelas de um par de CSVs (nomes + hash dos caminhos absolutos)"""
+    wines_csv, dishes_csv = Path(wines_csv).resolve(), Path(dishes_csv).resolve()
+    path_hash = hashlib.sha1(f"{wines_csv}|{dishes_csv}".encode('utf-8')).hexdigest()[:10]
+    return Path(base_dir or DEFAULT_TABLE_DIR) / f"{wines_csv.stem}-{dishes_csv.stem}-{path_hash}"
+
+
+def build_table(fuzzy_engine, dish_database, recommender, top_k: int, fingerprint: str = '',
+                catalog=None) -> RecommendationTable:
+    """
+    Calcula a tabela: perfis fuzzy de todos os pratos em lote (`compute_wine_profiles`
+    sobre `parameter_matrix`) e os K melhores vinhos de cada um em `catalog` (padrão:
+    o catálogo atual do recomendador), com o nome do prato como descrição, como no serviço
+    """
+    start = time.perf_counter()
+    catalog = recommender.catalog if catalog is None else catalog
+    params = dish_database.parameter_matrix()
+    names = [str(dish['nome']) for dish in dish_database.get_all_dishes()]
+    perfis = fuzzy_engine.compute_wine_profiles(params)
+
+    top = np.full((len(params), top_k), -1, dtype=np.int32)
+    scores = np.full((len(params), top_k), np.inf)
+    for i, (row, perfil) in enumerate(zip(DishProfile.from_matrix(params), perfis)):
+        indices, values = recommender.rank(row, perfil, top_k, catalog=catalog, description=names[i])
+        top[i, :len(indices)] = indices
+        scores[i, :len(values)] = values
+
+    logger.info(f"Tabela de recomendações calculada: {len(names)} pratos x top {top_k} "
+                f"em {time.perf_counter() - start:.2f}s")
+    return RecommendationTable(fingerprint, fuzzy_engine.rules_fingerprint, names, params,
+                               np.array([p['valor'] for p in perfis]), [p['categoria'] for p in perfis],
+                               top, scores)
+
+
+def load_or_build(wines_csv: Union[str, Path], dishes_csv: Union[str, Path], fuzzy_engine, dish_database,
+                  recommender, top_k: Optional[int] = None, base_dir: Optional[Union[str, Path]] = None,
+                  catalog=None) -> RecommendationTable:
+    """
+    Tabela atual das entradas: lida do disco quando a impressão digital bate, senão
+    recalculada e gravada (substituindo a anterior). Falhas de gravação só geram aviso.
+    """
+    top_k = config.RECOMMENDATION_TOP_K if top_k is None else top_k
+    catalog = recommender.catalog if catalog is None else catalog
+    fingerprint = table_fingerprint(wines_csv, dishes_csv, fuzzy_engine, recommender, top_k, catalog, dish_database)
+    directory = table_dir(wines_csv, dishes_csv, base_dir)
+    path = directory / f"{fingerprint[:32]}.npz"
+
+    table = RecommendationTable.load(path)
+    if table is not None and table.fingerprint == fingerprint:
+        logger.info(f"Tabela de recomendações carregada: {len(table)} pratos ({path.name})")
+        return table
+
+    table = build_table(fuzzy_engine, dish_database, recommender, top_k, fingerprint, catalog)
+    try:
+        table.save(path)
+        for old in directory.glob('*.npz'):
+            if old != path:
+                old.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Não foi possível gravar a tabela de recomendações ({e})")
+    return table
+
+
+def main():
+    import argparse
+
+    try:
+        from .fuzzy_engine import FuzzyEngine
+        from .dish_database import DishDatabase
+        from .recommender import WineRecommender
+    except ImportError:
+        from fuzzy_engine import FuzzyEngine
+        from dish_database import DishDatabase
+        from recommender import WineRecommender
+
+    root_dir = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(description="Pré-calcula as recomendações dos pratos cadastrados")
+    parser.add_argument('--wines', default=str(root_dir / "data" / "vinhos.csv"))
+    parser.add_argument('--dishes', default=str(root_dir / "data" / "pratos.csv"))
+    parser.add_argument('--top-k', type=int, default=None, help='Vinhos por prato (padrão: RECOMMENDATION_TOP_K)')
+    parser.add_argument('--table-dir', default=None, help=f'Diretório das tabelas (padrão: {DEFAULT_TABLE_DIR})')
+    args = parser.parse_args()
+
+    top_k = args.top_k or config.RECOMMENDATION_TOP_K or 5
+    fuzzy_engine = FuzzyEngine(args.dishes, use_learned_rules=True)
+    dish_database = DishDatabase(args.dishes)
+    recommender = WineRecommender(args.wines, backend=None)
+    table = load_or_build(args.wines, args.dishes, fuzzy_engine, dish_database, recommender, top_k, args.table_dir)
+    print(f"{len(table)} pratos x top {table.top_k} -> {table_dir(args.wines, args.dishes, args.table_dir)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,109 +1,316 @@
-import pandas as pd
+import threading
 import numpy as np
 from pathlib import Path
-from typing import Dict, Optional
-import google.generativeai as genai
+from typing import Dict, List, Optional, Union
 
 try:
-    from .config import GEMINI_API_KEY, GEMINI_MODEL, REQUIRED_CSV_COLUMNS
-    from .logger import setup_logger
+    from . import config
+    from .logger import request_log_level, setup_logger
+    from .tracing import traced
+    from .wine_catalog import WineCatalog
+    from .catalog_watcher import CatalogWatcher
+    from .llm_backends import LLMBackend, LLMUnavailableError, create_backend
+    from .dish_profile import DishProfile
+    from .wine_scoring import DIVERSITY_ATTRIBUTES, WineScorer, select_diverse
 except ImportError:
-    from config import GEMINI_API_KEY, GEMINI_MODEL, REQUIRED_CSV_COLUMNS
-    from logger import setup_logger
+    import config
+    from logger import request_log_level, setup_logger
+    from tracing import traced
+    from wine_catalog import WineCatalog
+    from catalog_watcher import CatalogWatcher
+    from llm_backends import LLMBackend, LLMUnavailableError, create_backend
+    from dish_profile import DishProfile
+    from wine_scoring import DIVERSITY_ATTRIBUTES, WineScorer, select_diverse
 
 logger = setup_logger(__name__)
+REQUEST_LOG_LEVEL = request_log_level()
+
+# "bonus": vinhos com harmonizações citadas no prato ganham HARMONIZATION_TAG_BONUS por
+# tag; "filtro": além do bônus, só esses vinhos concorrem (se algum sobrar)
+TAG_MODES = ('bonus', 'filtro', 'desligado')
 
 class WineRecommender:
-    def __init__(self, csv_path: str):
+    def __init__(self, csv_path: str, model=None, use_snapshot: bool = True, storage: Optional[str] = None,
+                 backend: Optional[LLMBackend] = None, scoring: Optional[Union[Dict, WineScorer]] = None):
+        """
+        `backend` (ou `model`, um objeto com `generate_content`) define o LLM das
+        justificativas; sem eles vale `config.LLM_BACKEND`, e sem LLM utilizável as
+        justificativas são montadas localmente.
+        
+        `storage` escolhe onde o catálogo fica: "dataframe" (pandas, padrão) ou "mmap"
+        (colunas do snapshot mapeadas em memória, somente leitura e compartilhadas
+        entre processos). Sem snapshot utilizável, o modo "mmap" volta ao DataFrame.
+        
+        `scoring` (dict no formato de `wine_scoring` ou um WineScorer) define os termos
+        e pesos da escolha do vinho; sem ele vale `config.WINE_SCORING_FILE` ou o padrão.
+        """
         logger.info(f"Inicializando Wine Recommender com CSV: {csv_path}")
         
         if not Path(csv_path).exists():
             logger.error(f"Arquivo de vinhos não encontrado: {csv_path}")
             raise FileNotFoundError(f"Arquivo de vinhos não encontrado: {csv_path}")
         
+        self.csv_path = str(csv_path)
+        self.use_snapshot = use_snapshot
+        self._requested_storage = storage or config.CATALOG_STORAGE
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        
         try:
-            self.df = pd.read_csv(csv_path, encoding='utf-8')
-            logger.info(f"CSV carregado com {len(self.df)} vinhos")
+            catalog = WineCatalog.load(self.csv_path, use_snapshot, self._requested_storage)
+            logger.info(f"CSV carregado com {len(catalog)} vinhos ({catalog.storage})")
         except Exception as e:
             logger.error(f"Erro ao carregar arquivo CSV: {e}")
             raise ValueError(f"Erro ao carregar arquivo CSV: {e}")
         
         # Validar colunas necessárias
-        self._validate_csv_columns()
-        
-        # Configurar Gemini para justificativas detalhadas
-        if GEMINI_API_KEY:
-            genai.configure(api_key=GEMINI_API_KEY)
-            self.model = genai.GenerativeModel(GEMINI_MODEL)
-            self.use_llm_justification = True
-            logger.info("LLM habilitado para justificativas")
+        catalog.validate()
+        self.catalog = catalog
+        
+        if isinstance(scoring, WineScorer):
+            self.scorer = scoring
         else:
-            self.use_llm_justification = False
-            logger.warning("LLM não configurado - usando justificativas simples")
-    
-    def _validate_csv_columns(self) -> None:
-        """Valida que todas as colunas necessárias existem no CSV"""
-        missing_columns = [col for col in REQUIRED_CSV_COLUMNS if col not in self.df.columns]
+            self.scorer = WineScorer(scoring) if scoring is not None else WineScorer.from_config()
         
-        if missing_columns:
-            error_msg = f"Colunas ausentes no CSV: {', '.join(missing_columns)}"
-            logger.error(error_msg)
-            raise ValueError(error_msg)
+        # Harmonizações citadas na descrição do prato: bônus na pontuação ou pré-filtro
+        self.tag_mode = config.HARMONIZATION_TAG_MODE
+        if self.tag_mode not in TAG_MODES:
+            raise ValueError(f"HARMONIZATION_TAG_MODE inválido: {self.tag_mode} (use {', '.join(TAG_MODES)})")
+        self.tag_bonus = config.HARMONIZATION_TAG_BONUS
         
-        logger.info("Todas as colunas necessárias foram encontradas no CSV")
+        # Configurar o backend LLM para justificativas detalhadas
+        if backend is None:
+            try:
+                backend = create_backend(model)
+            except ValueError as e:
+                logger.warning(f"LLM não configurado ({e}) - usando justificativas simples")
+        self.backend = backend
+        self.use_llm_justification = backend is not None
+        if backend is not None:
+            logger.info(f"LLM habilitado para justificativas (backend {backend.name})")
+    
+    def __len__(self) -> int:
+        return len(self.catalog)
+    
+    @property
+    def df(self):
+        """DataFrame do catálogo atual (None no modo mmap)"""
+        return self.catalog.df
     
-    def recommend(self, dish_params: Dict[str, float], perfil_fuzzy: Dict[str, any]) -> Dict[str, any]:
+    @property
+    def storage(self) -> str:
+        return self.catalog.storage
+    
+    def reload(self) -> bool:
         """
-        Recomenda um vinho baseado nos parâmetros do prato e perfil fuzzy.
+        Recarrega o CSV em um catálogo novo e o publica com uma única atribuição.
+        Requisições em andamento terminam com o catálogo anterior; se o CSV novo for
+        inválido (ex.: salvo pela metade), o catálogo atual é mantido.
         """
-        logger.info(f"Buscando vinho com perfil {perfil_fuzzy['categoria']}")
+        with self._reload_lock:
+            try:
+                catalog = WineCatalog.load(self.csv_path, self.use_snapshot, self._requested_storage)
+                catalog.validate()
+            except Exception as e:
+                logger.error(f"Recarga do catálogo falhou, mantendo a versão atual: {e}")
+                return False
+            
+            previous = self.catalog
+            self.catalog = catalog
         
+        logger.info(f"Catálogo recarregado: {len(previous)} -> {len(catalog)} vinhos")
+        return True
+    
+    def watch(self, interval: Optional[float] = None) -> None:
+        """Recarrega o catálogo em segundo plano sempre que o CSV mudar"""
+        if self._watcher is None:
+            interval = config.CATALOG_WATCH_INTERVAL if interval is None else interval
+            self._watcher = CatalogWatcher(self.csv_path, lambda _path: self.reload(), interval).start()
+    
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+    
+    def _scores(self, catalog: WineCatalog, dish_params: DishProfile, perfil_fuzzy: Dict[str, any],
+                filters: Optional[Dict] = None, description: Optional[str] = None):
+        """
+        (linhas, pontuação): a pontuação (menor é melhor) em uma expressão vetorizada
+        sobre os vinhos que passam pelos `filters` (`linhas`, índices ordenados no
+        catálogo) ou sobre todo o catálogo (`linhas` None). Vinhos descartados
+        (valores nulos, fora da faixa de corpo) ficam com infinito. Harmonizações do
+        catálogo citadas em `description` dão bônus (e, no modo "filtro", pré-filtram).
+        """
         categoria = perfil_fuzzy['categoria']
         
-        # Mapear categoria fuzzy para faixa de corpo do vinho
-        if categoria == 'leve':
-            corpo_min, corpo_max = 0, 5
-        elif categoria == 'medio':
-            corpo_min, corpo_max = 4, 7
-        else:  # encorpado
-            corpo_min, corpo_max = 6, 10
-        
-        # Filtrar vinhos por corpo
-        candidatos = self.df[
-            (self.df['corpo'] >= corpo_min) & 
-            (self.df['corpo'] <= corpo_max)
-        ].copy()
+        # Filtros resolvidos por bitmaps antes da pontuação: só as linhas restantes são pontuadas
+        rows = catalog.filter_rows(filters)
+        if rows is not None and len(rows) == 0:
+            raise ValueError("Nenhum vinho atende aos filtros pedidos")
         
-        if len(candidatos) == 0:
-            logger.warning("Nenhum candidato encontrado na faixa de corpo - usando todos os vinhos")
-            candidatos = self.df.copy()
+        tags = catalog.tags().match(description) if description and self.tag_mode != 'desligado' else []
+        if tags:
+            logger.log(REQUEST_LOG_LEVEL, "Harmonizações citadas no prato: %s",
+                       ', '.join(catalog.tags().vocabulary[t] for t in tags))
+            if self.tag_mode == 'filtro':
+                tagged = catalog.tags().wines(tags)
+                if rows is not None:
+                    tagged = np.intersect1d(rows, tagged, assume_unique=True)
+                if len(tagged):
+                    rows = tagged
+                else:
+                    logger.log(REQUEST_LOG_LEVEL, "Nenhum vinho com as harmonizações citadas - mantendo os candidatos")
         
-        logger.info(f"{len(candidatos)} vinhos candidatos encontrados")
+        # Colunas usadas pela pontuação, pré-calculadas uma vez por catálogo
+        features, validos = catalog.feature_matrix(self.scorer.columns)
+        if rows is not None:
+            features, validos = features[rows], validos[rows]
         
-        # Calcular distâncias usando operações vetorizadas (muito mais rápido)
-        candidatos = candidatos.dropna(subset=['acidez', 'intensidade_sabor', 'doçura'])
+        # Modo "faixa": só vinhos na faixa de corpo da categoria (todos, se a faixa estiver vazia)
+        candidatos = self.scorer.body_mask(features, categoria)
+        if candidatos is not None:
+            if not candidatos.any():
+                logger.warning("Nenhum candidato encontrado na faixa de corpo - usando todos os vinhos")
+            else:
+                validos = validos & candidatos
         
-        if len(candidatos) == 0:
+        if not validos.any():
             logger.error("Nenhum vinho válido após remover valores nulos")
             raise ValueError("Nenhum vinho válido encontrado na base de dados")
         
-        # Operações vetorizadas do pandas (100x mais rápido que iterrows)
-        candidatos['dist_acidez'] = np.abs(candidatos['acidez'] - dish_params['acidez'])
-        candidatos['dist_intensidade'] = np.abs(candidatos['intensidade_sabor'] - dish_params['intensidade_sabor'])
-        candidatos['dist_dulcor'] = np.abs(candidatos['doçura'] - dish_params['dulcor'])
+        logger.log(REQUEST_LOG_LEVEL, "%d vinhos candidatos encontrados", int(validos.sum()))
+        score = np.where(validos, self.scorer.score(features, dish_params, float(perfil_fuzzy['valor'])), np.inf)
+        if tags and self.tag_bonus:
+            # Só os vinhos de cada lista invertida são tocados (ids únicos por tag)
+            index = catalog.tags()
+            for tag in tags:
+                wines = index.wines([tag])
+                if rows is not None:
+                    positions = np.searchsorted(rows, wines)
+                    wines = positions[(positions < len(rows)) & (rows[np.minimum(positions, len(rows) - 1)] == wines)]
+                score[wines] -= self.tag_bonus
+        return rows, score
+    
+    @staticmethod
+    def _at(rows: Optional[np.ndarray], positions):
+        """Posições na pontuação -> índices no catálogo"""
+        return positions if rows is None else rows[positions]
+    
+    def rank(self, dish_params: Dict[str, float], perfil_fuzzy: Dict[str, any], k: int,
+             catalog: Optional[WineCatalog] = None, filters: Optional[Dict] = None,
+             description: Optional[str] = None):
+        """
+        Índices (no catálogo) e pontuações dos `k` melhores vinhos, do melhor para o
+        pior; empates ficam com o primeiro vinho do catálogo, como em `recommend`
+        """
+        catalog = self.catalog if catalog is None else catalog
+        rows, score = self._scores(catalog, DishProfile.coerce(dish_params), perfil_fuzzy, filters, description)
+        positions = self._top(score, k)
+        return self._at(rows, positions), score[positions]
+    
+    @staticmethod
+    def _top(score: np.ndarray, k: int) -> np.ndarray:
+        """Posições dos `k` menores valores finitos, ordenadas (empates: menor posição)"""
+        k = min(k, int(np.isfinite(score).sum()))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
         
-        # Score total (menor é melhor)
-        candidatos['score'] = (
-            candidatos['dist_acidez'] + 
-            candidatos['dist_intensidade'] + 
-            candidatos['dist_dulcor'] * 0.5
-        )
+        # Corte em O(N): tudo abaixo do k-ésimo valor entra, e os empates com ele
+        # ficam com as menores posições
+        limite = np.partition(score, k - 1)[k - 1]
+        positions = np.flatnonzero(score <= limite)
+        return positions[np.argsort(score[positions], kind='stable')[:k]]
+    
+    def rank_diverse(self, dish_params: Dict[str, float], perfil_fuzzy: Dict[str, any], k: int,
+                     diversity: Optional[float] = None, pool_size: Optional[int] = None,
+                     catalog: Optional[WineCatalog] = None, filters: Optional[Dict] = None,
+                     description: Optional[str] = None):
+        """
+        Como `rank`, mas diversificado por MMR sobre uva, país e tipo: os `pool_size`
+        melhores vinhos (seleção parcial, O(N)) são reordenados por `select_diverse`.
+        `diversity` vai de 0 (só relevância, igual a `rank`) a 1; o primeiro vinho é
+        sempre o de `recommend`.
+        """
+        catalog = self.catalog if catalog is None else catalog
+        rows, score = self._scores(catalog, DishProfile.coerce(dish_params), perfil_fuzzy, filters, description)
+        positions = self._diverse(catalog, rows, score, k, diversity, pool_size)
+        return self._at(rows, positions), score[positions]
+    
+    def _diverse(self, catalog: WineCatalog, rows: Optional[np.ndarray], score: np.ndarray, k: int,
+                 diversity: Optional[float], pool_size: Optional[int]) -> np.ndarray:
+        diversity = config.RECOMMENDATION_DIVERSITY if diversity is None else diversity
+        if not 0 <= diversity <= 1:
+            raise ValueError(f"Diversidade deve estar entre 0 e 1 (recebido {diversity})")
+        pool_size = config.RECOMMENDATION_POOL_SIZE if pool_size is None else pool_size
+        
+        pool = self._top(score, max(k, pool_size))
+        wines = self._at(rows, pool)
+        codes = np.column_stack([catalog.codes(name)[0][wines] for name in DIVERSITY_ATTRIBUTES])
+        return pool[select_diverse(score[pool], codes, k, diversity)]
+    
+    def alternatives(self, dish_params: Dict[str, float], perfil_fuzzy: Dict[str, any], k: int,
+                     diversity: Optional[float] = None, catalog: Optional[WineCatalog] = None,
+                     filters: Optional[Dict] = None, description: Optional[str] = None,
+                     scored=None) -> List[Dict[str, any]]:
+        """
+        Até `k` vinhos alternativos ao recomendado (que fica de fora), diversificados
+        por `rank_diverse`, em forma resumida com a pontuação. `scored` reaproveita o
+        (linhas, pontuação) já calculado na requisição.
+        """
+        if k <= 0:
+            return []
+        catalog = self.catalog if catalog is None else catalog
+        if scored is None:
+            scored = self._scores(catalog, DishProfile.coerce(dish_params), perfil_fuzzy, filters, description)
+        rows, score = scored
+        positions = self._diverse(catalog, rows, score, k + 1, diversity, None)[1:]
+        
+        result = []
+        for position in positions.tolist():
+            wine = catalog.wine(int(self._at(rows, position)))
+            result.append({
+                'nome': wine['nome'],
+                'uva': wine['uva'],
+                'tipo': wine['tipo'],
+                'país': wine['país'],
+                'região': wine['região'],
+                'score': round(float(score[position]), 4),
+            })
+        return result
+    
+    @traced('recommend')
+    def recommend(self, dish_params: Dict[str, float], perfil_fuzzy: Dict[str, any],
+                  alternatives: int = 0, diversity: Optional[float] = None,
+                  filters: Optional[Dict] = None, description: Optional[str] = None) -> Dict[str, any]:
+        """
+        Recomenda um vinho baseado nos parâmetros do prato (DishProfile ou dict) e perfil fuzzy.
+        Com `alternatives`, a resposta inclui em 'alternativas' outros vinhos diversificados
+        (ver `rank_diverse`). `filters` restringe os vinhos por tipo, uva, país, região e teor
+        alcoólico (ver `WineCatalog.filter_rows`); sem vinho que atenda, levanta ValueError.
+        `description` (o texto do prato) ativa o uso das harmonizações do catálogo.
+        """
+        dish_params = DishProfile.coerce(dish_params)
+        logger.log(REQUEST_LOG_LEVEL, "Buscando vinho com perfil %s", perfil_fuzzy['categoria'])
         
-        # Ordenar por score e pegar o melhor
-        candidatos = candidatos.sort_values('score')
-        melhor = candidatos.iloc[0]
+        # Uma única leitura: a requisição inteira usa o mesmo catálogo mesmo se houver recarga
+        catalog = self.catalog
+        rows, score = self._scores(catalog, dish_params, perfil_fuzzy, filters, description)
         
-        logger.info(f"Melhor vinho selecionado: {melhor['nome']} (score: {melhor['score']:.2f})")
+        # Empates ficam com o primeiro vinho do catálogo
+        posicao = int(np.argmin(score))
+        indice = int(self._at(rows, posicao))
+        logger.log(REQUEST_LOG_LEVEL, "Melhor vinho selecionado: %s (score: %.2f)",
+                   catalog.wine(indice)['nome'], score[posicao])
+        result = self.describe(catalog, indice, dish_params, perfil_fuzzy)
+        if alternatives > 0:
+            result['alternativas'] = self.alternatives(dish_params, perfil_fuzzy, alternatives, diversity,
+                                                       catalog=catalog, scored=(rows, score))
+        return result
+    
+    def describe(self, catalog: WineCatalog, index: int, dish_params: DishProfile,
+                 perfil_fuzzy: Dict[str, any]) -> Dict[str, any]:
+        """Resposta para o vinho `index` do catálogo, com a justificativa"""
+        melhor = catalog.wine(index)
         
         # Justificativa com LLM (se disponível) ou fallback
         if self.use_llm_justification:
@@ -155,57 +362,19 @@ class WineRecommender:
         
         return justificativa.strip()
     
+    @traced('llm_justification')
     def _generate_llm_justification(self, wine, dish_params: Dict[str, float], perfil_fuzzy: Dict[str, any]) -> str:
         """
-        Gera uma justificativa detalhada usando o Gemini, incluindo fatos interessantes.
+        Gera uma justificativa detalhada usando o backend LLM, incluindo fatos interessantes.
         """
-        prompt = f"""
-Você é um sommelier expert. Explique de forma envolvente e didática por que o vinho {wine['nome']} 
-é a escolha perfeita para um prato com as seguintes características:
-
-**Características do Prato:**
-- Intensidade de sabor: {dish_params['intensidade_sabor']}/10
-- Acidez: {dish_params['acidez']}/10
-- Gordura: {dish_params['gordura']}/10
-- Dulçor: {dish_params['dulcor']}/10
-- Especiarias: {dish_params['especiarias']}/10
-- Método de preparo: {dish_params['metodo_preparo']}/10
-- Perfil Fuzzy calculado: {perfil_fuzzy['categoria']} ({perfil_fuzzy['valor']:.1f}/10)
-
-**Vinho Selecionado:**
-- Nome: {wine['nome']}
-- Uva: {wine['uva']}
-- Tipo: {wine['tipo']}
-- País/Região: {wine['país']}, {wine['região']}
-- Acidez: {wine['acidez']}/10
-- Corpo: {wine['corpo']}/10
-- Doçura: {wine['doçura']}/10
-- Intensidade: {wine['intensidade_sabor']}/10
-
-Sua resposta deve ter EXATAMENTE 3 parágrafos curtos (2-3 frases cada):
-
-1. **Harmonização Técnica**: Explique cientificamente por que os atributos do vinho (acidez, corpo, taninos) 
-   complementam o prato, citando valores específicos.
-
-2. **Experiência Sensorial**: Descreva como a combinação funcionará no paladar, 
-   quais sabores serão realçados ou equilibrados.
-
-3. **Fato Interessante**: Compartilhe uma curiosidade fascinante sobre o vinho, sua uva, região 
-   ou uma história/tradição relacionada à harmonização.
-
-Seja conciso, técnico mas acessível. Use linguagem de sommelier profissional.
-NÃO use markdown, asteriscos ou formatação especial.
-"""
-        
         try:
-            response = self.model.generate_content(prompt)
-            
-            if not response or not hasattr(response, 'text'):
-                logger.warning("Resposta inválida da LLM - usando justificativa básica")
-                return self._generate_justification(wine, dish_params, perfil_fuzzy)
-            
-            logger.info("Justificativa LLM gerada com sucesso")
-            return response.text.strip()
+            text = self.backend.justify(wine, dish_params, perfil_fuzzy)
+            logger.log(REQUEST_LOG_LEVEL, "Justificativa LLM gerada com sucesso")
+            return text.strip()
+        except LLMUnavailableError as e:
+            # Justificativa é opcional: sem orçamento ou com o circuito aberto, nem tenta o provedor
+            logger.log(REQUEST_LOG_LEVEL, "Justificativa LLM descartada (%s) - usando justificativa básica", e)
+            return self._generate_justification(wine, dish_params, perfil_fuzzy)
         except Exception as e:
-            logger.warning(f"Erro ao gerar justificativa com LLM: {str(e)} - usando justificativa básica")
+            logger.warning("Erro ao gerar justificativa com LLM: %s - usando justificativa básica", e)
             return self._generate_justification(wine, dish_params, perfil_fuzzy)
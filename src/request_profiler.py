@@ -0,0 +1,169 @@
+"""
+Perfil de CPU de uma fração das requisições de recomendação (opt-in).
+
+Com `PROFILE_RATE` > 0 (ou `serve --profile-rate`), cada requisição é sorteada com
+essa probabilidade e, se escolhida, roda sob um dos perfiladores:
+
+- "cprofile": `cProfile` determinístico na thread da requisição; grava
+  `<data>-<request_id>.prof` (abra com `python -m pstats` ou snakeviz);
+- "amostragem": uma thread lê a pilha da requisição a cada `PROFILE_INTERVAL`
+  segundos (`sys._current_frames`) e grava `<data>-<request_id>.collapsed`, no
+  formato de pilhas colapsadas do py-spy/flamegraph.pl/speedscope.
+
+Ao lado de cada perfil vai um `.json` com a descrição do prato, a duração total e
+os tempos por etapa registrados pelo tracer. Desligado (taxa 0), o serviço não cria
+o perfilador e o caminho da requisição não muda.
+"""
+import cProfile
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+try:
+    from . import config
+    from .logger import setup_logger
+    from .tracing import tracer
+except ImportError:
+    import config
+    from logger import setup_logger
+    from tracing import tracer
+
+logger = setup_logger(__name__)
+
+PROFILE_MODES = ('cprofile', 'amostragem')
+DEFAULT_PROFILE_DIR = Path(__file__).parent.parent / ".cache" / "profiles"
+
+
+class _StackSampler(threading.Thread):
+    """Conta as pilhas de uma thread, amostradas em intervalo fixo"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+class RequestProfiler:
+    """Sorteia requisições e grava o perfil de CPU de cada uma escolhida"""
+
+    def __init__(self, rate: float, directory: Union[str, Path, None] = None, mode: str = 'cprofile',
+                 interval: float = 0.001):
+        if not 0 < rate <= 1:
+            raise ValueError(f"Taxa de perfilamento deve estar em (0, 1]: {rate}")
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Modo de perfilamento inválido: {mode} (use {', '.join(PROFILE_MODES)})")
+        if interval <= 0:
+            raise ValueError(f"Intervalo de amostragem deve ser positivo: {interval}")
+        self.rate = rate
+        self.directory = Path(directory or DEFAULT_PROFILE_DIR)
+        self.mode = mode
+        self.interval = interval
+        self.saved = 0
+        self.skipped = 0
+        # Um cProfile por vez: o interpretador não aceita perfiladores simultâneos
+        self._cprofile_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, rate: Optional[float] = None, mode: Optional[str] = None,
+                    directory: Optional[str] = None) -> Optional['RequestProfiler']:
+        """
+        Perfilador com os argumentos dados ou `PROFILE_RATE`/`PROFILE_MODE`/`PROFILE_DIR`,
+        ou None se a taxa for 0 (desligado)
+        """
+        rate = config.PROFILE_RATE if rate is None else rate
+        if rate <= 0:
+            return None
+        return cls(rate, directory or config.PROFILE_DIR or None, mode or config.PROFILE_MODE, config.PROFILE_INTERVAL)
+
+    def sampled(self) -> bool:
+        return self.rate >= 1 or random.random() < self.rate
+
+    @contextmanager
+    def profile(self, request_id: str, description: str = ''):
+        """Perfila o bloco e grava o resultado com os tempos por etapa do request"""
+        if self.mode == 'cprofile':
+            if not self._cprofile_lock.acquire(blocking=False):
+                with self._lock:
+                    self.skipped += 1
+                yield
+                return
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+            finally:
+                self._cprofile_lock.release()
+                self._save(request_id, description, time.perf_counter() - start, profiler=profiler)
+        else:
+            sampler = _StackSampler(threading.get_ident(), self.interval)
+            start = time.perf_counter()
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                self._save(request_id, description, time.perf_counter() - start, stacks=sampler.stacks)
+
+    def _save(self, request_id: str, description: str, seconds: float,
+              profiler: Optional[cProfile.Profile] = None, stacks: Optional[Counter] = None) -> None:
+        # Falhas de gravação não derrubam a requisição
+        base = self.directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{request_id}"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if profiler is not None:
+                path = base.with_suffix('.prof')
+                profiler.dump_stats(str(path))
+            else:
+                path = base.with_suffix('.collapsed')
+                path.write_text(''.join(f"{stack} {count}\n" for stack, count in stacks.most_common()),
+                                encoding='utf-8')
+            meta = {
+                'request_id': request_id,
+                'prato': description,
+                'modo': self.mode,
+                'total_ms': seconds * 1000,
+                'etapas_ms': {stage: s * 1000 for stage, s in tracer.request_spans(request_id)},
+            }
+            if stacks is not None:
+                meta['amostras'] = sum(stacks.values())
+                meta['intervalo_s'] = self.interval
+            base.with_suffix('.json').write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding='utf-8')
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o perfil da requisição {request_id} ({e})")
+            return
+        with self._lock:
+            self.saved += 1
+        logger.info(f"Perfil da requisição {request_id} gravado em {path} ({seconds * 1000:.1f} ms)")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'taxa': self.rate, 'modo': self.mode, 'gravados': self.saved, 'ignorados': self.skipped,
+                    'diretorio': str(self.directory)}
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local (asyncio, sem dependências externas) sobre um PairingService
+aquecido: motor fuzzy, catálogo de vinhos, base de pratos e cache LLM ficam em
+memória entre as requisições.
+
+Endpoints:
+    POST /recommend        {"prato": "...", "alternativas": 3, "diversidade": 0.3,
+                            "filtros": {"tipo": "branco", "país": ["Portugal"], "teor_max": 13}}
+                           (só "prato" é obrigatório)
+    POST /recommend/batch  {"pratos": ["...", ...]}
+    GET  /rules
+    GET  /stats            (?format=prometheus para o formato texto do Prometheus)
+
+As recomendações entram em uma fila limitada e são executadas por um pool de
+threads; com a fila cheia o servidor responde 503 na hora (com Retry-After) em
+vez de acumular requisições e latência.
+
+Uso:
+    python src/cli.py serve [--host 127.0.0.1] [--port 8000] [--profile-rate 0.01]
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+try:
+    from . import config
+    from .logger import request_log_level, setup_logger
+    from .tracing import tracer
+    from .llm_backends import LLMBackendError, LLMUnavailableError
+    from .pairing_service import PairingService
+    from .request_profiler import PROFILE_MODES, RequestProfiler
+    from .dish_profile import DishProfile
+except ImportError:
+    import config
+    from logger import request_log_level, setup_logger
+    from tracing import tracer
+    from llm_backends import LLMBackendError, LLMUnavailableError
+    from pairing_service import PairingService
+    from request_profiler import PROFILE_MODES, RequestProfiler
+    from dish_profile import DishProfile
+
+logger = setup_logger(__name__)
+REQUEST_LOG_LEVEL = request_log_level()
+
+MAX_BODY_BYTES = 1 << 20
+
+STATUS_TEXT = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error',
+    502: 'Bad Gateway', 503: 'Service Unavailable',
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _json_default(value):
+    """Converte escalares NumPy (valores vindos do catálogo) e perfis de prato para JSON"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, DishProfile):
+        return value.to_dict()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def encode_json(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8')
+
+
+class PairingServer:
+    """Servidor HTTP/1.1 mínimo com fila limitada na frente do pipeline"""
+
+    def __init__(self, service: PairingService, host: str = None, port: int = None,
+                 queue_size: int = None, workers: int = None, max_batch: int = None):
+        self.service = service
+        self.host = config.SERVER_HOST if host is None else host
+        self.port = config.SERVER_PORT if port is None else port
+        self.queue_size = config.SERVER_QUEUE_SIZE if queue_size is None else queue_size
+        self.workers = config.SERVER_WORKERS if workers is None else workers
+        self.max_batch = config.SERVER_MAX_BATCH if max_batch is None else max_batch
+
+        self.counters = {'aceitas': 0, 'rejeitadas': 0, 'erros': 0}
+        self.queue: Optional[asyncio.Queue] = None
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pairing')
+        self._server = None
+        self._tasks = []
+
+    async def start(self) -> None:
+        """Abre o socket e inicia os consumidores da fila (porta 0 escolhe uma livre)"""
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Servidor ouvindo em http://{self.host}:{self.port} "
+                    f"(fila={self.queue_size}, workers={self.workers})")
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False)
+
+    async def _consume(self) -> None:
+        """Retira trabalhos da fila e os executa no pool de threads"""
+        loop = asyncio.get_running_loop()
+        while True:
+            func, args, future = await self.queue.get()
+            try:
+                if not future.cancelled():
+                    result = await loop.run_in_executor(self._executor, func, *args)
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    async def _submit(self, func, *args):
+        """Enfileira um trabalho e aguarda o resultado; 503 imediato com a fila cheia"""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((func, args, future))
+        except asyncio.QueueFull:
+            self.counters['rejeitadas'] += 1
+            raise HTTPError(503, "Servidor sobrecarregado, tente novamente", {'Retry-After': '1'})
+        self.counters['aceitas'] += 1
+        return await future
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, payload, extra = await self._dispatch(method, target, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._write_response(writer, status, payload, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            await self._write_response(writer, e.status, {'erro': str(e)}, e.headers, keep_alive=False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _readline(reader: asyncio.StreamReader, status: int, message: str) -> bytes:
+        # Linha maior que o limite do StreamReader (64 KiB) vira erro HTTP, não exceção solta
+        try:
+            return await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise HTTPError(status, message)
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict, bytes]]:
+        request_line = await self._readline(reader, 400, "Linha de requisição muito longa")
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, "Linha de requisição inválida")
+
+        headers = {}
+        while True:
+            line = await self._readline(reader, 431, "Cabeçalho muito longo")
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(400, "Content-Length inválido")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Corpo maior que {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: int, payload,
+                              extra_headers: Dict[str, str], keep_alive: bool) -> None:
+        if isinstance(payload, str):
+            body, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body, content_type = encode_json(payload), 'application/json; charset=utf-8'
+
+        head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        head.extend(f"{name}: {value}" for name, value in extra_headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, object, Dict[str, str]]:
+        url = urlsplit(target)
+        routes = {
+            '/recommend': ('POST', self._recommend),
+            '/recommend/batch': ('POST', self._recommend_batch),
+            '/rules': ('GET', self._rules),
+            '/stats': ('GET', self._stats),
+        }
+        try:
+            route = routes.get(url.path.rstrip('/') or '/')
+            if route is None:
+                raise HTTPError(404, f"Rota não encontrada: {url.path}")
+            if method != route[0]:
+                raise HTTPError(405, f"Use {route[0]} em {url.path}", {'Allow': route[0]})
+
+            payload = await route[1](body, parse_qs(url.query))
+            return 200, payload, {}
+        except HTTPError as e:
+            return e.status, {'erro': str(e)}, e.headers
+        except ValueError as e:
+            return 400, {'erro': str(e)}, {}
+        except LLMUnavailableError as e:
+            self.counters['rejeitadas'] += 1
+            return 503, {'erro': f"LLM indisponível: {e}"}, {'Retry-After': '5'}
+        except LLMBackendError as e:
+            self.counters['erros'] += 1
+            return 502, {'erro': f"Falha do LLM: {e}"}, {}
+        except Exception as e:
+            self.counters['erros'] += 1
+            logger.exception(f"Erro inesperado em {method} {url.path}")
+            return 500, {'erro': f"Erro inesperado: {e}"}, {}
+
+    @staticmethod
+    def _parse_body(body: bytes) -> Dict:
+        try:
+            data = json.loads(body or b'{}')
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ValueError(f"JSON inválido: {e}")
+        if not isinstance(data, dict):
+            raise ValueError("O corpo deve ser um objeto JSON")
+        return data
+
+    async def _recommend(self, body: bytes, query: Dict):
+        data = self._parse_body(body)
+        if 'prato' not in data:
+            raise ValueError("Campo 'prato' obrigatório")
+        return await self._submit(self.service.recommend, data['prato'], None,
+                                  data.get('alternativas', 0), data.get('diversidade'), data.get('filtros'))
+
+    async def _recommend_batch(self, body: bytes, query: Dict):
+        data = self._parse_body(body)
+        pratos = data.get('pratos')
+        if not isinstance(pratos, list) or not pratos:
+            raise ValueError("Campo 'pratos' deve ser uma lista não vazia")
+        if len(pratos) > self.max_batch:
+            raise HTTPError(413, f"Lote com {len(pratos)} pratos; o máximo é {self.max_batch}")
+        return {'resultados': await self._submit(self.service.recommend_batch, pratos)}
+
+    async def _rules(self, body: bytes, query: Dict):
+        return self.service.rules()
+
+    async def _stats(self, body: bytes, query: Dict):
+        if query.get('format', [''])[0] == 'prometheus':
+            return tracer.to_prometheus()
+        stats = self.service.stats()
+        stats['servidor'] = {
+            'fila': self.queue.qsize(),
+            'capacidade_fila': self.queue_size,
+            'workers': self.workers,
+            **self.counters,
+        }
+        return stats
+
+
+async def serve(service: PairingService, **options) -> None:
+    server = PairingServer(service, **options)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP do sistema de harmonização")
+    parser.add_argument('--host', default=None, help="padrão: SERVER_HOST ou 127.0.0.1")
+    parser.add_argument('--port', type=int, default=None, help="padrão: SERVER_PORT ou 8000")
+    parser.add_argument('--queue-size', type=int, default=None, help="padrão: SERVER_QUEUE_SIZE ou 64")
+    parser.add_argument('--workers', type=int, default=None, help="padrão: SERVER_WORKERS ou 8")
+    parser.add_argument('--profile-rate', type=float, default=None,
+                        help="fração das requisições com perfil de CPU (padrão: PROFILE_RATE ou 0)")
+    parser.add_argument('--profile-mode', choices=PROFILE_MODES, default=None, help="padrão: PROFILE_MODE ou cprofile")
+    parser.add_argument('--profile-dir', default=None, help="padrão: PROFILE_DIR ou .cache/profiles")
+    args = parser.parse_args(argv)
+
+    profiler = RequestProfiler.from_config(args.profile_rate, args.profile_mode, args.profile_dir)
+
+    print("[...] Carregando motor fuzzy, catálogo de vinhos e base de pratos...")
+    service = PairingService(watch_catalog=config.CATALOG_WATCH_INTERVAL > 0, profiler=profiler)
+    try:
+        asyncio.run(serve(service, host=args.host, port=args.port,
+                          queue_size=args.queue_size, workers=args.workers))
+    except KeyboardInterrupt:
+        logger.info("Servidor encerrado pelo usuário")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Rastreamento leve de latência por etapa do pipeline (spans com request ID),
+agregado em histogramas por etapa e exportável em formato texto do Prometheus
+"""
+import contextvars
+import functools
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .logger import setup_logger
+except ImportError:
+    from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Limites (em segundos) dos buckets do histograma exportado para o Prometheus
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('request_id', default=None)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def current_request_id() -> Optional[str]:
+    return _current_request_id.get()
+
+
+@contextmanager
+def request_scope(request_id: Optional[str] = None):
+    """Associa os spans executados dentro do bloco a um request ID"""
+    request_id = request_id or new_request_id()
+    token = _current_request_id.set(request_id)
+    try:
+        yield request_id
+    finally:
+        _current_request_id.reset(token)
+
+
+class StageHistogram:
+    """Latências de uma etapa: buckets cumulativos + amostras recentes para percentis"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, max_samples: int = 10_000):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        self.count += 1
+        self.total += seconds
+        if error:
+            self.errors += 1
+        self.samples.append(seconds)
+        for i, limit in enumerate(self.buckets):
+            if seconds <= limit:
+                self.bucket_counts[i] += 1
+
+    def percentiles(self, qs=(50, 95, 99)) -> Dict[str, float]:
+        if not self.samples:
+            return {f"p{q}": 0.0 for q in qs}
+        values = np.percentile(np.fromiter(self.samples, dtype=np.float64), qs)
+        return {f"p{q}": float(v) for q, v in zip(qs, values)}
+
+
+class Tracer:
+    """Coleta spans de todas as threads; acesso aos agregados protegido por lock"""
+
+    def __init__(self, max_requests: int = 1000):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageHistogram] = OrderedDict()
+        self._requests: "OrderedDict[str, List[Tuple[str, float]]]" = OrderedDict()
+        self._max_requests = max_requests
+
+    @contextmanager
+    def span(self, stage: str):
+        """Mede a duração do bloco e registra no histograma da etapa"""
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, error=error)
+
+    def record(self, stage: str, seconds: float, error: bool = False) -> None:
+        request_id = _current_request_id.get()
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = StageHistogram()
+            histogram.observe(seconds, error)
+
+            if request_id is not None:
+                spans = self._requests.get(request_id)
+                if spans is None:
+                    spans = self._requests[request_id] = []
+                    if len(self._requests) > self._max_requests:
+                        self._requests.popitem(last=False)
+                spans.append((stage, seconds))
+
+        logger.debug("span stage=%s request=%s duracao_ms=%.2f", stage, request_id, seconds * 1000)
+
+    def request_spans(self, request_id: str) -> List[Tuple[str, float]]:
+        """Spans (etapa, segundos) registrados para um request"""
+        with self._lock:
+            return list(self._requests.get(request_id, []))
+
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """Resumo por etapa: contagem, erros, média e p50/p95/p99 em milissegundos"""
+        with self._lock:
+            stats = {}
+            for stage, histogram in self._stages.items():
+                entry = {
+                    'count': histogram.count,
+                    'errors': histogram.errors,
+                    'mean_ms': histogram.total / histogram.count * 1000 if histogram.count else 0.0,
+                }
+                entry.update({f"{k}_ms": v * 1000 for k, v in histogram.percentiles().items()})
+                stats[stage] = entry
+            return stats
+
+    def to_prometheus(self, prefix: str = "wine_pairing") -> str:
+        """Exporta os agregados no formato texto do Prometheus (histograma + resumo)"""
+        lines = [
+            f"# HELP {prefix}_stage_duration_seconds Duração das etapas do pipeline",
+            f"# TYPE {prefix}_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            stages = [(stage, h, h.percentiles()) for stage, h in self._stages.items()]
+            for stage, histogram, _ in stages:
+                for limit, count in zip(histogram.buckets, histogram.bucket_counts):
+                    lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{stage}",le="{limit}"}} {count}')
+                lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+                lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+            lines.append(f"# HELP {prefix}_stage_latency_seconds Percentis recentes da duração por etapa")
+            lines.append(f"# TYPE {prefix}_stage_latency_seconds summary")
+            for stage, histogram, percentiles in stages:
+                for key, value in percentiles.items():
+                    quantile = int(key[1:]) / 100
+                    lines.append(f'{prefix}_stage_latency_seconds{{stage="{stage}",quantile="{quantile}"}} {value:.6f}')
+                lines.append(f'{prefix}_stage_latency_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+                lines.append(f'{prefix}_stage_latency_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+            lines.append(f"# HELP {prefix}_stage_errors_total Spans encerrados com exceção")
+            lines.append(f"# TYPE {prefix}_stage_errors_total counter")
+            for stage, histogram, _ in stages:
+                lines.append(f'{prefix}_stage_errors_total{{stage="{stage}"}} {histogram.errors}')
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._requests.clear()
+
+
+# Tracer global do processo
+tracer = Tracer()
+
+
+def traced(stage: str):
+    """Decorator que envolve a função em um span da etapa indicada"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,211 @@
+"""
+Estado imutável do catálogo de vinhos usado pelo WineRecommender.
+
+Cada instância reúne os dados carregados (DataFrame ou colunas do snapshot
+mapeadas em memória) e tudo o que é pré-calculado a partir deles. Uma recarga
+constrói uma instância nova e a troca inteira, de modo que uma requisição que
+já pegou a referência continua vendo um catálogo consistente.
+"""
+import time
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .config import REQUIRED_CSV_COLUMNS
+    from .logger import setup_logger
+    from .catalog_snapshot import StringColumn, load_catalog_with_sha, open_snapshot
+    from .lazy_imports import lazy_import
+    from .harmonization_tags import TagIndex
+except ImportError:
+    from config import REQUIRED_CSV_COLUMNS
+    from logger import setup_logger
+    from catalog_snapshot import StringColumn, load_catalog_with_sha, open_snapshot
+    from lazy_imports import lazy_import
+    from harmonization_tags import TagIndex
+
+pd = lazy_import('pandas')
+
+logger = setup_logger(__name__)
+
+# Filtros aceitos por `filter_rows`: colunas de texto (um valor ou lista, sem
+# diferenciar maiúsculas) e a faixa de teor alcoólico
+CATEGORY_FILTERS = ('tipo', 'uva', 'país', 'região')
+RANGE_FILTERS = {'teor_min': 'teor_alcoolico', 'teor_max': 'teor_alcoolico'}
+
+
+class WineCatalog:
+    """Catálogo de vinhos carregado (somente leitura após a construção)"""
+
+    def __init__(self, csv_path: str, storage: str, df=None, snapshot=None, source_sha256: Optional[str] = None):
+        self.csv_path = csv_path
+        self.storage = storage
+        self.df = df
+        self.snapshot = snapshot
+        # SHA-256 do conteúdo carregado (o arquivo em disco pode mudar depois da carga)
+        self.source_sha256 = snapshot.source_sha256 if snapshot is not None else source_sha256
+        self.loaded_at = time.time()
+        self._features: Dict[Tuple[str, ...], Tuple[np.ndarray, np.ndarray]] = {}
+        self._codes: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        self._tags = None
+
+    @classmethod
+    def load(cls, csv_path: str, use_snapshot: bool = True, storage: str = 'dataframe') -> 'WineCatalog':
+        """
+        Carrega o CSV no modo pedido ("dataframe" ou "mmap"); sem snapshot utilizável,
+        o modo "mmap" volta ao DataFrame. As colunas são conferidas por `validate()`.
+        """
+        catalog = None
+        if storage == 'mmap' and use_snapshot:
+            try:
+                catalog = cls(csv_path, 'mmap', snapshot=open_snapshot(csv_path))
+            except Exception as e:
+                logger.warning(f"Catálogo mapeado em memória indisponível ({e}); usando DataFrame")
+        if catalog is None:
+            df, sha = load_catalog_with_sha(csv_path, use_snapshot=use_snapshot)
+            catalog = cls(csv_path, 'dataframe', df=df, source_sha256=sha)
+        return catalog
+
+    def validate(self) -> None:
+        """Valida que todas as colunas necessárias existem no CSV"""
+        missing_columns = [col for col in REQUIRED_CSV_COLUMNS if col not in self.columns]
+
+        if missing_columns:
+            error_msg = f"Colunas ausentes no CSV: {', '.join(missing_columns)}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+
+        logger.info("Todas as colunas necessárias foram encontradas no CSV")
+
+    def __len__(self) -> int:
+        return len(self.snapshot) if self.snapshot is not None else len(self.df)
+
+    @property
+    def columns(self) -> List[str]:
+        return self.snapshot.column_names if self.snapshot is not None else list(self.df.columns)
+
+    def column(self, name: str) -> np.ndarray:
+        """Coluna numérica como array NumPy (sem cópia nos dois modos)"""
+        if self.snapshot is not None:
+            return self.snapshot.columns[name]
+        return self.df[name].to_numpy()
+
+    def wine(self, i: int):
+        """Linha i do catálogo (dict no modo mmap, Series no modo DataFrame)"""
+        if self.snapshot is not None:
+            return self.snapshot.row(i)
+        return self.df.iloc[i]
+
+    def feature_matrix(self, columns: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Matriz float64 (vinhos x colunas) na ordem pedida (colunas podem se repetir)
+        e a máscara dos vinhos sem NaN nelas. Calculada uma vez por catálogo; no modo
+        mmap é uma cópia privada do processo.
+        """
+        cached = self._features.get(columns)
+        if cached is None:
+            matrix = np.column_stack([self.column(name).astype(np.float64) for name in columns])
+            cached = (matrix, ~np.isnan(matrix).any(axis=1))
+            self._features[columns] = cached
+        return cached
+
+    def codes(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Coluna de texto como códigos int32 por vinho (-1 = ausente) e o array das
+        categorias; no modo mmap são os códigos do snapshot, no modo DataFrame são
+        calculados uma vez por catálogo
+        """
+        cached = self._codes.get(name)
+        if cached is None:
+            column = self.snapshot.columns[name] if self.snapshot is not None else None
+            if isinstance(column, StringColumn):
+                cached = (column.codes, column.categories)
+            else:
+                codes, categories = pd.factorize(self.df[name] if column is None else column, use_na_sentinel=True)
+                cached = (codes.astype(np.int32), np.asarray(categories, dtype=object))
+            self._codes[name] = cached
+        return cached
+
+    def tags(self) -> TagIndex:
+        """Vocabulário e índice invertido das harmonizações (montado uma vez por catálogo)"""
+        if self._tags is None:
+            codes, values = self.codes('harmonizacoes')
+            self._tags = TagIndex(codes, values)
+        return self._tags
+
+    def bitmaps(self, name: str) -> Dict[str, np.ndarray]:
+        """
+        Índice de bitmaps de uma coluna de texto: valor em minúsculas -> bits por vinho
+        (np.packbits, N/8 bytes). Construído uma vez por catálogo a partir dos códigos.
+        """
+        index = self._bitmaps.get(name)
+        if index is None:
+            codes, categories = self.codes(name)
+            # Vinhos agrupados por código: cada bitmap marca só as posições do seu grupo
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+            index = {}
+            for code, value in enumerate(categories):
+                bits = np.zeros(len(codes), dtype=bool)
+                bits[order[bounds[code]:bounds[code + 1]]] = True
+                key = str(value).strip().lower()
+                packed = np.packbits(bits)
+                index[key] = packed if key not in index else index[key] | packed
+            self._bitmaps[name] = index
+        return index
+
+    def filter_rows(self, filters: Optional[Mapping]) -> Optional[np.ndarray]:
+        """
+        Índices (ordenados) dos vinhos que atendem aos filtros, ou None sem filtros.
+
+        `filters` aceita 'tipo', 'uva', 'país' e 'região' (texto ou lista de textos; dentro de
+        uma coluna vale qualquer um, entre colunas valem todas) e 'teor_min'/'teor_max'.
+        As colunas de texto são combinadas como bitmaps pré-calculados, antes de
+        qualquer pontuação. Levanta ValueError para filtros desconhecidos ou inválidos.
+        """
+        if not filters:
+            return None
+
+        unknown = [key for key in filters if key not in CATEGORY_FILTERS and key not in RANGE_FILTERS]
+        if unknown:
+            raise ValueError(f"Filtro desconhecido: {', '.join(unknown)} "
+                             f"(use {', '.join(CATEGORY_FILTERS + tuple(RANGE_FILTERS))})")
+
+        selected = None
+        for name in CATEGORY_FILTERS:
+            values = filters.get(name)
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            if not isinstance(values, (list, tuple)) or not values or not all(isinstance(v, str) for v in values):
+                raise ValueError(f"Filtro '{name}' deve ser um texto ou uma lista de textos")
+
+            index = self.bitmaps(name)
+            empty = np.zeros((len(self) + 7) // 8, dtype=np.uint8)
+            bits = np.bitwise_or.reduce([index.get(v.strip().lower(), empty) for v in values])
+            selected = bits if selected is None else selected & bits
+
+        mask = None if selected is None else np.unpackbits(selected, count=len(self)).view(bool)
+
+        limits = {}
+        for key in RANGE_FILTERS:
+            value = filters.get(key)
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Filtro '{key}' deve ser numérico")
+            limits[key] = float(value)
+        if limits:
+            teor = self.column('teor_alcoolico')
+            # Só os vinhos que passaram pelos filtros de texto são comparados
+            rows = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+            keep = np.ones(len(rows), dtype=bool)
+            if 'teor_min' in limits:
+                keep &= teor[rows] >= limits['teor_min']
+            if 'teor_max' in limits:
+                keep &= teor[rows] <= limits['teor_max']
+            return rows[keep]
+
+        return np.arange(len(self)) if mask is None else np.flatnonzero(mask)
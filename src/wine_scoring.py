@@ -0,0 +1,196 @@
+"""
+Pontuação dos vinhos candidatos (menor = melhor) a partir de uma especificação
+declarativa: quais parâmetros do prato se comparam com quais colunas do vinho,
+com que peso e de que forma, mais a penalidade de corpo derivada do perfil fuzzy.
+
+A especificação é compilada em vetores de pesos e índices, e a pontuação do
+catálogo inteiro vira uma única expressão NumPy sobre a matriz (vinhos x termos),
+então acrescentar termos não cria custo Python por vinho.
+
+Formato (dict ou arquivo JSON em WINE_SCORING_FILE):
+
+    {
+      "termos": [
+        {"prato": "acidez", "vinho": "acidez", "peso": 1.0, "tipo": "distancia"},
+        {"prato": "gordura", "vinho": "acidez", "peso": 0.3, "tipo": "deficit"},
+        ...
+      ],
+      "corpo": {"modo": "suave", "peso": 1.0, "tolerancia": 1.5}
+    }
+
+Tipos de termo, com x = escala * vinho - prato:
+- "distancia": peso * |x|          (o vinho deve acompanhar o prato)
+- "deficit":   peso * max(0, -x)   (o vinho precisa de pelo menos o nível do prato)
+- "excesso":   peso * max(0, x)    (o vinho não deve passar do nível do prato)
+
+Corpo: "suave" soma peso * max(0, |corpo - valor fuzzy| - tolerancia); "faixa"
+mantém o filtro antigo por faixas fixas de corpo por categoria.
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from . import config
+    from .logger import setup_logger
+    from .dish_profile import PARAM_INDEX, DishProfile
+except ImportError:
+    import config
+    from logger import setup_logger
+    from dish_profile import PARAM_INDEX, DishProfile
+
+logger = setup_logger(__name__)
+
+TERM_KINDS = ('distancia', 'deficit', 'excesso')
+# Atributos comparados na diversificação das alternativas (mesmo valor = parecidos)
+DIVERSITY_ATTRIBUTES = ('uva', 'país', 'tipo')
+WINE_NUMERIC_COLUMNS = ('acidez', 'corpo', 'doçura', 'intensidade_sabor', 'teor_alcoolico')
+
+# Faixas de corpo por categoria do modo "faixa" (comportamento original)
+BODY_BANDS = {'leve': (0, 5), 'medio': (4, 7), 'encorpado': (6, 10)}
+
+DEFAULT_SCORING = {
+    'termos': [
+        # Equilíbrio direto (pesos originais)
+        {'prato': 'acidez', 'vinho': 'acidez', 'peso': 1.0, 'tipo': 'distancia'},
+        {'prato': 'intensidade_sabor', 'vinho': 'intensidade_sabor', 'peso': 1.0, 'tipo': 'distancia'},
+        {'prato': 'dulcor', 'vinho': 'doçura', 'peso': 0.5, 'tipo': 'distancia'},
+        # Gordura e sal pedem acidez para limpar o paladar
+        {'prato': 'gordura', 'vinho': 'acidez', 'peso': 0.3, 'tipo': 'deficit'},
+        {'prato': 'nivel_salgado', 'vinho': 'acidez', 'peso': 0.2, 'tipo': 'deficit'},
+        # Especiarias: vinho discreto demais some; açúcar residual suaviza o ardor
+        {'prato': 'especiarias', 'vinho': 'intensidade_sabor', 'peso': 0.3, 'tipo': 'deficit'},
+        {'prato': 'especiarias', 'vinho': 'doçura', 'peso': 0.1, 'tipo': 'deficit'},
+        # Umami acentua a estrutura do vinho: corpo acima do umami do prato pesa
+        {'prato': 'teor_umami', 'vinho': 'corpo', 'peso': 0.15, 'tipo': 'excesso'},
+    ],
+    'corpo': {'modo': 'suave', 'peso': 1.0, 'tolerancia': 1.5},
+}
+
+
+class WineScorer:
+    """Especificação de pontuação compilada em vetores de índices e pesos"""
+
+    def __init__(self, spec: Optional[Dict] = None):
+        spec = DEFAULT_SCORING if spec is None else spec
+        terms = spec.get('termos', [])
+        if not terms:
+            raise ValueError("A pontuação precisa de pelo menos um termo")
+
+        for term in terms:
+            if term.get('prato') not in PARAM_INDEX:
+                raise ValueError(f"Parâmetro do prato desconhecido na pontuação: {term.get('prato')}")
+            if term.get('vinho') not in WINE_NUMERIC_COLUMNS:
+                raise ValueError(f"Coluna do vinho inválida na pontuação: {term.get('vinho')} "
+                                 f"(use {', '.join(WINE_NUMERIC_COLUMNS)})")
+            if term.get('tipo', 'distancia') not in TERM_KINDS:
+                raise ValueError(f"Tipo de termo inválido: {term.get('tipo')} (use {', '.join(TERM_KINDS)})")
+
+        body = {'modo': 'suave', 'peso': 1.0, 'tolerancia': 1.5, **spec.get('corpo', {})}
+        if body['modo'] not in ('suave', 'faixa'):
+            raise ValueError(f"Modo de corpo inválido: {body['modo']} (use 'suave' ou 'faixa')")
+
+        self.spec = {'termos': [dict(term) for term in terms], 'corpo': body}
+        self.body_mode = body['modo']
+        self.body_weight = float(body['peso'])
+        self.body_tolerance = float(body['tolerancia'])
+
+        # Colunas da matriz de features do catálogo: uma por termo e o corpo por último
+        self.columns: Tuple[str, ...] = tuple(term['vinho'] for term in terms) + ('corpo',)
+        self._dish_index = np.array([PARAM_INDEX[term['prato']] for term in terms], dtype=np.intp)
+        self._scale = np.array([float(term.get('escala', 1.0)) for term in terms])
+        weights = np.array([float(term.get('peso', 1.0)) for term in terms])
+        kinds = np.array([term.get('tipo', 'distancia') for term in terms])
+        self._w_distance = np.where(kinds == 'distancia', weights, 0.0)
+        self._w_deficit = np.where(kinds == 'deficit', weights, 0.0)
+        self._w_excess = np.where(kinds == 'excesso', weights, 0.0)
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash da especificação normalizada (identifica resultados pré-calculados)"""
+        payload = json.dumps(self.spec, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> 'WineScorer':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_config(cls) -> 'WineScorer':
+        """Especificação de WINE_SCORING_FILE, ou a padrão"""
+        if config.WINE_SCORING_FILE:
+            logger.info(f"Pontuação de vinhos carregada de {config.WINE_SCORING_FILE}")
+            return cls.from_file(config.WINE_SCORING_FILE)
+        return cls()
+
+    def score(self, features: np.ndarray, profile: DishProfile, perfil_valor: float) -> np.ndarray:
+        """
+        Pontuação de cada linha de `features` (matriz vinhos x `columns`), em uma
+        expressão vetorizada: termos por produto com os vetores de peso + corpo
+        """
+        x = features[:, :-1] * self._scale - profile.values[self._dish_index]
+        score = np.abs(x) @ self._w_distance + np.maximum(-x, 0.0) @ self._w_deficit + np.maximum(x, 0.0) @ self._w_excess
+        if self.body_mode == 'suave' and self.body_weight:
+            score += self.body_weight * np.maximum(np.abs(features[:, -1] - perfil_valor) - self.body_tolerance, 0.0)
+        return score
+
+    def body_mask(self, features: np.ndarray, categoria: str) -> Optional[np.ndarray]:
+        """Filtro por faixa de corpo do modo "faixa" (None no modo suave)"""
+        if self.body_mode != 'faixa':
+            return None
+        corpo_min, corpo_max = BODY_BANDS.get(categoria, BODY_BANDS['encorpado'])
+        return (features[:, -1] >= corpo_min) & (features[:, -1] <= corpo_max)
+
+    def contributions(self, wine_features: np.ndarray, profile: DishProfile, perfil_valor: float) -> List[Dict]:
+        """Parcela de cada termo na pontuação de um vinho (para depuração e ajuste de pesos)"""
+        x = wine_features[:-1] * self._scale - profile.values[self._dish_index]
+        parts = np.abs(x) * self._w_distance + np.maximum(-x, 0.0) * self._w_deficit + np.maximum(x, 0.0) * self._w_excess
+        result = [{'termo': f"{t['prato']}->{t['vinho']} ({t.get('tipo', 'distancia')})", 'valor': float(v)}
+                  for t, v in zip(self.spec['termos'], parts)]
+        if self.body_mode == 'suave':
+            body = self.body_weight * max(abs(float(wine_features[-1]) - perfil_valor) - self.body_tolerance, 0.0)
+            result.append({'termo': 'corpo (suave)', 'valor': body})
+        return result
+
+
+def select_diverse(score: np.ndarray, codes: np.ndarray, k: int, diversity: float) -> np.ndarray:
+    """
+    Seleção gulosa por relevância marginal máxima (MMR) sobre um conjunto de
+    candidatos já ordenado do melhor para o pior.
+
+    `score` é a pontuação dos candidatos (menor = melhor) e `codes` a matriz
+    (candidatos x atributos) de códigos categóricos (-1 = ausente). A cada passo entra
+    o candidato que maximiza
+
+        (1 - diversity) * relevância - diversity * semelhança com os já escolhidos
+
+    com a relevância normalizada para 0-1 no conjunto e a semelhança como fração de
+    atributos iguais. `diversity=0` devolve a ordem original; o primeiro escolhido é
+    sempre o melhor candidato. Retorna as posições escolhidas, na ordem de escolha.
+    """
+    n = len(score)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if diversity <= 0 or k == 1:
+        return np.arange(k)
+
+    spread = score[-1] - score[0]
+    relevance = 1.0 - (score - score[0]) / spread if spread > 0 else np.ones(n)
+    gain = (1.0 - diversity) * relevance
+    max_similarity = np.zeros(n)
+    available = np.ones(n, dtype=bool)
+    chosen = []
+
+    for _ in range(k):
+        # argmax devolve o primeiro em empates: o candidato mais bem pontuado
+        i = int(np.argmax(np.where(available, gain - diversity * max_similarity, -np.inf)))
+        chosen.append(i)
+        available[i] = False
+        same = (codes == codes[i]) & (codes[i] >= 0)
+        np.maximum(max_similarity, same.mean(axis=1), out=max_similarity)
+    return np.array(chosen, dtype=np.intp)